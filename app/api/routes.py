@@ -1,24 +1,72 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Query, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+import asyncio
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
 
 from config import settings
-from app.features.research_service import research_service
+from app.api.schemas import ScreenRequest, SignalLogPage
+from app.api.serialization import CurveOptions, curve_options, dumps, render
+from app.container import container
+from app.telemetry.metrics import metrics, profiling_active, render_counters
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/ui/templates")
+
+
+@lru_cache(maxsize=1)
+def templates() -> Jinja2Templates:
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="app/ui/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request) -> HTMLResponse:
-    return templates.TemplateResponse("index.html", {"request": request, "title": settings.app_name})
+    return templates().TemplateResponse("index.html", {"request": request, "title": settings.app_name})
 
 
 @router.get("/api/dashboard")
-async def dashboard(timeframe: str = Query(default=settings.default_timeframe)) -> dict[str, object]:
-    return await research_service.dashboard(settings.default_assets, timeframe)
+async def dashboard(
+    timeframe: str = Query(default=settings.default_timeframe),
+    options: CurveOptions = Depends(curve_options),
+    accept: str | None = Header(default=None),
+) -> Response:
+    if profiling_active.get():
+        # The shared snapshot is computed by a background task; a profiled request evaluates the universe itself.
+        if timeframe not in container.market_data.timeframe_map:
+            raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+        snapshot = await container.research.dashboard(settings.default_assets, timeframe)
+        return render(snapshot, accept, options)
+    try:
+        snapshot = await container.scheduler.latest(timeframe)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return render(snapshot, accept, options, cache_key=("dashboard", timeframe, snapshot["generated_at"]))
+
+
+@router.get("/api/dashboard/stream")
+async def dashboard_stream(
+    timeframe: str = Query(default=settings.default_timeframe),
+    options: CurveOptions = Depends(curve_options),
+) -> StreamingResponse:
+    if timeframe not in container.market_data.timeframe_map:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe: {timeframe}")
+
+    async def events():
+        async for event, payload in container.scheduler.subscribe(timeframe):
+            if payload is None:
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event}\ndata: {dumps(payload, options).decode()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @router.get("/api/replay")
@@ -26,5 +74,120 @@ async def replay(
     asset: str = Query(default="BTCUSDT"),
     timeframe: str = Query(default=settings.default_timeframe),
     at: str = Query(..., description="ISO-8601 timestamp"),
+    options: CurveOptions = Depends(curve_options),
+    accept: str | None = Header(default=None),
+) -> Response:
+    try:
+        result = await container.research.historical_replay(asset, timeframe, at)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return render(result, accept, options)
+
+
+@router.get("/api/confluence")
+async def confluence(
+    asset: str = Query(default="BTCUSDT"),
+    timeframes: str | None = Query(default=None, description="comma-separated, default all timeframes"),
+    options: CurveOptions = Depends(curve_options),
+    accept: str | None = Header(default=None),
+) -> Response:
+    selected = timeframes.split(",") if timeframes else list(container.market_data.timeframe_map)
+    try:
+        result = await container.research.confluence(asset, list(dict.fromkeys(selected)))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return render(result, accept, options)
+
+
+@router.get("/api/replay/range")
+async def replay_range(
+    start: datetime = Query(..., description="ISO-8601 first decision timestamp"),
+    end: datetime = Query(..., description="ISO-8601 last decision timestamp"),
+    asset: str = Query(default="BTCUSDT"),
+    timeframe: str = Query(default=settings.default_timeframe),
+    every: int = Query(default=1, ge=1, description="evaluate every N-th bar"),
+) -> StreamingResponse:
+    try:
+        lines = await container.research.replay_range(asset, timeframe, start, end, every)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.post("/api/screen")
+async def screen(request: ScreenRequest) -> StreamingResponse:
+    from app.features.screener import ScreenFilters
+
+    filters = ScreenFilters(
+        regimes=set(request.regimes) if request.regimes is not None else None,
+        directions=set(request.directions) if request.directions is not None else None,
+        min_confidence=request.min_confidence,
+        max_expected_drawdown=request.max_expected_drawdown,
+    )
+    try:
+        plan = await asyncio.to_thread(
+            container.screener.plan,
+            request.timeframe,
+            request.top_k,
+            filters,
+            request.assets,
+            request.universe,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(container.screener.stream(plan), media_type="application/x-ndjson")
+
+
+@router.get("/api/walk-forward")
+async def walk_forward(
+    asset: str = Query(default="BTCUSDT"),
+    timeframe: str = Query(default=settings.default_timeframe),
+    bars: int = Query(default=2000, ge=100, le=settings.cache_max_bars),
+) -> dict[str, object]:
+    try:
+        return await container.research.walk_forward(asset, timeframe, bars)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/api/logs", response_model=SignalLogPage)
+async def logs(
+    asset: str | None = Query(default=None),
+    timeframe: str | None = Query(default=None),
+    signal_name: str | None = Query(default=None),
+    direction: str | None = Query(default=None),
+    since: datetime | None = Query(default=None, description="ISO-8601 lower bound on created_at"),
+    until: datetime | None = Query(default=None, description="ISO-8601 upper bound on created_at"),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=50, ge=1, le=500),
 ) -> dict[str, object]:
-    return await research_service.historical_replay(asset, timeframe, at)
+    try:
+        items, next_cursor = await asyncio.to_thread(
+            container.db.query_signal_logs,
+            asset=asset,
+            timeframe=timeframe,
+            signal_name=signal_name,
+            direction=direction,
+            since=since,
+            until=until,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/api/cache/stats")
+async def cache_stats() -> dict[str, int]:
+    return dict(container.market_data.cache_stats)
+
+
+@router.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    body = metrics.render_prometheus()
+    if container.loaded("market_data"):
+        body += render_counters("market_data_cache_events_total", "event", container.market_data.cache_stats)
+    if container.loaded("research"):
+        body += render_counters("evaluation_memo_events_total", "event", container.research.memo.stats)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
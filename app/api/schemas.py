@@ -4,6 +4,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from config import settings
+
 
 class SignalLogEntry(BaseModel):
     id: int
@@ -19,6 +21,11 @@ class SignalLogEntry(BaseModel):
     expected_drawdown: float
 
 
+class SignalLogPage(BaseModel):
+    items: list[SignalLogEntry]
+    next_cursor: str | None = None
+
+
 class MetricsResponse(BaseModel):
     cagr: float
     sharpe: float
@@ -29,12 +36,25 @@ class MetricsResponse(BaseModel):
     expectancy: float
     risk_of_ruin: float
     win_rate: float
+    sharpe_ci_low: float
+    sharpe_ci_high: float
+    max_drawdown_ci_low: float
+    max_drawdown_ci_high: float
+
+
+class TypedArray(BaseModel):
+    """Little-endian array for ``curves=f32|f64``: base64 ``data`` in JSON, raw bytes in MessagePack."""
+
+    dtype: str
+    length: int
+    data: str
 
 
 class CurvesResponse(BaseModel):
-    equity: list[float]
-    drawdown: list[float]
-    rolling_sharpe: list[float]
+    equity: list[float | None] | TypedArray
+    drawdown: list[float | None] | TypedArray
+    rolling_sharpe: list[float | None] | TypedArray
+    index: list[int] | TypedArray | None = Field(default=None, description="kept bar offsets after ?points= LTTB")
 
 
 class RankedSignalResponse(BaseModel):
@@ -78,12 +98,77 @@ class AssetAnalysisResponse(BaseModel):
     performance_per_regime: dict[str, float]
 
 
+class AssetErrorResponse(BaseModel):
+    asset: str
+    timeframe: str
+    error: str
+
+
+class PortfolioPosition(BaseModel):
+    asset: str
+    direction: str
+    weight: float
+    risk_contribution: float
+
+
+class PortfolioResponse(BaseModel):
+    """Risk-parity, volatility-targeted book over the suggested directions; percentages are 0-100."""
+
+    timeframe: str
+    as_of: datetime
+    assets: int
+    bars: int
+    shrinkage: float
+    volatility: float
+    gross_leverage: float
+    diversification_ratio: float
+    max_drawdown: float
+    expected_max_drawdown: float
+    signal_expected_drawdown: float
+    positions: list[PortfolioPosition]
+
+
 class DashboardResponse(BaseModel):
     generated_at: datetime
     assets: list[AssetAnalysisResponse]
+    errors: list[AssetErrorResponse] = Field(default_factory=list)
+    portfolio: PortfolioResponse | None = None
     logs: list[SignalLogEntry]
 
 
 class ReplayResponse(AssetAnalysisResponse):
     replay_timestamp: datetime
+    replay_bar_timestamp: datetime
     replay_note: str
+
+
+class ScreenRequest(BaseModel):
+    assets: list[str] = Field(default_factory=list)
+    universe: str | None = Field(default=None, description="name of a universe file under universe_path")
+    timeframe: str = settings.default_timeframe
+    top_k: int = Field(default=20, ge=1, le=500)
+    regimes: list[str] | None = None
+    directions: list[str] | None = None
+    min_confidence: float = Field(default=0.0, ge=0, le=100)
+    max_expected_drawdown: float | None = Field(default=None, ge=0)
+
+
+class ReplayStepSignal(BaseModel):
+    name: str
+    direction: str
+    confidence_score: float
+    expected_drawdown: float
+
+
+class ReplayStepResponse(BaseModel):
+    """One NDJSON line of ``GET /api/replay/range``."""
+
+    asset: str
+    timeframe: str
+    timestamp: datetime
+    close: float
+    regime: str
+    regime_confidence: float
+    suggested_direction: str
+    confidence: float
+    signals: list[ReplayStepSignal]
@@ -0,0 +1,216 @@
+"""Response encoding for analysis payloads (dashboard, replay, confluence, dashboard stream).
+
+Curves are re-encoded on the way out: optionally LTTB-downsampled to a requested number of points,
+then sent either as rounded float lists or as little-endian typed arrays. The body is rendered with
+orjson, or with MessagePack / Arrow IPC when the client asks for them in ``Accept`` and the library
+is installed. Handlers return the rendered ``Response`` directly, so FastAPI does not validate and
+re-encode the payload.
+"""
+from __future__ import annotations
+
+import base64
+import importlib.util
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Hashable, Literal
+
+import orjson
+from fastapi import HTTPException, Query
+from fastapi.responses import Response
+
+from config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+CURVES = ("equity", "drawdown", "rolling_sharpe")
+ANALYSIS_LISTS = ("assets", "analyses")
+TYPED = {"f32": "<f4", "f64": "<f8"}
+
+_rendered: OrderedDict[Hashable, bytes] = OrderedDict()
+
+
+@dataclass(slots=True, frozen=True)
+class CurveOptions:
+    points: int | None = None
+    precision: int = 6
+    format: str = "list"
+
+
+def curve_options(
+    points: int | None = Query(default=None, ge=3, description="LTTB-downsample curves to this many points"),
+    precision: int = Query(default=settings.curve_precision, ge=0, le=17, description="decimals for list curves"),
+    curves: Literal["list", "f32", "f64"] = Query(default="list", description="float lists or typed arrays"),
+) -> CurveOptions:
+    return CurveOptions(points=points, precision=precision, format=curves)
+
+
+def lttb_indices(values: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over each row of ``values`` (x = position), all rows at once.
+
+    Returns a ``(rows, points)`` array of selected positions, always keeping the first and last.
+    """
+    import numpy as np
+
+    rows, n = values.shape
+    if points >= n or points < 3:
+        return np.broadcast_to(np.arange(n), (rows, n))
+    y = np.nan_to_num(values)
+    row = np.arange(rows)
+    picked = np.empty((rows, points), dtype=np.int64)
+    picked[:, 0], picked[:, -1] = 0, n - 1
+    every = (n - 2) / (points - 2)
+    anchor = np.zeros(rows, dtype=np.int64)
+    for i in range(points - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = (hi + next_hi - 1) / 2
+        avg_y = y[:, hi:next_hi].mean(axis=1)
+        ay = y[row, anchor]
+        area = np.abs(
+            (anchor - avg_x)[:, None] * (y[:, lo:hi] - ay[:, None])
+            - (anchor[:, None] - np.arange(lo, hi)) * (avg_y - ay)[:, None]
+        )
+        anchor = lo + area.argmax(axis=1)
+        picked[:, i + 1] = anchor
+    return picked
+
+
+def _typed(values: np.ndarray, dtype: str, binary: bool) -> dict[str, object]:
+    import numpy as np
+
+    raw = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    return {"dtype": dtype, "length": len(values), "data": raw if binary else base64.b64encode(raw).decode()}
+
+
+def encode_curves(
+    curves: list[dict[str, list[float]]], options: CurveOptions, binary: bool = False
+) -> list[dict[str, object]]:
+    """Encode many assets' curves in one pass, grouping equal-length curves into matrices."""
+    import numpy as np
+
+    encoded: list[dict[str, object]] = [{} for _ in curves]
+    groups: dict[int, list[int]] = {}
+    for i, item in enumerate(curves):
+        groups.setdefault(len(item.get("equity", ())), []).append(i)
+
+    for n, members in groups.items():
+        matrices = {
+            name: np.array([curves[i].get(name, ()) for i in members], dtype=np.float64).reshape(len(members), n)
+            for name in CURVES
+        }
+        index = None
+        if options.points is not None and n > options.points:
+            index = lttb_indices(matrices["equity"], options.points)
+            matrices = {name: np.take_along_axis(matrix, index, axis=1) for name, matrix in matrices.items()}
+
+        if options.format == "list":
+            rounded = {name: np.round(matrix, options.precision).tolist() for name, matrix in matrices.items()}
+            for row, i in enumerate(members):
+                encoded[i] = {name: rounded[name][row] for name in CURVES}
+                if index is not None:
+                    encoded[i]["index"] = index[row].tolist()
+        else:
+            dtype = TYPED[options.format]
+            for row, i in enumerate(members):
+                encoded[i] = {name: _typed(matrices[name][row], dtype, binary) for name in CURVES}
+                if index is not None:
+                    encoded[i]["index"] = _typed(index[row], "<i4", binary)
+    return encoded
+
+
+def prepare(payload: dict[str, Any], options: CurveOptions, binary: bool = False) -> dict[str, Any]:
+    """Copy of a dashboard, diff or single-analysis payload with its curves re-encoded."""
+    for key in ANALYSIS_LISTS:
+        if key in payload:
+            items = payload[key]
+            curves = encode_curves([item["curves"] for item in items], options, binary)
+            return {**payload, key: [{**item, "curves": encoded} for item, encoded in zip(items, curves)]}
+    if "curves" in payload:
+        return {**payload, "curves": encode_curves([payload["curves"]], options, binary)[0]}
+    return payload
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def negotiate(accept: str | None) -> str:
+    """Pick JSON, MessagePack or Arrow IPC from an ``Accept`` header; 406 if nothing usable is acceptable."""
+    if not accept:
+        return JSON
+    ranked: list[tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, media.strip().lower()))
+
+    for _, _, media in sorted(ranked):
+        if media in (JSON, "application/*", "*/*"):
+            return JSON
+        if media in (MSGPACK, "application/x-msgpack") and _available("msgpack"):
+            return MSGPACK
+        if media == ARROW and _available("pyarrow"):
+            return ARROW
+    raise HTTPException(
+        status_code=406,
+        detail=f"Supported media types: {JSON}, {MSGPACK} (needs msgpack), {ARROW} (needs pyarrow)",
+    )
+
+
+def _arrow_body(payload: dict[str, Any]) -> bytes:
+    import pyarrow as pa
+
+    key = next((key for key in ANALYSIS_LISTS if key in payload), None)
+    rows = [payload] if key is None else payload[key]
+    extras = {} if key is None else {name: value for name, value in payload.items() if name != key}
+    table = pa.Table.from_pylist(rows)
+    if extras:
+        table = table.replace_schema_metadata({"payload": orjson.dumps(extras, option=orjson.OPT_NON_STR_KEYS)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode(payload: dict[str, Any], media: str, options: CurveOptions) -> bytes:
+    if media == MSGPACK:
+        import msgpack
+
+        return msgpack.packb(prepare(payload, options, binary=True), use_bin_type=True)
+    if media == ARROW:
+        return _arrow_body(prepare(payload, CurveOptions(options.points, options.precision)))
+    return dumps(payload, options)
+
+
+def render(
+    payload: dict[str, Any], accept: str | None, options: CurveOptions, cache_key: Hashable | None = None
+) -> Response:
+    """Encode ``payload`` for the negotiated media type; ``cache_key`` reuses bodies of shared snapshots."""
+    media = negotiate(accept)
+    key = None if cache_key is None else (cache_key, media, options)
+    body = _rendered.get(key) if key is not None else None
+    if body is None:
+        body = _encode(payload, media, options)
+        if key is not None:
+            _rendered[key] = body
+            while len(_rendered) > settings.response_cache_entries:
+                _rendered.popitem(last=False)
+    else:
+        _rendered.move_to_end(key)
+    return Response(body, media_type=media)
+
+
+def dumps(payload: dict[str, Any], options: CurveOptions) -> bytes:
+    return orjson.dumps(prepare(payload, options), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
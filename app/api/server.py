@@ -1,25 +1,70 @@
 from __future__ import annotations
 
-import logging
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from config import settings
 from app.api.routes import router
+from app.container import container
+from app.telemetry.logs import configure_logging
+from app.telemetry.metrics import metrics, profiling_active
 
 
-settings.log_path.parent.mkdir(parents=True, exist_ok=True)
+_profile_lock = asyncio.Lock()
 
-logging.basicConfig(
-    filename=settings.log_path,
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-)
+
+async def _profile_request(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    if _profile_lock.locked():
+        return await call_next(request)
+    async with _profile_lock:
+        token = profiling_active.set(True)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.disable()
+            profiling_active.reset(token)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(settings.profile_top_n)
+    return PlainTextResponse(report.getvalue(), headers={"X-Profiled-Status": str(response.status_code)})
+
+
+async def instrument_request(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    if request.query_params.get("profile") in ("1", "true"):
+        return await _profile_request(request, call_next)
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe(
+        "http_request_seconds",
+        time.perf_counter() - start,
+        method=request.method,
+        route=route,
+        status=str(response.status_code),
+    )
+    return response
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    configure_logging()
+    yield
+    await container.shutdown()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.middleware("http")(instrument_request)
     app.mount("/static", StaticFiles(directory="app/ui/static"), name="static")
     app.include_router(router)
     return app
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
 
 from config import settings
-from app.signals.engine import SignalCandidate
+from app.backtesting.monte_carlo import monte_carlo
+from app.data.models import OHLCVFrame, as_ohlcv, periods_per_year
+from app.regime.detector import REGIMES, regime_detector
+from app.signals.engine import SignalCandidate, signal_engine
+from app.telemetry.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass(slots=True)
@@ -27,81 +34,356 @@ class BacktestResult:
     oos_score: float
     stability_score: float
     parameter_sensitivity: float
+    sharpe_ci: tuple[float, float]
+    max_drawdown_ci: tuple[float, float]
+
+
+def position_returns(
+    positions: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    stop_pct: np.ndarray | float = np.inf,
+    take_profit_pct: np.ndarray | float = np.inf,
+    friction: float = 0.0,
+) -> np.ndarray:
+    """Per-bar strategy returns for target positions set at each close, shape ``(bars, series)``.
+
+    A trade opens at the close where the target position changes and is closed intrabar once its
+    stop-loss or take-profit (fractions of the entry close) is touched; the series then stays flat
+    until the target changes again. Friction is charged on position changes only.
+    """
+    if positions.ndim == 1:
+        positions = positions[:, None]
+    n_bars, n_series = positions.shape
+    out = np.zeros((n_bars, n_series))
+    if n_bars < 2:
+        return out
+
+    bars = np.arange(n_bars)[:, None]
+    changed = np.ones((n_bars, n_series), dtype=bool)
+    changed[1:] = positions[1:] != positions[:-1]
+    entry_idx = np.maximum.accumulate(np.where(changed, bars, 0), axis=0)[:-1]
+
+    held_raw = positions[:-1]
+    entry = close[entry_idx]
+    prev_close = close[:-1, None]
+    bar_open, bar_high, bar_low, bar_close = open_[1:, None], high[1:, None], low[1:, None], close[1:, None]
+    is_long = held_raw > 0
+    is_short = held_raw < 0
+
+    stop_px = np.where(is_long, entry * (1 - stop_pct), entry * (1 + stop_pct))
+    tp_px = np.where(is_long, entry * (1 + take_profit_pct), entry * (1 - take_profit_pct))
+    stop_hit = (is_long & (bar_low <= stop_px)) | (is_short & (bar_high >= stop_px))
+    tp_hit = ((is_long & (bar_high >= tp_px)) | (is_short & (bar_low <= tp_px))) & ~stop_hit
+    hit = stop_hit | tp_hit
+
+    hits_to_date = np.zeros((n_bars, n_series))
+    hits_to_date[1:] = np.cumsum(hit, axis=0)
+    prior_hits = hits_to_date[:-1] - np.take_along_axis(hits_to_date, entry_idx, axis=0)
+    active = (held_raw != 0) & (prior_hits == 0)
+    exit_now = active & hit
+    held = held_raw * active
+
+    exit_px = np.where(
+        stop_hit,
+        np.where(is_long, np.minimum(stop_px, bar_open), np.maximum(stop_px, bar_open)),
+        np.where(is_long, np.maximum(tp_px, bar_open), np.minimum(tp_px, bar_open)),
+    )
+    bar_returns = np.where(exit_now, exit_px, bar_close) / prev_close - 1
+
+    carried = held * ~exit_now
+    previous = np.zeros_like(carried)
+    previous[1:] = carried[:-1]
+    turnover = np.abs(held - previous) + np.abs(held) * exit_now
+    out[1:] = held * bar_returns - turnover * friction
+    return out
+
+
+def _std(values: np.ndarray) -> np.ndarray:
+    if len(values) < 2:
+        return np.full(values.shape[1], np.nan)
+    return values.std(axis=0, ddof=1)
+
+
+def _masked_std(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    count = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(mask, values, 0.0).sum(axis=0) / count
+        squared = np.where(mask, (values - mean) ** 2, 0.0).sum(axis=0)
+        return np.where(count > 1, np.sqrt(squared / (count - 1)), np.nan)
+
+
+def _rolling_sharpe(values: np.ndarray, window: int, periods: float) -> np.ndarray:
+    out = np.zeros_like(values)
+    if len(values) < window:
+        return out
+    centered = values - values.mean(axis=0)
+    zero = np.zeros((1, values.shape[1]))
+    csum = np.concatenate((zero, np.cumsum(centered, axis=0)))
+    csq = np.concatenate((zero, np.cumsum(centered**2, axis=0)))
+    win_sum = csum[window:] - csum[:-window]
+    win_sq = csq[window:] - csq[:-window]
+    win_mean = win_sum / window
+    win_var = np.clip((win_sq - win_sum * win_mean) / (window - 1), 0.0, None)
+    out[window - 1 :] = (win_mean + values.mean(axis=0)) / (np.sqrt(win_var) + 1e-9) * np.sqrt(periods)
+    return out
+
+
+def regime_performance(strat_returns: np.ndarray, labels: np.ndarray) -> list[dict[str, float]]:
+    """Mean bar return (%) of each series per regime, keyed by the regime at the close before the bar.
+
+    Regimes held for fewer than ``settings.regime_min_bars`` bars (and unlabelled bars) are left out.
+    """
+    if len(labels) != len(strat_returns):
+        raise ValueError(f"Expected {len(strat_returns)} regime labels, got {len(labels)}")
+    codes = np.asarray(labels[:-1], dtype=np.intp)
+    returns = strat_returns[1:]
+    known = codes >= 0
+    codes, returns = codes[known], returns[known]
+    n_regimes, n_series = len(REGIMES), strat_returns.shape[1]
+    counts = np.bincount(codes, minlength=n_regimes)
+    cells = (codes[:, None] * n_series + np.arange(n_series)).ravel()
+    sums = np.bincount(cells, weights=returns.ravel(), minlength=n_regimes * n_series).reshape(n_regimes, n_series)
+    present = np.flatnonzero(counts >= max(settings.regime_min_bars, 1))
+    means = (sums[present] / counts[present, None] * 100).T.tolist()
+    return [{REGIMES[k]: value for k, value in zip(present.tolist(), row)} for row in means]
 
 
 class BacktestingEngine:
-    def run(self, df: pd.DataFrame, signal: SignalCandidate) -> BacktestResult:
-        returns = df["close"].pct_change().fillna(0)
-        direction = 1 if signal.direction == "Long" else -1 if signal.direction == "Short" else 0
-        strat_returns = returns * direction
+    """Per-bar strategy backtests; ratios and CAGR are annualised with ``periods_per_year`` of the bars."""
+
+    rolling_window = 60
+    curve_points = 250
+    in_sample_ratio = 0.7
+
+    @metrics.timed("backtesting.run")
+    def run(
+        self, data: OHLCVFrame | pd.DataFrame, signal: SignalCandidate, timeframe: str | None = None
+    ) -> BacktestResult:
+        return self.run_many(data, [signal], timeframe=timeframe)[0]
+
+    def strategy_returns(self, data: OHLCVFrame | pd.DataFrame, signals: list[SignalCandidate]) -> np.ndarray:
+        frame = as_ohlcv(data)
+        open_, high, low, close = frame.open, frame.high, frame.low, frame.close
+        series: dict[str, np.ndarray] = {}
+        for signal in signals:
+            name = signal.definition.name
+            if name not in series:
+                series[name] = signal_engine.position_series(signal.definition, close, high, low)
+        positions = np.column_stack([series[signal.definition.name] for signal in signals])
+        # Stops are fixed fractions of the entry; rounding drops the last-bit noise of the latest close.
+        stop_pct = np.round([abs(signal.stop_loss / signal.entry - 1) for signal in signals], 10)
+        take_profit_pct = np.round([abs(signal.take_profit / signal.entry - 1) for signal in signals], 10)
 
         friction = (settings.transaction_cost_bps + settings.slippage_bps) / 10_000
-        strat_returns = strat_returns - abs(strat_returns) * friction
+        return position_returns(positions, open_, high, low, close, stop_pct, take_profit_pct, friction)
+
+    @metrics.timed("backtesting.run_many")
+    def run_many(
+        self,
+        data: OHLCVFrame | pd.DataFrame,
+        signals: list[SignalCandidate],
+        labels: np.ndarray | None = None,
+        timeframe: str | None = None,
+    ) -> list[BacktestResult]:
+        """Backtest ``signals`` together; ``labels`` are per-bar regimes (labelled here when omitted).
+
+        Without ``timeframe`` the bar spacing is inferred from the timestamps, as in the regime detector.
+        """
+        if not signals:
+            return []
+        frame = as_ohlcv(data)
+        if labels is None:
+            labels = regime_detector.label_history(frame, timeframe=timeframe)
+        periods = periods_per_year(timeframe, frame.timestamp)
+        return self.run_returns(self.strategy_returns(frame, signals), labels, periods)
 
-        split = int(len(strat_returns) * 0.7)
-        in_sample = strat_returns.iloc[:split]
-        out_of_sample = strat_returns.iloc[split:]
+    def run_returns(self, strat_returns: np.ndarray, labels: np.ndarray, periods: float) -> list[BacktestResult]:
+        """Full backtest metrics of precomputed per-bar strategy returns, shape ``(bars, series)``."""
+        per_regime = regime_performance(strat_returns, labels)
+        n_bars = len(strat_returns)
+        split = int(n_bars * self.in_sample_ratio)
+        in_sample = strat_returns[:split]
+        out_of_sample = strat_returns[split:]
 
-        equity = (1 + strat_returns).cumprod()
-        peak = equity.cummax()
+        equity = np.cumprod(1 + strat_returns, axis=0)
+        peak = np.maximum.accumulate(equity, axis=0)
         dd = (equity - peak) / peak
 
-        ann_factor = 252
-        mean = strat_returns.mean()
-        std = strat_returns.std() + 1e-9
-        downside = strat_returns[strat_returns < 0].std() + 1e-9
+        mean = strat_returns.mean(axis=0)
+        volatility = _std(strat_returns)
+        std = volatility + 1e-9
+        downside = _masked_std(strat_returns, strat_returns < 0) + 1e-9
+
+        cagr = (equity[-1] ** (periods / max(n_bars, 1))) - 1
+        sharpe = (mean / std) * np.sqrt(periods)
+        sortino = (mean / downside) * np.sqrt(periods)
+        max_drawdown = np.abs(dd.min(axis=0))
+        calmar = cagr / (max_drawdown + 1e-9)
+
+        win_mask = strat_returns > 0
+        wins = np.where(win_mask, strat_returns, 0.0).sum(axis=0)
+        losses = np.where(strat_returns < 0, strat_returns, 0.0).sum(axis=0)
+        profit_factor = np.abs(wins / (losses + 1e-9))
+        win_rate = win_mask.sum(axis=0) / max(n_bars, 1)
+        risk_of_ruin = np.clip((1 - win_rate) ** 2 * (1 + max_drawdown), 0, 1)
+
+        rolling_sharpe = _rolling_sharpe(strat_returns, self.rolling_window, periods)
+
+        oos_mean = out_of_sample.mean(axis=0)
+        oos_score = np.clip(oos_mean / (_std(out_of_sample) + 1e-9) * 40 + 50, 0, 100)
+        stability_score = np.clip((oos_mean - _std(in_sample)) * 5000 + 50, 0, 100)
+
+        bootstrap = monte_carlo.run(strat_returns, periods)
+        parameter_sensitivity = bootstrap.mean_dispersion * 10000
+
+        tail = slice(-self.curve_points, None)
+        results: list[BacktestResult] = []
+        for i in range(strat_returns.shape[1]):
+            results.append(
+                BacktestResult(
+                    cagr=float(cagr[i]),
+                    sharpe=float(sharpe[i]),
+                    sortino=float(sortino[i]),
+                    calmar=float(calmar[i]),
+                    max_drawdown=float(max_drawdown[i]),
+                    profit_factor=float(profit_factor[i]),
+                    expectancy=float(mean[i]),
+                    risk_of_ruin=float(risk_of_ruin[i]),
+                    win_rate=float(win_rate[i]),
+                    equity_curve=equity[tail, i].tolist(),
+                    drawdown_curve=dd[tail, i].tolist(),
+                    rolling_sharpe=rolling_sharpe[tail, i].tolist(),
+                    regime_performance=per_regime[i],
+                    oos_score=float(oos_score[i]),
+                    stability_score=float(stability_score[i]),
+                    parameter_sensitivity=float(parameter_sensitivity[i]),
+                    sharpe_ci=(float(bootstrap.sharpe_ci[i, 0]), float(bootstrap.sharpe_ci[i, 1])),
+                    max_drawdown_ci=(float(bootstrap.max_drawdown_ci[i, 0]), float(bootstrap.max_drawdown_ci[i, 1])),
+                )
+            )
+        return results
 
-        cagr = (equity.iloc[-1] ** (ann_factor / max(len(strat_returns), 1))) - 1
-        sharpe = (mean / std) * np.sqrt(ann_factor)
-        sortino = (mean / downside) * np.sqrt(ann_factor)
-        max_drawdown = abs(dd.min())
+    @metrics.timed("backtesting.run_windows")
+    def run_windows(
+        self,
+        strat_returns: np.ndarray,
+        ends: np.ndarray,
+        window: int,
+        periods: float,
+        labels: np.ndarray | None = None,
+    ) -> list[list[BacktestResult]]:
+        """Score trailing ``window``-bar slices ending at each index in ``ends`` from cumulative sums.
+
+        Curves are left empty; the bootstrap dispersion uses its iid closed form ``std / sqrt(n)``
+        and confidence intervals are not estimated. Per-regime performance needs ``labels``.
+        """
+        n_bars, n_series = strat_returns.shape
+        ends = np.asarray(ends, dtype=int)
+        starts = np.maximum(ends - window + 1, 0)
+        counts = (ends - starts + 1)[:, None].astype(float)
+        splits = starts + (counts[:, 0] * self.in_sample_ratio).astype(int)
+
+        def prefix(values: np.ndarray) -> np.ndarray:
+            out = np.zeros((n_bars + 1, n_series))
+            out[1:] = np.cumsum(values, axis=0)
+            return out
+
+        def between(totals: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+            return totals[hi] - totals[lo]
+
+        def window_std(s1: np.ndarray, s2: np.ndarray, n: np.ndarray) -> np.ndarray:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var = (s2 - s1 * s1 / n) / (n - 1)
+            return np.where(n > 1, np.sqrt(np.clip(var, 0.0, None)), np.nan)
+
+        r = strat_returns
+        negative = r < 0
+        positive = r > 0
+        p1, p2 = prefix(r), prefix(r * r)
+        pn, pn1, pn2 = prefix(negative), prefix(np.where(negative, r, 0.0)), prefix(np.where(negative, r * r, 0.0))
+        pp, pp1 = prefix(positive), prefix(np.where(positive, r, 0.0))
+        plog = prefix(np.log1p(np.clip(r, -1 + 1e-12, None)))
+
+        stop = ends + 1
+        s1, s2 = between(p1, starts, stop), between(p2, starts, stop)
+        mean = s1 / counts
+        volatility = window_std(s1, s2, counts)
+        std = volatility + 1e-9
+        n_neg = between(pn, starts, stop)
+        downside = window_std(between(pn1, starts, stop), between(pn2, starts, stop), n_neg) + 1e-9
+        wins = between(pp1, starts, stop)
+        losses = between(pn1, starts, stop)
+        win_rate = between(pp, starts, stop) / counts
+
+        cagr = np.exp(between(plog, starts, stop) * periods / counts) - 1
+        sharpe = mean / std * np.sqrt(periods)
+        sortino = mean / downside * np.sqrt(periods)
+
+        max_drawdown = np.empty_like(mean)
+        for row, (lo, hi) in enumerate(zip(starts, stop)):
+            equity = np.cumprod(1 + r[lo:hi], axis=0)
+            peak = np.maximum.accumulate(equity, axis=0)
+            max_drawdown[row] = np.abs(((equity - peak) / peak).min(axis=0))
         calmar = cagr / (max_drawdown + 1e-9)
+        profit_factor = np.abs(wins / (losses + 1e-9))
+        risk_of_ruin = np.clip((1 - win_rate) ** 2 * (1 + max_drawdown), 0, 1)
+
+        n_in = (splits - starts)[:, None].astype(float)
+        n_out = (stop - splits)[:, None].astype(float)
+        in_s1, in_s2 = between(p1, starts, splits), between(p2, starts, splits)
+        out_s1, out_s2 = between(p1, splits, stop), between(p2, splits, stop)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            oos_mean = out_s1 / n_out
+        oos_score = np.clip(oos_mean / (window_std(out_s1, out_s2, n_out) + 1e-9) * 40 + 50, 0, 100)
+        stability_score = np.clip((oos_mean - window_std(in_s1, in_s2, n_in)) * 5000 + 50, 0, 100)
+        parameter_sensitivity = np.nan_to_num(volatility) / np.sqrt(counts) * 10000
+
+        per_regime: list[list[dict[str, float]]] = [[{} for _ in range(n_series)] for _ in ends]
+        if labels is not None:
+            # Bar t's return is credited to the regime at close t - 1, as in ``regime_performance``.
+            held = np.full(n_bars, -1, dtype=np.intp)
+            held[1:] = labels[:-1]
+            onehot = held[:, None] == np.arange(len(REGIMES))
+            regime_counts = np.zeros((n_bars + 1, len(REGIMES)))
+            regime_counts[1:] = np.cumsum(onehot, axis=0)
+            regime_sums = np.zeros((n_bars + 1, len(REGIMES), n_series))
+            regime_sums[1:] = np.cumsum(onehot[:, :, None] * r[:, None, :], axis=0)
+            window_counts = between(regime_counts, starts, stop)
+            window_means = between(regime_sums, starts, stop) * 100 / np.maximum(window_counts, 1)[:, :, None]
+            for row in range(len(ends)):
+                present = np.flatnonzero(window_counts[row] >= max(settings.regime_min_bars, 1)).tolist()
+                values = window_means[row, present].T.tolist()
+                per_regime[row] = [{REGIMES[k]: value for k, value in zip(present, column)} for column in values]
 
-        wins = strat_returns[strat_returns > 0]
-        losses = strat_returns[strat_returns < 0]
-        profit_factor = abs(wins.sum() / (losses.sum() + 1e-9))
-        win_rate = len(wins) / max(len(strat_returns), 1)
-        expectancy = float(strat_returns.mean())
-        risk_of_ruin = float(np.clip((1 - win_rate) ** 2 * (1 + max_drawdown), 0, 1))
-
-        rolling_sharpe = (
-            strat_returns.rolling(60).mean() / (strat_returns.rolling(60).std() + 1e-9)
-        ).fillna(0) * np.sqrt(ann_factor)
-
-        oos_score = float(np.clip(out_of_sample.mean() / (out_of_sample.std() + 1e-9) * 40 + 50, 0, 100))
-        stability_score = float(np.clip((out_of_sample.mean() - in_sample.std()) * 5000 + 50, 0, 100))
-
-        shocked_returns = []
-        for _ in range(100):
-            sample = np.random.choice(strat_returns, size=len(strat_returns), replace=True)
-            shocked_returns.append(float(np.mean(sample)))
-        parameter_sensitivity = float(np.std(shocked_returns) * 10000)
-
-        regime_performance = {
-            "trending": float(in_sample.mean() * 100),
-            "ranging": float(out_of_sample.mean() * 100),
-            "high_volatility": float(strat_returns.std() * 100),
-            "low_volatility": float((1 - strat_returns.std()) * 100),
-        }
-
-        return BacktestResult(
-            cagr=float(cagr),
-            sharpe=float(sharpe),
-            sortino=float(sortino),
-            calmar=float(calmar),
-            max_drawdown=float(max_drawdown),
-            profit_factor=float(profit_factor),
-            expectancy=expectancy,
-            risk_of_ruin=risk_of_ruin,
-            win_rate=float(win_rate),
-            equity_curve=[float(x) for x in equity.tail(250).tolist()],
-            drawdown_curve=[float(x) for x in dd.tail(250).tolist()],
-            rolling_sharpe=[float(x) for x in rolling_sharpe.tail(250).tolist()],
-            regime_performance=regime_performance,
-            oos_score=oos_score,
-            stability_score=stability_score,
-            parameter_sensitivity=parameter_sensitivity,
-        )
+        return [
+            [
+                BacktestResult(
+                    cagr=float(cagr[row, i]),
+                    sharpe=float(sharpe[row, i]),
+                    sortino=float(sortino[row, i]),
+                    calmar=float(calmar[row, i]),
+                    max_drawdown=float(max_drawdown[row, i]),
+                    profit_factor=float(profit_factor[row, i]),
+                    expectancy=float(mean[row, i]),
+                    risk_of_ruin=float(risk_of_ruin[row, i]),
+                    win_rate=float(win_rate[row, i]),
+                    equity_curve=[],
+                    drawdown_curve=[],
+                    rolling_sharpe=[],
+                    regime_performance=per_regime[row][i],
+                    oos_score=float(oos_score[row, i]),
+                    stability_score=float(stability_score[row, i]),
+                    parameter_sensitivity=float(parameter_sensitivity[row, i]),
+                    sharpe_ci=(float("nan"), float("nan")),
+                    max_drawdown_ci=(float("nan"), float("nan")),
+                )
+                for i in range(n_series)
+            ]
+            for row in range(len(ends))
+        ]
 
 
 backtesting_engine = BacktestingEngine()
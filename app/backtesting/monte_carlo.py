@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import settings
+
+
+@dataclass(slots=True)
+class MonteCarloSummary:
+    mean_dispersion: np.ndarray
+    sharpe_ci: np.ndarray
+    max_drawdown_ci: np.ndarray
+
+
+def bootstrap_indices(rng: np.random.Generator, n_paths: int, n_bars: int, block_length: int = 1) -> np.ndarray:
+    if block_length <= 1:
+        return rng.integers(0, n_bars, size=(n_paths, n_bars))
+    n_blocks = -(-n_bars // block_length)
+    starts = rng.integers(0, n_bars, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_length)) % n_bars
+    return idx.reshape(n_paths, n_blocks * block_length)[:, :n_bars]
+
+
+class MonteCarloBootstrap:
+    def run(self, returns: np.ndarray, periods: float) -> MonteCarloSummary:
+        """Bootstrap ``returns`` (bars × series); Sharpe ratios are annualised with ``periods`` bars a year."""
+        n_bars, n_series = returns.shape
+        n_paths = settings.monte_carlo_paths
+        rng = np.random.default_rng(settings.monte_carlo_seed)
+        chunk = max(1, settings.monte_carlo_chunk_elements // max(n_bars * n_series, 1))
+
+        means = np.empty((n_paths, n_series))
+        sharpes = np.empty((n_paths, n_series))
+        drawdowns = np.empty((n_paths, n_series))
+        for start in range(0, n_paths, chunk):
+            stop = min(start + chunk, n_paths)
+            idx = bootstrap_indices(rng, stop - start, n_bars, settings.monte_carlo_block_length)
+            paths = returns[idx]
+            path_mean = paths.mean(axis=1)
+            path_std = paths.std(axis=1, ddof=1) if n_bars > 1 else np.zeros_like(path_mean)
+            equity = np.cumprod(1 + paths, axis=1)
+            peak = np.maximum.accumulate(equity, axis=1)
+            means[start:stop] = path_mean
+            sharpes[start:stop] = path_mean / (path_std + 1e-9) * np.sqrt(periods)
+            drawdowns[start:stop] = np.abs(((equity - peak) / peak).min(axis=1))
+
+        tail = (1 - settings.monte_carlo_confidence) / 2
+        quantiles = [tail, 1 - tail]
+        return MonteCarloSummary(
+            mean_dispersion=means.std(axis=0),
+            sharpe_ci=np.quantile(sharpes, quantiles, axis=0).T,
+            max_drawdown_ci=np.quantile(drawdowns, quantiles, axis=0).T,
+        )
+
+
+monte_carlo = MonteCarloBootstrap()
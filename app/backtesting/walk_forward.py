@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from config import settings
+from app.backtesting.engine import position_returns
+from app.data.models import OHLCVFrame, as_ohlcv, periods_per_year
+from app.signals.engine import SignalDefinition, signal_engine
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+Fold = tuple[int, int, int]
+
+_worker_prices: dict[str, object] = {}
+
+
+@dataclass(slots=True)
+class FoldResult:
+    train_start: int
+    train_end: int
+    test_end: int
+    parameters: dict[str, float]
+    train_sharpe: float
+    test_sharpe: float
+    neighbour_sharpe: float
+
+
+@dataclass(slots=True)
+class WalkForwardReport:
+    signal_name: str
+    version: str
+    combinations: int
+    folds: list[FoldResult]
+    oos_sharpe: float
+    parameter_sensitivity: float
+
+
+def parameter_grid(space: dict[str, list[float]]) -> list[dict[str, float]]:
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    return [combo for combo in grid if combo.get("fast", 0) < combo.get("slow", float("inf"))]
+
+
+def walk_forward_folds(n_bars: int, train_bars: int, test_bars: int) -> list[Fold]:
+    return [
+        (start, start + train_bars, start + train_bars + test_bars)
+        for start in range(0, n_bars - train_bars - test_bars + 1, test_bars)
+    ]
+
+
+def _window_sharpe(csum: np.ndarray, csq: np.ndarray, start: int, stop: int, periods: float) -> np.ndarray:
+    count = stop - start
+    total = csum[:, stop] - csum[:, start]
+    squared = csq[:, stop] - csq[:, start]
+    mean = total / count
+    var = np.clip((squared - total * mean) / max(count - 1, 1), 0.0, None)
+    return mean / (np.sqrt(var) + 1e-9) * np.sqrt(periods)
+
+
+def score_combinations(
+    prices: np.ndarray,
+    definition: SignalDefinition,
+    combos: list[dict[str, float]],
+    folds: list[Fold],
+    friction: float,
+    periods: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    open_, high, low, close = prices
+    positions = np.column_stack(
+        [signal_engine.position_series(definition, close, high, low, combo) for combo in combos]
+    )
+    strat = position_returns(positions, open_, high, low, close, friction=friction).T
+
+    zero = np.zeros((len(combos), 1))
+    csum = np.concatenate((zero, np.cumsum(strat, axis=1)), axis=1)
+    csq = np.concatenate((zero, np.cumsum(strat**2, axis=1)), axis=1)
+    train = np.column_stack([_window_sharpe(csum, csq, a, b, periods) for a, b, _ in folds])
+    test = np.column_stack([_window_sharpe(csum, csq, b, c, periods) for _, b, c in folds])
+    return train, test
+
+
+def _attach_prices(name: str, shape: tuple[int, int]) -> None:
+    shm = SharedMemory(name=name)
+    _worker_prices["shm"] = shm
+    _worker_prices["prices"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _score_shared(
+    definition: SignalDefinition,
+    combos: list[dict[str, float]],
+    folds: list[Fold],
+    friction: float,
+    periods: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    return score_combinations(_worker_prices["prices"], definition, combos, folds, friction, periods)
+
+
+class WalkForwardOptimizer:
+    def run(
+        self,
+        data: OHLCVFrame | pd.DataFrame,
+        definitions: list[SignalDefinition] | None = None,
+        timeframe: str | None = None,
+    ) -> list[WalkForwardReport]:
+        definitions = definitions or signal_engine.definitions
+        frame = as_ohlcv(data)
+        periods = periods_per_year(timeframe, frame.timestamp)
+        prices = np.vstack((frame.open, frame.high, frame.low, frame.close))
+        folds = walk_forward_folds(prices.shape[1], settings.walk_forward_train_bars, settings.walk_forward_test_bars)
+        if not folds:
+            raise ValueError(
+                f"Need at least {settings.walk_forward_train_bars + settings.walk_forward_test_bars} bars "
+                f"for walk-forward optimisation, got {prices.shape[1]}"
+            )
+
+        friction = (settings.transaction_cost_bps + settings.slippage_bps) / 10_000
+        rng = np.random.default_rng(settings.optimizer_seed)
+        grids = {definition.name: self._search_space(definition, rng) for definition in definitions}
+
+        if settings.optimizer_workers <= 1:
+            scores = {
+                definition.name: score_combinations(
+                    prices, definition, grids[definition.name], folds, friction, periods
+                )
+                for definition in definitions
+            }
+        else:
+            scores = self._score_parallel(prices, definitions, grids, folds, friction, periods)
+
+        return [
+            self._report(definition, grids[definition.name], folds, *scores[definition.name])
+            for definition in definitions
+        ]
+
+    def _search_space(self, definition: SignalDefinition, rng: np.random.Generator) -> list[dict[str, float]]:
+        grid = parameter_grid(definition.parameter_space) or [dict(definition.parameters)]
+        if len(grid) > settings.optimizer_max_combinations:
+            keep = np.sort(rng.choice(len(grid), size=settings.optimizer_max_combinations, replace=False))
+            grid = [grid[i] for i in keep]
+        return grid
+
+    def _score_parallel(
+        self,
+        prices: np.ndarray,
+        definitions: list[SignalDefinition],
+        grids: dict[str, list[dict[str, float]]],
+        folds: list[Fold],
+        friction: float,
+        periods: float,
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        shm = SharedMemory(create=True, size=prices.nbytes)
+        try:
+            np.ndarray(prices.shape, dtype=prices.dtype, buffer=shm.buf)[:] = prices
+            with ProcessPoolExecutor(
+                max_workers=settings.optimizer_workers,
+                initializer=_attach_prices,
+                initargs=(shm.name, prices.shape),
+            ) as pool:
+                chunk = settings.optimizer_chunk_size
+                futures = {
+                    definition.name: [
+                        pool.submit(
+                            _score_shared,
+                            definition,
+                            grids[definition.name][i : i + chunk],
+                            folds,
+                            friction,
+                            periods,
+                        )
+                        for i in range(0, len(grids[definition.name]), chunk)
+                    ]
+                    for definition in definitions
+                }
+                scores = {}
+                for name, parts in futures.items():
+                    results = [future.result() for future in parts]
+                    scores[name] = (
+                        np.concatenate([train for train, _ in results]),
+                        np.concatenate([test for _, test in results]),
+                    )
+                return scores
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _report(
+        self,
+        definition: SignalDefinition,
+        grid: list[dict[str, float]],
+        folds: list[Fold],
+        train: np.ndarray,
+        test: np.ndarray,
+    ) -> WalkForwardReport:
+        neighbours = self._neighbours(definition.parameter_space, grid)
+        fold_results: list[FoldResult] = []
+        for f, (start, split, stop) in enumerate(folds):
+            best = int(np.nanargmax(train[:, f]))
+            near = neighbours[best]
+            fold_results.append(
+                FoldResult(
+                    train_start=start,
+                    train_end=split,
+                    test_end=stop,
+                    parameters=grid[best],
+                    train_sharpe=float(train[best, f]),
+                    test_sharpe=float(test[best, f]),
+                    neighbour_sharpe=float(train[near, f].mean()) if near else float(train[best, f]),
+                )
+            )
+
+        return WalkForwardReport(
+            signal_name=definition.name,
+            version=definition.version,
+            combinations=len(grid),
+            folds=fold_results,
+            oos_sharpe=float(np.mean([fold.test_sharpe for fold in fold_results])),
+            parameter_sensitivity=float(
+                np.mean([fold.train_sharpe - fold.neighbour_sharpe for fold in fold_results])
+            ),
+        )
+
+    def _neighbours(self, space: dict[str, list[float]], grid: list[dict[str, float]]) -> list[list[int]]:
+        keys = sorted(space)
+        positions = [tuple(space[key].index(combo[key]) for key in keys) for combo in grid] if keys else [()]
+        lookup = {position: i for i, position in enumerate(positions)}
+        neighbours: list[list[int]] = []
+        for position in positions:
+            near = []
+            for axis in range(len(keys)):
+                for step in (-1, 1):
+                    moved = position[:axis] + (position[axis] + step,) + position[axis + 1 :]
+                    if moved in lookup:
+                        near.append(lookup[moved])
+            neighbours.append(near)
+        return neighbours
+
+
+walk_forward_optimizer = WalkForwardOptimizer()
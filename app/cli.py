@@ -0,0 +1,311 @@
+"""Headless batch research over a universe, without the HTTP server.
+
+Usage: ``python main.py research {run,backtest,replay} [options]`` (or ``python -m app.cli ...``).
+Assets are split into chunks and fanned out over a process pool. Each finished chunk is appended to
+the NDJSON output and recorded in a checkpoint file together with the output's size, so an interrupted
+run truncates anything written after the last checkpoint and picks up where it stopped.
+``run`` collects signal logs and inserts them in one transaction at the end of the run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from config import settings
+
+JOBS = ("run", "backtest", "replay")
+
+
+@dataclass(slots=True)
+class Outcome:
+    asset: str
+    lines: list[str] = field(default_factory=list)
+    log: dict[str, object] | None = None
+    error: str | None = None
+
+
+async def _run_asset(asset: str, options: dict[str, Any]) -> Outcome:
+    from app.features.research_service import research_service
+
+    result, log_entry = await research_service.analyze(asset, options["timeframe"])
+    log_entry = {"created_at": datetime.utcnow().isoformat(), **log_entry}
+    return Outcome(asset=asset, lines=[json.dumps(result)], log=log_entry)
+
+
+async def _backtest_asset(asset: str, options: dict[str, Any]) -> Outcome:
+    from dataclasses import asdict
+
+    from app.backtesting.engine import backtesting_engine
+    from app.data.providers import market_data_service
+    from app.signals.engine import signal_engine
+
+    frame = await market_data_service.get_history(asset, options["timeframe"], limit=options["bars"])
+    candidates = signal_engine.generate(frame)
+    results = backtesting_engine.run_many(frame, candidates, timeframe=options["timeframe"])
+    lines = []
+    for candidate, result in zip(candidates, results):
+        metrics = asdict(result)
+        if not options["curves"]:
+            for curve in ("equity_curve", "drawdown_curve", "rolling_sharpe"):
+                metrics.pop(curve, None)
+        row = {
+            "asset": asset,
+            "timeframe": options["timeframe"],
+            "bars": len(frame),
+            "signal": candidate.definition.name,
+            "version": candidate.definition.version,
+            "direction": candidate.direction,
+            **metrics,
+        }
+        lines.append(json.dumps(row))
+    return Outcome(asset=asset, lines=lines)
+
+
+async def _replay_asset(asset: str, options: dict[str, Any]) -> Outcome:
+    from app.features.research_service import research_service
+
+    stream = await research_service.replay_range(
+        asset, options["timeframe"], options["start"], options["end"], options["every"]
+    )
+    lines = [line async for chunk in stream for line in chunk.decode().splitlines()]
+    return Outcome(asset=asset, lines=lines)
+
+
+HANDLERS = {"run": _run_asset, "backtest": _backtest_asset, "replay": _replay_asset}
+
+
+def process_chunk(job: str, assets: list[str], options: dict[str, Any]) -> list[Outcome]:
+    """Worker entry point: evaluate one chunk of assets sequentially on a private event loop."""
+    handler = HANDLERS[job]
+
+    async def run_all() -> list[Outcome]:
+        outcomes = []
+        for asset in assets:
+            try:
+                outcomes.append(await handler(asset, options))
+            except Exception as exc:
+                outcomes.append(Outcome(asset=asset, error=f"{type(exc).__name__}: {exc}"))
+        return outcomes
+
+    return asyncio.run(run_all())
+
+
+class Checkpoint:
+    """Append-only NDJSON record of finished assets (and their signal logs) for resumable runs.
+
+    Each record also stores the byte size of the output it covers; output past that size belongs to
+    assets the checkpoint never saw finish and is cut off on resume.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        self.logs: list[dict[str, object]] = []
+        self.logged = 0
+        self.offset: int | None = None
+        if path.exists():
+            for line in path.read_text().splitlines():
+                entry = json.loads(line)
+                if entry.get("status") == "logged":
+                    self.logged = entry["count"]
+                elif entry.get("status") == "offset":
+                    self.offset = entry["bytes"]
+                elif entry.get("status") == "ok":
+                    self.done.add(entry["asset"])
+                    if entry.get("log") is not None:
+                        self.logs.append(entry["log"])
+
+    def record(self, outcomes: list[Outcome], offset: int) -> None:
+        with self.path.open("a") as handle:
+            for outcome in outcomes:
+                if outcome.error is None:
+                    entry = {"asset": outcome.asset, "status": "ok", "log": outcome.log}
+                    self.done.add(outcome.asset)
+                    if outcome.log is not None:
+                        self.logs.append(outcome.log)
+                else:
+                    entry = {"asset": outcome.asset, "status": "error", "error": outcome.error}
+                handle.write(json.dumps(entry) + "\n")
+            handle.write(json.dumps({"status": "offset", "bytes": offset}) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.offset = offset
+
+    def mark_logged(self) -> None:
+        with self.path.open("a") as handle:
+            handle.write(json.dumps({"status": "logged", "count": len(self.logs)}) + "\n")
+        self.logged = len(self.logs)
+
+
+def _chunks(items: list[str], size: int) -> Iterator[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _completed(
+    job: str, chunks: Iterator[list[str]], options: dict[str, Any], workers: int
+) -> Iterator[list[Outcome]]:
+    if workers <= 1:
+        for chunk in chunks:
+            yield process_chunk(job, chunk, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: set[Future[list[Outcome]]] = set()
+        for chunk in chunks:
+            pending.add(pool.submit(process_chunk, job, chunk, options))
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def execute(
+    job: str,
+    assets: list[str],
+    options: dict[str, Any],
+    output: Path,
+    checkpoint_path: Path,
+    workers: int,
+    chunk_size: int,
+    write_logs: bool = True,
+) -> dict[str, int]:
+    checkpoint = Checkpoint(checkpoint_path)
+    todo = [asset for asset in dict.fromkeys(assets) if asset not in checkpoint.done]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.touch()
+    if checkpoint.offset is None:
+        checkpoint.record([], output.stat().st_size)
+    summary = {"assets": len(assets), "skipped": len(assets) - len(todo), "ok": 0, "errors": 0, "logged": 0}
+
+    with output.open("r+b") as handle:
+        # Lines past the last checkpoint come from a chunk that is about to be rerun.
+        if handle.seek(0, os.SEEK_END) > checkpoint.offset:
+            handle.truncate(checkpoint.offset)
+        handle.seek(min(handle.tell(), checkpoint.offset))
+        for outcomes in _completed(job, _chunks(todo, chunk_size), options, workers):
+            for outcome in outcomes:
+                handle.writelines((line + "\n").encode() for line in outcome.lines)
+                if outcome.error is None:
+                    summary["ok"] += 1
+                else:
+                    summary["errors"] += 1
+                    print(f"{outcome.asset}: {outcome.error}", file=sys.stderr)
+            handle.flush()
+            os.fsync(handle.fileno())
+            checkpoint.record(outcomes, handle.tell())
+            done = summary["skipped"] + summary["ok"] + summary["errors"]
+            print(f"{done}/{len(assets)} assets", file=sys.stderr)
+
+    pending_logs = checkpoint.logs[checkpoint.logged :]
+    if job == "run" and write_logs and pending_logs:
+        from app.data.database import db
+
+        db.insert_signal_logs(pending_logs)
+        checkpoint.mark_logged()
+        summary["logged"] = len(pending_logs)
+    return summary
+
+
+def export_parquet(ndjson: Path, target: Path) -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise SystemExit("Parquet export needs pyarrow; install it or use the NDJSON output") from exc
+    import pandas as pd
+
+    rows = [json.loads(line) for line in ndjson.read_text().splitlines() if line]
+    pd.json_normalize(rows, max_level=1).to_parquet(target, index=False)
+
+
+def _assets(args: argparse.Namespace) -> list[str]:
+    from app.data.universe import load_universe, read_symbols
+
+    assets = list(args.assets or [])
+    if args.universe:
+        assets.extend(load_universe(args.universe))
+    if args.universe_file:
+        assets.extend(read_symbols(args.universe_file))
+    if not assets:
+        assets = list(settings.default_assets)
+    return list(dict.fromkeys(assets))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="research", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="job", required=True)
+    for job in JOBS:
+        command = commands.add_parser(job)
+        command.add_argument("--assets", nargs="*", help="symbols to process (default settings.default_assets)")
+        command.add_argument("--universe", help="named universe under settings.universe_path")
+        command.add_argument("--universe-file", type=Path, help="file with one symbol per line")
+        command.add_argument("--timeframe", default=settings.default_timeframe)
+        command.add_argument("--output", type=Path, default=Path(f"research_{job}.ndjson"))
+        command.add_argument("--checkpoint", type=Path, help="default: <output>.checkpoint")
+        command.add_argument("--fresh", action="store_true", help="discard an existing output and checkpoint")
+        command.add_argument("--workers", type=int, default=settings.research_workers)
+        command.add_argument("--chunk-size", type=int, default=settings.research_chunk_size)
+        command.add_argument("--parquet", type=Path, help="also export the results as Parquet (needs pyarrow)")
+        if job == "run":
+            command.add_argument("--no-log", action="store_true", help="do not write signal logs to the database")
+        if job == "backtest":
+            command.add_argument("--bars", type=int, default=settings.cache_max_bars)
+            command.add_argument("--curves", action="store_true", help="include equity/drawdown/Sharpe curves")
+        if job == "replay":
+            command.add_argument("--start", type=datetime.fromisoformat, required=True)
+            command.add_argument("--end", type=datetime.fromisoformat, required=True)
+            command.add_argument("--every", type=int, default=1)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    from app.telemetry.logs import configure_logging
+
+    configure_logging()
+    checkpoint = args.checkpoint or args.output.with_name(args.output.name + ".checkpoint")
+    if args.fresh:
+        args.output.unlink(missing_ok=True)
+        checkpoint.unlink(missing_ok=True)
+
+    options: dict[str, Any] = {"timeframe": args.timeframe}
+    if args.job == "backtest":
+        options.update(bars=args.bars, curves=args.curves)
+    if args.job == "replay":
+        options.update(start=args.start, end=args.end, every=max(args.every, 1))
+
+    try:
+        assets = _assets(args)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    summary = execute(
+        args.job,
+        assets,
+        options,
+        args.output,
+        checkpoint,
+        workers=args.workers,
+        chunk_size=max(args.chunk_size, 1),
+        write_logs=not getattr(args, "no_log", False),
+    )
+    if args.parquet:
+        export_parquet(args.output, args.parquet)
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
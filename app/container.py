@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import sys
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.data.database import Database
+    from app.data.log_writer import SignalLogWriter
+    from app.data.providers import UnifiedMarketDataService
+    from app.features.research_service import ResearchService
+    from app.features.scheduler import DashboardScheduler
+    from app.features.screener import Screener
+
+
+class Container:
+    """Application services, imported and built on first access.
+
+    Importing the API layer stays cheap: pandas, NumPy and the research engines load only when a
+    request (or job) first touches a service that needs them.
+    """
+
+    @cached_property
+    def db(self) -> Database:
+        from app.data.database import db
+
+        return db
+
+    @cached_property
+    def signal_log_writer(self) -> SignalLogWriter:
+        from app.data.log_writer import signal_log_writer
+
+        return signal_log_writer
+
+    @cached_property
+    def market_data(self) -> UnifiedMarketDataService:
+        from app.data.providers import market_data_service
+
+        return market_data_service
+
+    @cached_property
+    def research(self) -> ResearchService:
+        from app.features.research_service import research_service
+
+        return research_service
+
+    @cached_property
+    def scheduler(self) -> DashboardScheduler:
+        from app.features.scheduler import dashboard_scheduler
+
+        return dashboard_scheduler
+
+    @cached_property
+    def screener(self) -> Screener:
+        from app.features.screener import screener
+
+        return screener
+
+    def loaded(self, name: str) -> bool:
+        return name in self.__dict__
+
+    async def shutdown(self) -> None:
+        """Close the services that were actually loaded in this process."""
+        if "app.features.scheduler" in sys.modules:
+            await self.scheduler.close()
+        if "app.data.log_writer" in sys.modules:
+            await self.signal_log_writer.close()
+        if "app.data.providers" in sys.modules:
+            await self.market_data.close()
+        if "app.data.database" in sys.modules:
+            self.db.close()
+
+
+container = Container()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.data.models import COLUMNS, OHLCVFrame
+
+OHLCV_DTYPE = np.dtype(
+    [
+        ("timestamp", "i8"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "f8"),
+    ]
+)
+
+# (asset, timeframe, base timeframe the bars were derived from, or None when fetched directly)
+CacheKey = tuple[str, str, str | None]
+
+
+def next_bar_boundary(bar_seconds: int, now: float | None = None) -> float:
+    now = time.time() if now is None else now
+    return (now // bar_seconds + 1) * bar_seconds
+
+
+class MemoryCache:
+    """In-process LRU of OHLCV frames that expire at the next bar boundary."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, tuple[float, OHLCVFrame]] = OrderedDict()
+
+    def get(self, key: CacheKey) -> OHLCVFrame | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, df = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return df
+
+    def put(self, key: CacheKey, df: OHLCVFrame, expires_at: float) -> None:
+        self._entries[key] = (expires_at, df)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DiskCache:
+    """Columnar OHLCV store: one memory-mapped structured ``.npy`` file per asset and timeframe."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, asset: str, timeframe: str) -> Path:
+        # The sanitised name stays readable; the digest of the raw symbol keeps e.g. BTC/USD and BTC_USD apart.
+        digest = hashlib.blake2b(asset.encode(), digest_size=5).hexdigest()
+        return self.root / timeframe / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', asset)}-{digest}.npy"
+
+    def load(self, asset: str, timeframe: str) -> OHLCVFrame | None:
+        path = self._path(asset, timeframe)
+        if not path.exists():
+            return None
+        records = np.load(path, mmap_mode="r")
+        return OHLCVFrame.from_arrays(**{column: records[column] for column in COLUMNS})
+
+    def save(self, asset: str, timeframe: str, df: OHLCVFrame) -> None:
+        path = self._path(asset, timeframe)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = np.empty(len(df), dtype=OHLCV_DTYPE)
+        for column in COLUMNS:
+            records[column] = getattr(df, column)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}-{threading.get_ident()}.tmp.npy")
+        np.save(tmp, records)
+        os.replace(tmp, path)
@@ -1,73 +1,144 @@
 from __future__ import annotations
 
+import base64
 import sqlite3
+import threading
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterator
 
 from config import settings
+from app.telemetry.metrics import metrics
+
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS signal_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        asset TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        signal_name TEXT NOT NULL,
+        direction TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        justification TEXT NOT NULL,
+        expected_return_min REAL NOT NULL,
+        expected_return_max REAL NOT NULL,
+        expected_drawdown REAL NOT NULL
+    );
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_signal_logs_asset_timeframe_created
+        ON signal_logs (asset, timeframe, created_at);
+    CREATE INDEX IF NOT EXISTS idx_signal_logs_signal_created
+        ON signal_logs (signal_name, created_at);
+    CREATE INDEX IF NOT EXISTS idx_signal_logs_created
+        ON signal_logs (created_at);
+    """,
+]
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return created_at, int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
 
 
 class Database:
     def __init__(self, path: Path) -> None:
         self.path = path
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._initialize()
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not self._schema_ready:
+                self._initialize()
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
 
     @contextmanager
     def connection(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self.path)
-        conn.row_factory = sqlite3.Row
+        conn = self._connect()
         try:
             yield conn
             conn.commit()
-        finally:
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
 
     def _initialize(self) -> None:
-        with self.connection() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS signal_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    created_at TEXT NOT NULL,
-                    asset TEXT NOT NULL,
-                    timeframe TEXT NOT NULL,
-                    signal_name TEXT NOT NULL,
-                    direction TEXT NOT NULL,
-                    confidence REAL NOT NULL,
-                    justification TEXT NOT NULL,
-                    expected_return_min REAL NOT NULL,
-                    expected_return_max REAL NOT NULL,
-                    expected_drawdown REAL NOT NULL
-                );
-                """
-            )
+        with self._connections_lock:
+            if self._schema_ready:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                for version, script in enumerate(MIGRATIONS[current:], start=current + 1):
+                    conn.executescript(script)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            finally:
+                conn.close()
+            self._schema_ready = True
 
     def insert_signal_log(self, payload: dict[str, object]) -> None:
+        self.insert_signal_logs([payload])
+
+    @metrics.timed("database.insert_signal_logs")
+    def insert_signal_logs(self, payloads: list[dict[str, object]]) -> None:
+        if not payloads:
+            return
+        now = datetime.utcnow().isoformat()
         with self.connection() as conn:
-            conn.execute(
+            conn.executemany(
                 """
                 INSERT INTO signal_logs (
                     created_at, asset, timeframe, signal_name, direction, confidence,
                     justification, expected_return_min, expected_return_max, expected_drawdown
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    datetime.utcnow().isoformat(),
-                    payload["asset"],
-                    payload["timeframe"],
-                    payload["signal_name"],
-                    payload["direction"],
-                    payload["confidence"],
-                    payload["justification"],
-                    payload["expected_return_min"],
-                    payload["expected_return_max"],
-                    payload["expected_drawdown"],
-                ),
+                [
+                    (
+                        payload.get("created_at", now),
+                        payload["asset"],
+                        payload["timeframe"],
+                        payload["signal_name"],
+                        payload["direction"],
+                        payload["confidence"],
+                        payload["justification"],
+                        payload["expected_return_min"],
+                        payload["expected_return_max"],
+                        payload["expected_drawdown"],
+                    )
+                    for payload in payloads
+                ],
             )
 
+    @metrics.timed("database.latest_signal_logs")
     def latest_signal_logs(self, limit: int = 15) -> list[dict[str, object]]:
         with self.connection() as conn:
             rows = conn.execute(
@@ -75,5 +146,59 @@ class Database:
             ).fetchall()
         return [dict(row) for row in rows]
 
+    @metrics.timed("database.query_signal_logs")
+    def query_signal_logs(
+        self,
+        asset: str | None = None,
+        timeframe: str | None = None,
+        signal_name: str | None = None,
+        direction: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> tuple[list[dict[str, object]], str | None]:
+        clauses: list[str] = []
+        params: list[object] = []
+        for column, value in (
+            ("asset", asset),
+            ("timeframe", timeframe),
+            ("signal_name", signal_name),
+            ("direction", direction),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_as_utc_text(since))
+        if until is not None:
+            clauses.append("created_at <= ?")
+            params.append(_as_utc_text(until))
+        if cursor is not None:
+            created_at, row_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, row_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM signal_logs {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(str(last["created_at"]), int(last["id"]))
+        return items, next_cursor
+
+
+def _as_utc_text(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
 
 db = Database(settings.database_path)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from config import settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class TransientFeedError(Exception):
+    """A provider failure that is worth retrying (timeouts, throttling, 5xx)."""
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def with_retries(
+    call: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    retry_on: tuple[type[BaseException], ...] = (TransientFeedError,),
+) -> T:
+    """Run ``call`` up to ``attempts`` times with full-jitter exponential backoff between tries."""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2**attempt)))
+    raise RuntimeError("attempts must be at least 1")
+
+
+class HttpPool:
+    """One shared ``httpx.AsyncClient`` per event loop, so every HTTP provider reuses its connections."""
+
+    def __init__(self) -> None:
+        self._client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def client(self) -> Any:
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=settings.http_timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_connections,
+                ),
+            )
+        return self._client
+
+    async def get_json(self, url: str, params: dict[str, str]) -> Any:
+        import httpx
+
+        try:
+            response = await self.client().get(url, params=params)
+        except httpx.TransportError as exc:
+            raise TransientFeedError(f"{type(exc).__name__} calling {url}") from exc
+        if response.status_code in RETRYABLE_STATUS:
+            raise TransientFeedError(f"HTTP {response.status_code} from {url}")
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+
+
+http_pool = HttpPool()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+
+from config import settings
+from app.data.database import Database, db
+
+logger = logging.getLogger(__name__)
+
+
+class SignalLogWriter:
+    """Buffers signal logs on the event loop and writes them in batches from a background task."""
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+        self._pending: list[dict[str, object]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._write_lock: asyncio.Lock | None = None
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+            self._task = loop.create_task(self._run())
+
+    def enqueue(self, payload: dict[str, object]) -> None:
+        self._ensure_running()
+        self._pending.append({"created_at": datetime.utcnow().isoformat(), **payload})
+        if len(self._pending) >= settings.signal_log_batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write everything pending; on failure the batch is put back and retried on the next flush."""
+        self._ensure_running()
+        async with self._write_lock:
+            await self._write()
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self._write()
+
+    async def _write(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self.database.insert_signal_logs, batch)
+        except Exception:
+            logger.exception("Failed to write %d signal logs; keeping them for the next flush", len(batch))
+            self._pending[:0] = batch
+            overflow = len(self._pending) - settings.signal_log_max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                logger.warning("Dropped %d oldest unwritten signal logs", overflow)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.signal_log_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+signal_log_writer = SignalLogWriter(db)
@@ -1,7 +1,42 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+EPOCH = datetime(1970, 1, 1)
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400, "1w": 604800}
+YEAR_SECONDS = 365 * 86400
+
+
+def periods_per_year(timeframe: str | None, timestamps: np.ndarray | None = None) -> float:
+    """Bars per calendar year of ``timeframe``, else of the median spacing of ``timestamps`` (ns), else days."""
+    if timeframe is not None:
+        seconds = TIMEFRAME_SECONDS.get(timeframe)
+        if seconds is None:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        return YEAR_SECONDS / seconds
+    if timestamps is not None and len(timestamps) > 1:
+        spacing = float(np.median(np.diff(timestamps))) / 1e9
+        if spacing > 0:
+            return YEAR_SECONDS / spacing
+    return YEAR_SECONDS / 86400
+
+
+def epoch_ns(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def from_epoch_ns(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value) // 1000)
 
 
 @dataclass(slots=True)
@@ -12,3 +47,92 @@ class OHLCV:
     low: float
     close: float
     volume: float
+
+
+@dataclass(slots=True, frozen=True)
+class OHLCVFrame:
+    """Columnar OHLCV history: int64 epoch-nanosecond timestamps and float64 price/volume arrays.
+
+    Slicing returns views over the same buffers, so windows and point-in-time truncation are free.
+    """
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_arrays(cls, **columns: np.ndarray) -> OHLCVFrame:
+        return cls(
+            timestamp=np.ascontiguousarray(columns["timestamp"], dtype=np.int64),
+            **{name: np.ascontiguousarray(columns[name], dtype=np.float64) for name in COLUMNS[1:]},
+        )
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame) -> OHLCVFrame:
+        return cls.from_arrays(
+            timestamp=df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+            **{name: df[name].to_numpy(dtype=np.float64) for name in COLUMNS[1:]},
+        )
+
+    @classmethod
+    def empty(cls) -> OHLCVFrame:
+        return cls.from_arrays(**{name: np.empty(0) for name in COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: slice) -> OHLCVFrame:
+        return OHLCVFrame(*(getattr(self, name)[index] for name in COLUMNS))
+
+    def tail(self, n: int) -> OHLCVFrame:
+        return self[max(len(self) - n, 0) :]
+
+    def until(self, timestamp_ns: int) -> OHLCVFrame:
+        return self[: int(np.searchsorted(self.timestamp, timestamp_ns, side="right"))]
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self.timestamp[-1])
+
+    def datetime_at(self, index: int) -> datetime:
+        return from_epoch_ns(self.timestamp[index])
+
+    def resample(self, bucket_ns: int) -> OHLCVFrame:
+        """Aggregate into epoch-aligned buckets (first/max/min/last/sum), stamped with each bucket's start."""
+        if len(self) == 0:
+            return self
+        keys = self.timestamp // bucket_ns
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+        return OHLCVFrame.from_arrays(
+            timestamp=keys[starts] * bucket_ns,
+            open=self.open[starts],
+            high=np.maximum.reduceat(self.high, starts),
+            low=np.minimum.reduceat(self.low, starts),
+            close=self.close[np.append(starts[1:], len(self)) - 1],
+            volume=np.add.reduceat(self.volume, starts),
+        )
+
+    def merge(self, newer: OHLCVFrame) -> OHLCVFrame:
+        """Union of both frames ordered by timestamp, preferring ``newer`` bars on duplicates."""
+        stacked = {name: np.concatenate((getattr(self, name), getattr(newer, name))) for name in COLUMNS}
+        _, first = np.unique(stacked["timestamp"][::-1], return_index=True)
+        keep = len(stacked["timestamp"]) - 1 - first
+        return OHLCVFrame.from_arrays(**{name: column[keep] for name, column in stacked.items()})
+
+    def to_pandas(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "timestamp": self.timestamp.view("datetime64[ns]"),
+                **{name: getattr(self, name) for name in COLUMNS[1:]},
+            },
+            copy=False,
+        )
+
+
+def as_ohlcv(data: OHLCVFrame | pd.DataFrame) -> OHLCVFrame:
+    return data if isinstance(data, OHLCVFrame) else OHLCVFrame.from_pandas(data)
@@ -1,54 +1,328 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Protocol
+import math
+import re
+import time
+from pathlib import Path
+from typing import Callable, Protocol
 
 import numpy as np
-import pandas as pd
+
+from config import settings
+from app.data.cache import DiskCache, MemoryCache, next_bar_boundary
+from app.data.http import HttpPool, TokenBucket, http_pool, with_retries
+from app.data.models import COLUMNS, TIMEFRAME_SECONDS, OHLCVFrame
+from app.data.simulator import market_simulator
+from app.telemetry.metrics import metrics
 
 
 class MarketDataProvider(Protocol):
-    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> pd.DataFrame: ...
+    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> OHLCVFrame: ...
 
 
 class SyntheticProvider:
-    """Local deterministic market generator used for offline research bootstrap."""
+    """Local deterministic market generator used for offline research bootstrap.
+
+    Bars come from :mod:`app.data.simulator`, aligned to the timeframe's bar boundaries and identical
+    across processes, so tail fetches line up with what the disk cache already holds.
+    """
 
-    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> pd.DataFrame:
+    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> OHLCVFrame:
         await asyncio.sleep(0.01)
-        seed = abs(hash((asset, timeframe))) % (2**32)
-        rng = np.random.default_rng(seed)
-        base_price = 100 + rng.random() * 100
-        returns = rng.normal(loc=0.0004, scale=0.015, size=limit)
-        price = base_price * np.exp(np.cumsum(returns))
-        high = price * (1 + rng.uniform(0.0005, 0.01, limit))
-        low = price * (1 - rng.uniform(0.0005, 0.01, limit))
-        open_ = np.concatenate(([price[0]], price[:-1]))
-        volume = rng.integers(1_000, 20_000, limit)
-        now = datetime.utcnow()
-        timestamps = [now - timedelta(hours=limit - i) for i in range(limit)]
-        return pd.DataFrame(
-            {
-                "timestamp": timestamps,
-                "open": open_,
-                "high": high,
-                "low": low,
-                "close": price,
-                "volume": volume,
-            }
-        )
+        return await asyncio.to_thread(market_simulator.history, asset, timeframe, limit)
+
+
+class CSVProvider:
+    """Offline provider over ``<root>/<timeframe>/<asset>.csv`` files with OHLCV columns."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> OHLCVFrame:
+        return await asyncio.to_thread(self._read, asset, timeframe, limit)
+
+    def _read(self, asset: str, timeframe: str, limit: int) -> OHLCVFrame:
+        import pandas as pd
+
+        path = Path(self.root) / timeframe / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', asset)}.csv"
+        if not path.exists():
+            raise ValueError(f"No CSV data for {asset} {timeframe} at {path}")
+        df = pd.read_csv(path, usecols=list(COLUMNS))
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).dt.tz_localize(None)
+        return OHLCVFrame.from_pandas(df.sort_values("timestamp", kind="stable")).tail(limit)
+
+
+class HttpProvider:
+    """JSON-over-HTTP feed that accepts multi-symbol queries.
+
+    Expects ``GET <base_url>/ohlcv?symbols=A,B&timeframe=1h&limit=700`` to answer
+    ``{"A": {"timestamp": [epoch ms...], "open": [...], ...}, ...}``. Concurrent single-asset
+    requests arriving within ``http_batch_window`` seconds are merged into one call of up to
+    ``http_batch_size`` symbols; every call passes through the provider's token bucket and is
+    retried with jittered backoff on transient failures.
+    """
+
+    def __init__(self, base_url: str | None, pool: HttpPool = http_pool) -> None:
+        if not base_url:
+            raise ValueError("http_feed_url is not configured")
+        self.base_url = base_url.rstrip("/")
+        self.pool = pool
+        self.bucket = TokenBucket(settings.http_rate_per_second, settings.http_burst)
+        self._pending: dict[tuple[str, int], dict[str, asyncio.Future[OHLCVFrame]]] = {}
+        self._inflight: set[asyncio.Task[None]] = set()
+
+    async def fetch_ohlcv(self, asset: str, timeframe: str, limit: int = 700) -> OHLCVFrame:
+        loop = asyncio.get_running_loop()
+        key = (timeframe, limit)
+        batch = self._pending.setdefault(key, {})
+        future = batch.get(asset)
+        if future is None:
+            future = batch[asset] = loop.create_future()
+            if len(batch) >= settings.http_batch_size:
+                self._dispatch(key, batch)
+            elif len(batch) == 1:
+                loop.call_later(settings.http_batch_window, self._dispatch, key, batch)
+        return await asyncio.shield(future)
+
+    def _dispatch(self, key: tuple[str, int], batch: dict[str, asyncio.Future[OHLCVFrame]]) -> None:
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        task = asyncio.get_running_loop().create_task(self._fetch_batch(*key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _fetch_batch(self, timeframe: str, limit: int, batch: dict[str, asyncio.Future[OHLCVFrame]]) -> None:
+        params = {"symbols": ",".join(batch), "timeframe": timeframe, "limit": str(limit)}
+
+        async def call() -> dict[str, dict[str, list[float]]]:
+            await self.bucket.acquire()
+            return await self.pool.get_json(f"{self.base_url}/ohlcv", params)
+
+        try:
+            payload = await with_retries(
+                call, settings.http_retries + 1, settings.http_backoff_base, settings.http_backoff_max
+            )
+            if not isinstance(payload, dict):
+                raise ValueError(f"Feed returned {type(payload).__name__} instead of an object for {timeframe}")
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for asset, future in batch.items():
+            if future.done():
+                continue
+            try:
+                future.set_result(self._frame(payload.get(asset), asset, timeframe).tail(limit))
+            except Exception as exc:
+                future.set_exception(exc)
+
+    @staticmethod
+    def _frame(columns: object, asset: str, timeframe: str) -> OHLCVFrame:
+        if columns is None:
+            raise ValueError(f"Feed returned no data for {asset} {timeframe}")
+        if not isinstance(columns, dict) or any(name not in columns for name in COLUMNS):
+            raise ValueError(f"Feed returned malformed data for {asset} {timeframe}")
+        arrays = {name: np.asarray(columns[name], dtype=np.float64) for name in COLUMNS[1:]}
+        timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+        if timestamps.ndim != 1 or any(values.shape != timestamps.shape for values in arrays.values()):
+            raise ValueError(f"Feed returned ragged columns for {asset} {timeframe}")
+        return OHLCVFrame.from_arrays(timestamp=timestamps * 1_000_000, **arrays)
+
+
+FOREX_CURRENCIES = {
+    "USD", "EUR", "JPY", "GBP", "CHF", "AUD", "CAD", "NZD", "SEK",
+    "NOK", "DKK", "SGD", "HKD", "MXN", "ZAR", "TRY", "CNH", "PLN",
+}
+CRYPTO_QUOTES = ("USDT", "USDC", "BUSD", "BTC", "ETH")
+
+
+def asset_class(symbol: str) -> str:
+    if symbol.endswith("!") or re.fullmatch(r"[A-Z]{1,3}[FGHJKMNQUVXZ]\d{1,2}", symbol):
+        return "futures"
+    if len(symbol) == 6 and symbol[:3] in FOREX_CURRENCIES and symbol[3:] in FOREX_CURRENCIES:
+        return "forex"
+    if symbol.endswith(CRYPTO_QUOTES) and len(symbol) > 4:
+        return "crypto"
+    return "equity"
+
+
+class ProviderRegistry:
+    """Routes each asset to a provider by asset class, following ``settings.provider_routes``."""
+
+    def __init__(self) -> None:
+        self.factories: dict[str, Callable[[], MarketDataProvider]] = {
+            "synthetic": SyntheticProvider,
+            "csv": lambda: CSVProvider(settings.csv_data_path),
+            "http": lambda: HttpProvider(settings.http_feed_url),
+        }
+        self._providers: dict[str, MarketDataProvider] = {}
+
+    def register(self, name: str, provider: MarketDataProvider) -> None:
+        self._providers[name] = provider
+
+    def get(self, name: str) -> MarketDataProvider:
+        provider = self._providers.get(name)
+        if provider is None:
+            factory = self.factories.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown market data provider: {name}")
+            provider = self._providers[name] = factory()
+        return provider
+
+    def provider_for(self, asset: str) -> MarketDataProvider:
+        routes = settings.provider_routes
+        return self.get(routes.get(asset_class(asset), routes["default"]))
 
 
 class UnifiedMarketDataService:
     def __init__(self) -> None:
-        self.provider = SyntheticProvider()
-        self.timeframe_map = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400, "1w": 604800}
+        self.providers = ProviderRegistry()
+        self.timeframe_map = dict(TIMEFRAME_SECONDS)
+        self.memory_cache = MemoryCache(settings.cache_max_entries)
+        self.resampled = MemoryCache(settings.cache_max_entries)
+        self.disk_cache = DiskCache(settings.cache_path)
+        self._loading: dict[tuple[str, str, int], asyncio.Task[OHLCVFrame]] = {}
+        self.cache_stats = {
+            "memory_hits": 0,
+            "memory_misses": 0,
+            "disk_hits": 0,
+            "disk_misses": 0,
+            "tail_fetches": 0,
+            "bars_fetched": 0,
+            "resample_builds": 0,
+            "resample_updates": 0,
+        }
+
+    def base_timeframe_for(self, timeframe: str) -> str | None:
+        """Timeframe ``timeframe`` is aggregated from, or None when it is fetched from the provider.
+
+        Routing depends on the timeframe alone, so a given ``(asset, timeframe)`` always comes from the
+        same source whatever depth is asked for.
+        """
+        base = settings.base_timeframe
+        if base is None or base == timeframe or base not in self.timeframe_map:
+            return None
+        if timeframe not in settings.derived_timeframes:
+            return None
+        ratio, rest = divmod(self.timeframe_map[timeframe], self.timeframe_map[base])
+        if rest or ratio <= 1:
+            raise ValueError(f"Cannot derive {timeframe} bars from {base}: not an exact multiple")
+        return base
+
+    def max_derived_bars(self, timeframe: str, base: str) -> int:
+        return settings.base_max_bars // (self.timeframe_map[timeframe] // self.timeframe_map[base]) - 1
 
-    async def get_history(self, asset: str, timeframe: str, limit: int = 700) -> pd.DataFrame:
+    async def warm(self, asset: str, timeframes: list[str], limit: int = 700) -> None:
+        """Load the base series once at the depth every derived timeframe in ``timeframes`` needs."""
+        base = settings.base_timeframe
+        needed = [
+            (limit + 1) * self.timeframe_map[timeframe] // self.timeframe_map[base]
+            for timeframe in timeframes
+            if timeframe in self.timeframe_map and self.base_timeframe_for(timeframe) is not None
+        ]
+        if base in timeframes:
+            needed.append(limit)
+        if needed:
+            await self.get_history(asset, base, limit=min(max(needed), settings.base_max_bars))
+
+    @metrics.timed("market_data.get_history")
+    async def get_history(self, asset: str, timeframe: str, limit: int = 700) -> OHLCVFrame:
         if timeframe not in self.timeframe_map:
             raise ValueError(f"Unsupported timeframe: {timeframe}")
-        return await self.provider.fetch_ohlcv(asset, timeframe, limit)
+
+        base = self.base_timeframe_for(timeframe)
+        if base is not None and limit > self.max_derived_bars(timeframe, base):
+            raise ValueError(
+                f"{limit} {timeframe} bars exceed the {self.max_derived_bars(timeframe, base)} derivable "
+                f"from {settings.base_max_bars} {base} bars; raise base_max_bars"
+            )
+        key = (asset, timeframe, base)
+        cached = self.memory_cache.get(key)
+        if cached is not None and len(cached) >= limit:
+            self.cache_stats["memory_hits"] += 1
+            return cached.tail(limit)
+        self.cache_stats["memory_misses"] += 1
+
+        if base is not None:
+            df = await self._resample(asset, timeframe, base, limit)
+        else:
+            load_key = (asset, timeframe, limit)
+            task = self._loading.get(load_key)
+            if task is None or task.get_loop() is not asyncio.get_running_loop():
+                task = asyncio.ensure_future(self._load_through_disk(asset, timeframe, limit))
+                self._loading[load_key] = task
+                task.add_done_callback(lambda done: self._forget_load(load_key, done))
+            df = await asyncio.shield(task)
+        self.memory_cache.put(key, df, next_bar_boundary(self.timeframe_map[timeframe]))
+        return df.tail(limit)
+
+    async def _resample(self, asset: str, timeframe: str, base: str, limit: int) -> OHLCVFrame:
+        """Aggregate ``timeframe`` bars from the cached base series, extending the previous result."""
+        bucket_ns = self.timeframe_map[timeframe] * 1_000_000_000
+        base_ns = self.timeframe_map[base] * 1_000_000_000
+        ratio = bucket_ns // base_ns
+        source = await self.get_history(asset, base, limit=(limit + 1) * ratio)
+        if len(source) == 0:
+            return source
+
+        key = (asset, timeframe, base)
+        derived = self.resampled.get(key)
+        contiguous = derived is not None and source.timestamp[0] <= derived.last_timestamp + bucket_ns
+        if contiguous and len(derived) >= limit:
+            self.cache_stats["resample_updates"] += 1
+            fresh = source[int(np.searchsorted(source.timestamp, derived.last_timestamp + bucket_ns)) :]
+            buckets = fresh.resample(bucket_ns)
+        else:
+            self.cache_stats["resample_builds"] += 1
+            buckets = source.resample(bucket_ns)
+            if source.timestamp[0] % bucket_ns:
+                buckets = buckets[1:]
+            derived = None
+        if len(buckets) and buckets.last_timestamp + bucket_ns > source.last_timestamp + base_ns:
+            buckets = buckets[:-1]
+        if derived is not None:
+            buckets = derived.merge(buckets) if len(buckets) else derived
+        buckets = buckets.tail(settings.base_max_bars // ratio)
+        self.resampled.put(key, buckets, math.inf)
+        return buckets
+
+    def _forget_load(self, key: tuple[str, str, int], task: asyncio.Task[OHLCVFrame]) -> None:
+        if self._loading.get(key) is task:
+            del self._loading[key]
+
+    async def _load_through_disk(self, asset: str, timeframe: str, limit: int) -> OHLCVFrame:
+        stored = await asyncio.to_thread(self.disk_cache.load, asset, timeframe)
+        if stored is None or len(stored) < limit:
+            self.cache_stats["disk_misses"] += 1
+            df = await self._fetch(asset, timeframe, limit)
+        else:
+            self.cache_stats["disk_hits"] += 1
+            elapsed_ns = time.time_ns() - stored.last_timestamp
+            missing = int(elapsed_ns // (self.timeframe_map[timeframe] * 1_000_000_000))
+            if missing <= 0:
+                return stored
+            if missing >= limit:
+                df = await self._fetch(asset, timeframe, limit)
+            else:
+                self.cache_stats["tail_fetches"] += 1
+                tail = await self._fetch(asset, timeframe, missing + 1)
+                df = stored.merge(tail)
+
+        df = df.tail(max(settings.cache_max_bars, limit))
+        await asyncio.to_thread(self.disk_cache.save, asset, timeframe, df)
+        return df
+
+    async def close(self) -> None:
+        await http_pool.close()
+
+    async def _fetch(self, asset: str, timeframe: str, limit: int) -> OHLCVFrame:
+        df = await self.providers.provider_for(asset).fetch_ohlcv(asset, timeframe, limit)
+        self.cache_stats["bars_fetched"] += len(df)
+        return df
 
 
 market_data_service = UnifiedMarketDataService()
@@ -0,0 +1,337 @@
+"""Deterministic multi-asset market simulator.
+
+Every random draw is keyed by a content-derived seed (blake2b over the seed namespace and the asset)
+and by the absolute bar index, so a bar's value does not depend on the process, the machine, the
+requested window or which other assets are generated alongside it. Returns follow a factor model:
+shared factor shocks scaled by per-asset loadings plus idiosyncratic noise, with volatility switching
+between a calm and a stressed regime that persists over days.
+
+Each asset has one price path. Daily shocks are drawn first, hourly shocks are bridged to sum to
+their day, and 5m/1m shocks to their hour and 5m bar, so closes agree across every timeframe. 1h bars
+are the base series: 1d and 1w bars are aggregated from them, and price levels far from
+``settings.simulator_anchor`` come from daily sums rather than from walking every bar in between.
+
+Large datasets are written chunk by chunk into ``.npy`` memory maps:
+``python -m app.data.simulator --count 2000 --timeframe 1m --bars 1000000 --output data/sim``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from config import settings
+from app.data.models import COLUMNS, TIMEFRAME_SECONDS, YEAR_SECONDS, OHLCVFrame, epoch_ns
+
+DAY_SECONDS = 86_400
+BASE_TIMEFRAME = "1h"
+CHUNK_BARS = 16_384
+SUPER_BLOCKS = 4096
+
+# Shock tree: a bar's unit shock is the sum of its children's divided by sqrt(children). "1d" is the root.
+SHOCK_PARENTS = {"1h": ("1d", 24), "5m": ("1h", 12), "1m": ("5m", 5)}
+_SHOCKS = {"1d": 0, "1h": 1, "5m": 2, "1m": 3}
+_EXTRA, _REGIME = 8, 16
+
+
+def stable_seed(*parts: object) -> int:
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _rng(seed: int, stream: int, index: int) -> np.random.Generator:
+    return np.random.default_rng([seed, stream, index])
+
+
+def _chunk_bars(timeframe: str) -> int:
+    parent = SHOCK_PARENTS.get(timeframe)
+    return CHUNK_BARS if parent is None else CHUNK_BARS // parent[1] * parent[1]
+
+
+@lru_cache(maxsize=512)
+def _shock_chunk(seed: int, timeframe: str, index: int) -> np.ndarray:
+    size = _chunk_bars(timeframe)
+    rng = _rng(seed, _SHOCKS[timeframe], index)
+    if timeframe not in SHOCK_PARENTS:
+        shocks = rng.standard_normal(size)
+    else:
+        parent, children = SHOCK_PARENTS[timeframe]
+        draws = rng.standard_normal(size).reshape(-1, children)
+        first = index * len(draws)
+        totals = unit_shocks(seed, parent, first, first + len(draws))
+        shocks = (draws - draws.mean(axis=1, keepdims=True) + (totals / math.sqrt(children))[:, None]).ravel()
+    shocks.flags.writeable = False
+    return shocks
+
+
+def unit_shocks(seed: int, timeframe: str, start: int, stop: int) -> np.ndarray:
+    """Standard normal shocks for ``timeframe`` bars ``[start, stop)``, consistent across the shock tree."""
+    size = _chunk_bars(timeframe)
+    first, last = start // size, (stop - 1) // size
+    shocks = np.concatenate([_shock_chunk(seed, timeframe, index) for index in range(first, last + 1)])
+    offset = first * size
+    return shocks[start - offset : stop - offset]
+
+
+def _bar_extras(seed: int, timeframe: str, start: int, stop: int) -> np.ndarray:
+    first, last = start // CHUNK_BARS, (stop - 1) // CHUNK_BARS
+    extras = np.hstack(
+        [
+            _rng(seed, _EXTRA + _SHOCKS[timeframe], index).random((3, CHUNK_BARS))
+            for index in range(first, last + 1)
+        ]
+    )
+    offset = first * CHUNK_BARS
+    return extras[:, start - offset : stop - offset]
+
+
+@lru_cache(maxsize=128)
+def _regime_superchunk(seed: int, index: int, share: float, persistence: float) -> np.ndarray:
+    """Two-state Markov chain over days (True = stressed), started from its stationary share."""
+    leave = 1.0 - persistence
+    enter = min(share * leave / max(1.0 - share, 1e-9), 1.0)
+    draws = _rng(seed, _REGIME, index).random(SUPER_BLOCKS + 1)
+    states = np.empty(SUPER_BLOCKS, dtype=bool)
+    stressed = bool(draws[0] < share)
+    for i, u in enumerate(draws[1:].tolist()):
+        stressed = u >= leave if stressed else u < enter
+        states[i] = stressed
+    states.flags.writeable = False
+    return states
+
+
+def aggregate(columns: dict[str, np.ndarray], ratio: int) -> dict[str, np.ndarray]:
+    """Combine every ``ratio`` consecutive bars (a whole number of groups) into one OHLCV bar."""
+    grouped = {name: values.reshape(-1, ratio) for name, values in columns.items()}
+    return {
+        "timestamp": grouped["timestamp"][:, 0],
+        "open": grouped["open"][:, 0],
+        "high": grouped["high"].max(axis=1),
+        "low": grouped["low"].min(axis=1),
+        "close": grouped["close"][:, -1],
+        "volume": grouped["volume"].sum(axis=1),
+    }
+
+
+@dataclass(slots=True, frozen=True)
+class AssetProfile:
+    base_price: float
+    drift: float
+    idio_vol: float
+    loadings: np.ndarray
+
+
+class MarketSimulator:
+    def __init__(self) -> None:
+        self._profiles: dict[tuple[str, str], AssetProfile] = {}
+
+    def profile(self, asset: str) -> AssetProfile:
+        key = (settings.simulator_seed, asset)
+        profile = self._profiles.get(key)
+        if profile is None:
+            rng = np.random.default_rng(stable_seed(*key, "profile"))
+            factors = len(settings.simulator_factor_vols)
+            betas = np.concatenate(([rng.uniform(0.5, 1.5)], rng.normal(0.0, 0.5, factors - 1)))
+            profile = self._profiles[key] = AssetProfile(
+                base_price=float(np.exp(rng.uniform(np.log(5.0), np.log(500.0)))),
+                drift=float(rng.uniform(-0.05, 0.2)),
+                idio_vol=float(rng.uniform(0.1, 0.5)),
+                loadings=betas * np.asarray(settings.simulator_factor_vols),
+            )
+        return profile
+
+    def bar_index(self, timeframe: str, timestamp_ns: int) -> int:
+        return timestamp_ns // (self._bar_seconds(timeframe) * 1_000_000_000)
+
+    def history(self, asset: str, timeframe: str, limit: int, end_ns: int | None = None) -> OHLCVFrame:
+        """``limit`` bars ending with the last bar that closed at or before ``end_ns`` (default now)."""
+        end = self.bar_index(timeframe, time.time_ns() if end_ns is None else end_ns)
+        start = max(end - limit, 0)
+        aligned = self._day_aligned(timeframe, start)
+        level = self.log_level(asset, aligned * self._bar_seconds(timeframe) // DAY_SECONDS)
+        columns, _ = self._bars(asset, timeframe, aligned, end, level)
+        return OHLCVFrame.from_arrays(**{name: values[start - aligned :] for name, values in columns.items()})
+
+    def log_level(self, asset: str, day: int) -> float:
+        """Log price at the open of ``day`` (days since the epoch)."""
+        anchor = epoch_ns(settings.simulator_anchor) // (DAY_SECONDS * 1_000_000_000)
+        profile = self.profile(asset)
+        if day >= anchor:
+            moved = self._day_returns(asset, anchor, day).sum()
+        else:
+            moved = -self._day_returns(asset, day, anchor).sum()
+        return math.log(profile.base_price) + float(moved)
+
+    def _bar_seconds(self, timeframe: str) -> int:
+        seconds = TIMEFRAME_SECONDS.get(timeframe)
+        if seconds is None:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        return seconds
+
+    def _day_aligned(self, timeframe: str, index: int) -> int:
+        per_day = max(DAY_SECONDS // self._bar_seconds(timeframe), 1)
+        return index // per_day * per_day
+
+    def _seeds(self, asset: str) -> tuple[list[int], int, int]:
+        namespace = settings.simulator_seed
+        count = len(settings.simulator_factor_vols)
+        factors = [stable_seed(namespace, "factor", k) for k in range(count)]
+        return factors, stable_seed(namespace, "asset", asset), stable_seed(namespace, "regime")
+
+    def _stress(self, regime_seed: int, start: int, stop: int) -> np.ndarray:
+        """Volatility multiplier of days ``[start, stop)``; unit mean variance over calm and stressed days."""
+        share, persistence = settings.simulator_stress_share, settings.simulator_stress_persistence
+        first, last = start // SUPER_BLOCKS, (stop - 1) // SUPER_BLOCKS
+        states = np.concatenate(
+            [_regime_superchunk(regime_seed, index, share, persistence) for index in range(first, last + 1)]
+        )
+        offset = first * SUPER_BLOCKS
+        stressed = states[start - offset : stop - offset]
+        high = settings.simulator_stress_multiplier
+        calm = math.sqrt(max(1.0 - share * high**2, 0.01) / max(1.0 - share, 1e-9))
+        return np.where(stressed, high, calm)
+
+    def _drift(self, profile: AssetProfile, dt: float) -> float:
+        variance = float(profile.loadings @ profile.loadings) + profile.idio_vol**2
+        return (profile.drift - 0.5 * variance) * dt
+
+    def _shocks(self, asset: str, timeframe: str, start: int, stop: int) -> np.ndarray:
+        profile = self.profile(asset)
+        factor_seeds, asset_seed, _ = self._seeds(asset)
+        shocks = profile.idio_vol * unit_shocks(asset_seed, timeframe, start, stop)
+        for beta, seed in zip(profile.loadings, factor_seeds):
+            shocks += beta * unit_shocks(seed, timeframe, start, stop)
+        return shocks
+
+    def _day_returns(self, asset: str, start: int, stop: int) -> np.ndarray:
+        if stop <= start:
+            return np.zeros(0)
+        dt = DAY_SECONDS / YEAR_SECONDS
+        stress = self._stress(self._seeds(asset)[2], start, stop)
+        shocks = self._shocks(asset, "1d", start, stop)
+        return self._drift(self.profile(asset), dt) + stress * math.sqrt(dt) * shocks
+
+    def _bars(
+        self, asset: str, timeframe: str, start: int, stop: int, level: float
+    ) -> tuple[dict[str, np.ndarray], float]:
+        """OHLCV for bars ``[start, stop)`` opening at log price ``level``.
+
+        Timeframes above the 1h base are aggregated from its bars; finer ones use their own bridged shocks.
+        """
+        bar_seconds = self._bar_seconds(timeframe)
+        base_seconds = TIMEFRAME_SECONDS[BASE_TIMEFRAME]
+        if bar_seconds > base_seconds:
+            ratio = bar_seconds // base_seconds
+            columns, last = self._bars(asset, BASE_TIMEFRAME, start * ratio, stop * ratio, level)
+            return aggregate(columns, ratio), last
+
+        profile = self.profile(asset)
+        dt = bar_seconds / YEAR_SECONDS
+        _, asset_seed, regime_seed = self._seeds(asset)
+        bars = np.arange(start, stop, dtype=np.int64)
+        days = bars * bar_seconds // DAY_SECONDS
+        stress = self._stress(regime_seed, int(days[0]), int(days[-1]) + 1)[days - days[0]]
+        bar_vol = stress * math.sqrt(dt)
+        returns = self._drift(profile, dt) + bar_vol * self._shocks(asset, timeframe, start, stop)
+        log_close = level + np.cumsum(returns)
+
+        close = np.exp(log_close)
+        open_ = np.exp(np.concatenate(([level], log_close[:-1])))
+        wick_high, wick_low, activity = _bar_extras(asset_seed, timeframe, start, stop)
+        range_vol = bar_vol * math.sqrt(float(profile.loadings @ profile.loadings) + profile.idio_vol**2)
+        activity_scale = 5_000 * bar_seconds / base_seconds
+        columns = {
+            "timestamp": bars * (bar_seconds * 1_000_000_000),
+            "open": open_,
+            "high": np.maximum(open_, close) * np.exp(wick_high * range_vol),
+            "low": np.minimum(open_, close) * np.exp(-wick_low * range_vol),
+            "close": close,
+            "volume": np.round(activity_scale * stress * np.exp(activity) * (1 + np.abs(returns) / range_vol)),
+        }
+        return columns, float(log_close[-1])
+
+    def write_dataset(
+        self,
+        directory: Path,
+        assets: list[str],
+        timeframe: str,
+        bars: int,
+        start: int | None = None,
+        progress: bool = False,
+    ) -> Path:
+        """Write ``bars`` bars for every asset into asset-major ``(assets, bars)`` ``.npy`` memory maps.
+
+        Generation runs in slices of about ``CHUNK_BARS`` base bars so memory stays flat; ``close.npy``
+        opened with ``mmap_mode="r"`` and transposed gives the bars x assets matrix ``detect_many`` expects.
+        """
+        if start is None:
+            start = self.bar_index(timeframe, epoch_ns(settings.simulator_anchor))
+        start = self._day_aligned(timeframe, start)
+        step = max(CHUNK_BARS * TIMEFRAME_SECONDS[BASE_TIMEFRAME] // max(self._bar_seconds(timeframe), 3600), 1)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            name: np.lib.format.open_memmap(
+                directory / f"{name}.npy", mode="w+", dtype=np.float64, shape=(len(assets), bars)
+            )
+            for name in COLUMNS[1:]
+        }
+        timestamps = np.lib.format.open_memmap(
+            directory / "timestamp.npy", mode="w+", dtype=np.int64, shape=(bars,)
+        )
+        day = start * self._bar_seconds(timeframe) // DAY_SECONDS
+        levels = [self.log_level(asset, day) for asset in assets]
+
+        for offset in range(0, bars, step):
+            stop = min(offset + step, bars)
+            for i, asset in enumerate(assets):
+                columns, levels[i] = self._bars(asset, timeframe, start + offset, start + stop, levels[i])
+                for name in COLUMNS[1:]:
+                    arrays[name][i, offset:stop] = columns[name]
+            timestamps[offset:stop] = columns["timestamp"]
+            if progress:
+                print(f"{stop}/{bars} bars", file=sys.stderr)
+
+        for array in (*arrays.values(), timestamps):
+            array.flush()
+        meta = {"assets": assets, "timeframe": timeframe, "seed": settings.simulator_seed, "start_bar": start}
+        (directory / "meta.json").write_text(json.dumps(meta))
+        return directory
+
+
+def load_dataset(directory: Path) -> tuple[dict[str, object], dict[str, np.ndarray]]:
+    meta = json.loads((directory / "meta.json").read_text())
+    return meta, {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+
+
+market_simulator = MarketSimulator()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a simulated universe into .npy memory maps")
+    parser.add_argument("--assets", nargs="*", help="symbols to simulate")
+    parser.add_argument("--count", type=int, default=0, help="add SIM0000.. symbols up to this many")
+    parser.add_argument("--timeframe", default=settings.default_timeframe)
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    assets = list(dict.fromkeys([*(args.assets or []), *(f"SIM{i:04d}" for i in range(args.count))]))
+    if not assets:
+        parser.error("give --assets and/or --count")
+    started = time.perf_counter()
+    market_simulator.write_dataset(args.output, assets, args.timeframe, args.bars, progress=True)
+    elapsed = time.perf_counter() - started
+    print(f"{len(assets)} assets x {args.bars} bars in {elapsed:.1f}s -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
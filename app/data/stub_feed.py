@@ -0,0 +1,63 @@
+"""Local stub of a multi-symbol OHLCV HTTP feed, for exercising ``HttpProvider`` offline.
+
+Run ``python -m app.data.stub_feed --port 8900`` and set ``settings.http_feed_url`` to
+``http://127.0.0.1:8900`` with ``"http"`` in ``settings.provider_routes``. ``--fail-rate`` makes a
+share of requests answer 503 so retries and backoff can be observed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.data.models import COLUMNS
+from app.data.providers import SyntheticProvider
+
+
+def make_handler(fail_rate: float) -> type[BaseHTTPRequestHandler]:
+    provider = SyntheticProvider()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path != "/ohlcv":
+                self.send_error(404)
+                return
+            if random.random() < fail_rate:
+                self.send_error(503)
+                return
+            query = parse_qs(url.query)
+            symbols = [symbol for symbol in query.get("symbols", [""])[0].split(",") if symbol]
+            timeframe = query.get("timeframe", ["1h"])[0]
+            limit = int(query.get("limit", ["700"])[0])
+
+            payload = {}
+            for symbol in symbols:
+                frame = asyncio.run(provider.fetch_ohlcv(symbol, timeframe, limit))
+                columns = {name: getattr(frame, name).tolist() for name in COLUMNS[1:]}
+                payload[symbol] = {"timestamp": (frame.timestamp // 1_000_000).tolist(), **columns}
+
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args(argv)
+    ThreadingHTTPServer((args.host, args.port), make_handler(args.fail_rate)).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
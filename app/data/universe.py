@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+from config import settings
+
+
+def read_symbols(path: Path) -> list[str]:
+    """One symbol per line; blank lines and ``#`` comments are ignored."""
+    lines = (line.split("#", 1)[0].strip() for line in Path(path).read_text().splitlines())
+    return [line for line in lines if line]
+
+
+def load_universe(name: str) -> list[str]:
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+        raise ValueError(f"Invalid universe name: {name!r}")
+    path = Path(settings.universe_path) / f"{name}.txt"
+    if not path.exists():
+        raise ValueError(f"Unknown universe: {name}")
+    return read_symbols(path)
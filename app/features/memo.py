@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+from config import settings
+
+
+def settings_fingerprint() -> int:
+    return hash(settings.model_dump_json())
+
+
+class SingleFlightMemo:
+    """Bounded LRU of computed results where concurrent callers for one key share a single computation."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, dict[str, object]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task[dict[str, object]]] = {}
+        self._fingerprint = settings_fingerprint()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[dict[str, object]]]
+    ) -> dict[str, object]:
+        fingerprint = settings_fingerprint()
+        if fingerprint != self._fingerprint:
+            self.invalidate()
+            self._fingerprint = fingerprint
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _store(self, key: Hashable, task: asyncio.Task[dict[str, object]]) -> None:
+        # A task dropped by ``invalidate`` (or replaced on another loop) ran under stale settings.
+        current = self._inflight.get(key) is task
+        if current:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or not current:
+            return
+        self._entries[key] = task.result()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self.stats["invalidations"] += 1
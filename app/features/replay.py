@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import numpy as np
+
+from config import settings
+from app.backtesting.engine import BacktestResult, backtesting_engine
+from app.data.models import OHLCVFrame, epoch_ns, from_epoch_ns, periods_per_year
+from app.data.providers import market_data_service
+from app.indicators.engine import IndicatorSnapshot, IndicatorState, feed
+from app.regime.detector import RegimeResult, regime_detector
+from app.scoring.ranker import RankedSignal, signal_ranker
+from app.signals.engine import SignalCandidate, signal_engine
+
+
+def as_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def history_until(asset: str, timeframe: str, start: datetime, window: int) -> OHLCVFrame:
+    bar_seconds = market_data_service.timeframe_map.get(timeframe)
+    if bar_seconds is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    elapsed = (datetime.utcnow() - start).total_seconds()
+    needed = max(int(elapsed // bar_seconds), 0) + window + 1
+    if needed > settings.replay_max_bars:
+        raise ValueError(f"Replay needs {needed} bars, more than replay_max_bars={settings.replay_max_bars}")
+    return await market_data_service.get_history(asset, timeframe, limit=max(needed, window))
+
+
+class IndicatorCursor:
+    """Indicator state fed forward from an origin bar; restarts whenever the origin moves."""
+
+    def __init__(self) -> None:
+        self.origin = -1
+        self.position = -1
+        self.state = IndicatorState(signal_engine.indicator_windows())
+
+    def advance(self, df: OHLCVFrame, origin: int, step: int) -> IndicatorSnapshot:
+        if origin != self.origin or step < self.position:
+            self.origin, self.position = origin, origin
+            self.state = IndicatorState(signal_engine.indicator_windows())
+        feed(self.state, df[self.position : step + 1])
+        self.position = step + 1
+        return self.state.snapshot()
+
+
+@dataclass(slots=True)
+class ReplayStep:
+    snapshot: IndicatorSnapshot
+    regime: RegimeResult
+    evaluations: list[tuple[SignalCandidate, BacktestResult]]
+    ranked: list[RankedSignal]
+
+
+@dataclass(slots=True)
+class ReplayPlan:
+    asset: str
+    timeframe: str
+    df: OHLCVFrame
+    steps: np.ndarray
+    origins: np.ndarray
+    windows: list[list[BacktestResult]]
+
+
+def origins_of(timestamps: np.ndarray, steps: np.ndarray, bar_seconds: int, window: int) -> np.ndarray:
+    """First bar each evaluation at ``steps`` is computed from.
+
+    Histories start on a fixed grid of ``window``-bar blocks: one full block before the block holding
+    the step. The origin therefore depends only on the step's timestamp, never on how much history was
+    loaded, so a bar gets the same answer from a single replay and from any range that contains it.
+    """
+    block_ns = window * bar_seconds * 1_000_000_000
+    anchors = (timestamps[steps] // block_ns - 1) * block_ns
+    return np.searchsorted(timestamps, anchors)
+
+
+class ReplayEngine:
+    """Steps the research pipeline through many past bars, reusing state between steps.
+
+    Steps whose histories share an origin (see :func:`origins_of`) share one pass: strategy returns and
+    regime labels are computed once per origin, trailing-window metrics come from cumulative sums, and
+    indicator state advances bar by bar instead of being rebuilt per step.
+    """
+
+    async def plan(
+        self, asset: str, timeframe: str, start: datetime, end: datetime, every: int = 1
+    ) -> ReplayPlan:
+        start, end = as_utc_naive(start), as_utc_naive(end)
+        if start > end:
+            raise ValueError("start must not be after end")
+        df = await history_until(asset, timeframe, start, 2 * settings.replay_window_bars)
+        timestamps = df.timestamp
+        in_range = np.flatnonzero((timestamps >= epoch_ns(start)) & (timestamps <= epoch_ns(end)))
+        plan = await self._plan(asset, timeframe, df, in_range, every)
+        if plan is None:
+            raise ValueError(f"No bars for {asset} {timeframe} between {start.isoformat()} and {end.isoformat()}")
+        return plan
+
+    async def plan_at(self, asset: str, timeframe: str, at: datetime) -> ReplayPlan:
+        """One-step plan for the last bar at or before ``at``."""
+        at = as_utc_naive(at)
+        df = await history_until(asset, timeframe, at, 2 * settings.replay_window_bars)
+        step = int(np.searchsorted(df.timestamp, epoch_ns(at), side="right")) - 1
+        plan = await self._plan(asset, timeframe, df, np.arange(max(step, 0), step + 1))
+        if plan is None:
+            raise ValueError(f"No {asset} {timeframe} data at or before {at.isoformat()}")
+        return plan
+
+    async def _plan(
+        self, asset: str, timeframe: str, df: OHLCVFrame, candidates: np.ndarray, every: int = 1
+    ) -> ReplayPlan | None:
+        window = settings.replay_window_bars
+        bar_seconds = market_data_service.timeframe_map[timeframe]
+        origins = origins_of(df.timestamp, candidates, bar_seconds, window)
+        eligible = candidates - origins + 1 >= window
+        steps, origins = candidates[eligible][:: max(every, 1)], origins[eligible][:: max(every, 1)]
+        if steps.size == 0:
+            return None
+        df = df[: steps[-1] + 1]
+        windows = await asyncio.to_thread(self._score_windows, df, timeframe, steps, origins, window)
+        return ReplayPlan(asset=asset, timeframe=timeframe, df=df, steps=steps, origins=origins, windows=windows)
+
+    def _score_windows(
+        self, df: OHLCVFrame, timeframe: str, steps: np.ndarray, origins: np.ndarray, window: int
+    ) -> list[list[BacktestResult]]:
+        periods = periods_per_year(timeframe)
+        windows: list[list[BacktestResult]] = []
+        for origin in np.unique(origins).tolist():
+            group = steps[origins == origin]
+            strat_returns, labels = self.history_returns(df[origin : group[-1] + 1], timeframe)
+            windows.extend(backtesting_engine.run_windows(strat_returns, group - origin, window, periods, labels))
+        return windows
+
+    def history_returns(self, df: OHLCVFrame, timeframe: str) -> tuple[np.ndarray, np.ndarray]:
+        """Strategy returns and regime labels of ``df``, computed from its first bar."""
+        strat_returns = backtesting_engine.strategy_returns(df, signal_engine.generate(df))
+        return strat_returns, regime_detector.label_history(df, timeframe=timeframe)
+
+    def backtests(self, plan: ReplayPlan, index: int) -> list[BacktestResult]:
+        """Full backtests (curves, bootstrap intervals) of the window scored at ``plan.steps[index]``.
+
+        Per-regime performance is the windowed one the ranker saw.
+        """
+        origin, stop = int(plan.origins[index]), int(plan.steps[index]) + 1
+        strat_returns, labels = self.history_returns(plan.df[origin:stop], plan.timeframe)
+        lo = max(stop - origin - settings.replay_window_bars, 0)
+        results = backtesting_engine.run_returns(strat_returns[lo:], labels[lo:], periods_per_year(plan.timeframe))
+        for result, windowed in zip(results, plan.windows[index]):
+            result.regime_performance = windowed.regime_performance
+        return results
+
+    async def stream(self, plan: ReplayPlan) -> AsyncIterator[bytes]:
+        cursor = IndicatorCursor()
+        chunk = settings.replay_chunk_steps
+        for offset in range(0, len(plan.steps), chunk):
+            lines = await asyncio.to_thread(self._evaluate_chunk, plan, cursor, offset, offset + chunk)
+            yield "".join(lines).encode()
+
+    def evaluate(self, plan: ReplayPlan, cursor: IndicatorCursor, index: int) -> ReplayStep:
+        """Regime and ranked signals at ``plan.steps[index]``; steps must be visited in order."""
+        snapshot = cursor.advance(plan.df, int(plan.origins[index]), int(plan.steps[index]))
+        regime = regime_detector.detect_snapshot(snapshot, plan.timeframe)
+        evaluations = list(zip(signal_engine.generate_snapshot(snapshot), plan.windows[index]))
+        return ReplayStep(snapshot, regime, evaluations, signal_ranker.rank(regime.regime, evaluations))
+
+    def _evaluate_chunk(self, plan: ReplayPlan, cursor: IndicatorCursor, lo: int, hi: int) -> list[str]:
+        lines: list[str] = []
+        for index in range(lo, min(hi, len(plan.steps))):
+            result = self.evaluate(plan, cursor, index)
+            snapshot, regime, ranked = result.snapshot, result.regime, result.ranked
+            top = ranked[0]
+            lines.append(
+                json.dumps(
+                    {
+                        "asset": plan.asset,
+                        "timeframe": plan.timeframe,
+                        "timestamp": from_epoch_ns(snapshot.timestamp).isoformat(),
+                        "close": snapshot.close,
+                        "regime": regime.regime,
+                        "regime_confidence": regime.confidence,
+                        "suggested_direction": top.direction,
+                        "confidence": top.confidence_score,
+                        "signals": [
+                            {
+                                "name": signal.name,
+                                "direction": signal.direction,
+                                "confidence_score": signal.confidence_score,
+                                "expected_drawdown": signal.expected_drawdown,
+                            }
+                            for signal in ranked
+                        ],
+                    }
+                )
+                + "\n"
+            )
+        return lines
+
+
+replay_engine = ReplayEngine()
@@ -1,41 +1,103 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
+from typing import AsyncIterator
 
-import pandas as pd
-
-from app.backtesting.engine import backtesting_engine
+from config import settings
+from app.backtesting.engine import BacktestResult, backtesting_engine
+from app.backtesting.walk_forward import walk_forward_optimizer
 from app.data.database import db
+from app.data.log_writer import signal_log_writer
+from app.data.models import OHLCVFrame, from_epoch_ns
 from app.data.providers import market_data_service
+from app.features.memo import SingleFlightMemo
+from app.features.replay import IndicatorCursor, as_utc_naive, replay_engine
+from app.indicators.engine import indicator_engine
 from app.portfolio.advisor import AssetDecision, build_uncertainty_note
-from app.regime.detector import regime_detector
-from app.scoring.ranker import signal_ranker
-from app.signals.engine import signal_engine
+from app.portfolio.risk import SIGNS, portfolio_risk
+from app.regime.detector import RegimeResult, regime_detector
+from app.scoring.ranker import RankedSignal, signal_ranker
+from app.signals.engine import SignalCandidate, signal_engine
+from app.telemetry.metrics import profiling_active
+
+
+logger = logging.getLogger(__name__)
 
 
 class ResearchService:
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=settings.compute_workers, thread_name_prefix="research")
+        self.memo = SingleFlightMemo(settings.evaluation_memo_entries)
+
     async def evaluate_asset(self, asset: str, timeframe: str) -> dict[str, object]:
         df = await market_data_service.get_history(asset, timeframe)
-        regime = regime_detector.detect(df)
+        return await self._evaluate(asset, timeframe, df)
+
+    async def _evaluate(self, asset: str, timeframe: str, df: OHLCVFrame) -> dict[str, object]:
+        if profiling_active.get():
+            return await self._compute(asset, timeframe, df)
+        key = (
+            asset,
+            timeframe,
+            df.last_timestamp,
+            tuple(
+                (definition.name, definition.version, tuple(sorted(definition.parameters.items())))
+                for definition in signal_engine.definitions
+            ),
+            (settings.transaction_cost_bps, settings.slippage_bps),
+        )
+        return await self.memo.get_or_compute(key, lambda: self._compute(asset, timeframe, df))
+
+    async def analyze(self, asset: str, timeframe: str) -> tuple[dict[str, object], dict[str, object]]:
+        """Run the full pipeline without memoization or logging; the caller decides what to persist."""
+        df = await market_data_service.get_history(asset, timeframe)
+        return self._analyze(asset, timeframe, df)
+
+    async def _compute(self, asset: str, timeframe: str, df: OHLCVFrame) -> dict[str, object]:
+        if profiling_active.get():
+            result, log_entry = self._analyze(asset, timeframe, df)
+        else:
+            loop = asyncio.get_running_loop()
+            result, log_entry = await loop.run_in_executor(self._executor, self._analyze, asset, timeframe, df)
+        signal_log_writer.enqueue(log_entry)
+        return result
+
+    def _analyze(
+        self, asset: str, timeframe: str, df: OHLCVFrame
+    ) -> tuple[dict[str, object], dict[str, object]]:
+        snapshot = indicator_engine.update(asset, timeframe, df, signal_engine.indicator_windows())
+        regime = regime_detector.detect_snapshot(snapshot, timeframe)
 
-        candidates = signal_engine.generate(df)
-        evaluations = [(signal, backtesting_engine.run(df, signal)) for signal in candidates]
-        ranked = signal_ranker.rank(regime.regime, evaluations)
+        candidates = signal_engine.generate_snapshot(snapshot)
+        labels = regime_detector.label_history(df, key=(asset, timeframe), timeframe=timeframe)
+        evaluations = list(zip(candidates, backtesting_engine.run_many(df, candidates, labels, timeframe)))
+        return self._report(asset, timeframe, regime, evaluations, signal_ranker.rank(regime.regime, evaluations))
+
+    @staticmethod
+    def _report(
+        asset: str,
+        timeframe: str,
+        regime: RegimeResult,
+        evaluations: list[tuple[SignalCandidate, BacktestResult]],
+        ranked: list[RankedSignal],
+    ) -> tuple[dict[str, object], dict[str, object]]:
 
         top = ranked[0]
-        db.insert_signal_log(
-            {
-                "asset": asset,
-                "timeframe": timeframe,
-                "signal_name": top.name,
-                "direction": top.direction,
-                "confidence": top.confidence_score,
-                "justification": top.justification,
-                "expected_return_min": top.expected_return_min,
-                "expected_return_max": top.expected_return_max,
-                "expected_drawdown": top.expected_drawdown,
-            }
-        )
+        log_entry = {
+            "asset": asset,
+            "timeframe": timeframe,
+            "signal_name": top.name,
+            "direction": top.direction,
+            "confidence": top.confidence_score,
+            "justification": top.justification,
+            "expected_return_min": top.expected_return_min,
+            "expected_return_max": top.expected_return_max,
+            "expected_drawdown": top.expected_drawdown,
+        }
 
         top_eval = evaluations[0][1]
         decision = AssetDecision(
@@ -47,11 +109,11 @@ class ResearchService:
             uncertainty_note=build_uncertainty_note(top.confidence_score, top.expected_drawdown),
         )
 
-        return {
+        result = {
             "asset": asset,
             "timeframe": timeframe,
             "regime": regime.model_dump(),
-            "signals": [r.__dict__ for r in ranked[:3]],
+            "signals": [asdict(r) for r in ranked[:3]],
             "decision": decision.model_dump(),
             "metrics": {
                 "cagr": top_eval.cagr,
@@ -63,6 +125,10 @@ class ResearchService:
                 "expectancy": top_eval.expectancy,
                 "risk_of_ruin": top_eval.risk_of_ruin,
                 "win_rate": top_eval.win_rate,
+                "sharpe_ci_low": top_eval.sharpe_ci[0],
+                "sharpe_ci_high": top_eval.sharpe_ci[1],
+                "max_drawdown_ci_low": top_eval.max_drawdown_ci[0],
+                "max_drawdown_ci_high": top_eval.max_drawdown_ci[1],
             },
             "curves": {
                 "equity": top_eval.equity_curve,
@@ -71,24 +137,135 @@ class ResearchService:
             },
             "performance_per_regime": top_eval.regime_performance,
         }
+        return result, log_entry
 
     async def dashboard(self, assets: list[str], timeframe: str) -> dict[str, object]:
-        items = [await self.evaluate_asset(asset, timeframe) for asset in assets]
-        return {"generated_at": datetime.utcnow().isoformat(), "assets": items, "logs": db.latest_signal_logs()}
+        limit = asyncio.Semaphore(settings.dashboard_concurrency)
+
+        async def evaluate_limited(asset: str) -> tuple[OHLCVFrame, dict[str, object]]:
+            async with limit:
+                df = await market_data_service.get_history(asset, timeframe)
+                return df, await self._evaluate(asset, timeframe, df)
+
+        outcomes = await asyncio.gather(*(evaluate_limited(asset) for asset in assets), return_exceptions=True)
+
+        items: list[dict[str, object]] = []
+        frames: dict[str, OHLCVFrame] = {}
+        errors: list[dict[str, str]] = []
+        for asset, outcome in zip(assets, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Evaluation failed for %s %s: %s", asset, timeframe, outcome)
+                errors.append({"asset": asset, "timeframe": timeframe, "error": str(outcome)})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                frames[asset], item = outcome
+                items.append(item)
+
+        positions = {
+            item["asset"]: (item["decision"]["suggested_direction"], item["signals"][0]["expected_drawdown"])
+            for item in items
+        }
+        await signal_log_writer.flush()
+        loop = asyncio.get_running_loop()
+        portfolio = await loop.run_in_executor(
+            self._executor, portfolio_risk.evaluate, timeframe, frames, positions
+        )
+        logs = await loop.run_in_executor(self._executor, db.latest_signal_logs)
+        return {
+            "generated_at": datetime.utcnow().isoformat(),
+            "assets": items,
+            "errors": errors,
+            "portfolio": portfolio,
+            "logs": logs,
+        }
+
+    async def confluence(self, asset: str, timeframes: list[str]) -> dict[str, object]:
+        """Evaluate one asset on several timeframes in one call and summarise how far they agree."""
+        for timeframe in timeframes:
+            if timeframe not in market_data_service.timeframe_map:
+                raise ValueError(f"Unsupported timeframe: {timeframe}")
+        await market_data_service.warm(asset, timeframes)
+        outcomes = await asyncio.gather(
+            *(self.evaluate_asset(asset, timeframe) for timeframe in timeframes), return_exceptions=True
+        )
+
+        analyses: list[dict[str, object]] = []
+        errors: list[dict[str, str]] = []
+        for timeframe, outcome in zip(timeframes, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Evaluation failed for %s %s: %s", asset, timeframe, outcome)
+                errors.append({"asset": asset, "timeframe": timeframe, "error": str(outcome)})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                analyses.append(outcome)
+
+        votes = [(item["decision"]["suggested_direction"], item["decision"]["confidence"]) for item in analyses]
+        weight = sum(confidence for _, confidence in votes)
+        tilt = sum(SIGNS.get(direction, 0.0) * confidence for direction, confidence in votes)
+        score = tilt / weight if weight else 0.0
+        direction = "Long" if score > 0.2 else "Short" if score < -0.2 else "Neutral"
+        await signal_log_writer.flush()
+        return {
+            "asset": asset,
+            "generated_at": datetime.utcnow().isoformat(),
+            "consensus": {
+                "direction": direction,
+                "score": round(score, 3),
+                "agreement": round(sum(vote == direction for vote, _ in votes) / len(votes), 3) if votes else 0.0,
+                "timeframes": [
+                    {
+                        "timeframe": analysis["timeframe"],
+                        "direction": analysis["decision"]["suggested_direction"],
+                        "confidence": analysis["decision"]["confidence"],
+                        "regime": analysis["regime"]["regime"],
+                        "signal": analysis["signals"][0]["name"],
+                    }
+                    for analysis in analyses
+                ],
+            },
+            "analyses": analyses,
+            "errors": errors,
+        }
+
+    async def walk_forward(self, asset: str, timeframe: str, bars: int) -> dict[str, object]:
+        df = await market_data_service.get_history(asset, timeframe, limit=bars)
+        reports = await asyncio.to_thread(walk_forward_optimizer.run, df, None, timeframe)
+        return {
+            "asset": asset,
+            "timeframe": timeframe,
+            "bars": len(df),
+            "signals": [asdict(report) for report in reports],
+        }
 
     async def historical_replay(self, asset: str, timeframe: str, at: str) -> dict[str, object]:
-        target = datetime.fromisoformat(at)
-        df = await market_data_service.get_history(asset, timeframe, limit=1200)
-        replay_df = df[df["timestamp"] <= pd.Timestamp(target)].tail(700)
-        if replay_df.empty:
-            replay_df = df.head(700)
-        result = await self.evaluate_asset(asset, timeframe)
+        """One-step replay: the same evaluation ``replay_range`` streams for the last bar at or before ``at``."""
+        target = as_utc_naive(datetime.fromisoformat(at))
+        plan = await replay_engine.plan_at(asset, timeframe, target)
+
+        def analyze() -> dict[str, object]:
+            step = replay_engine.evaluate(plan, IndicatorCursor(), 0)
+            candidates = [candidate for candidate, _ in step.evaluations]
+            evaluations = list(zip(candidates, replay_engine.backtests(plan, 0)))
+            result, _ = self._report(asset, timeframe, step.regime, evaluations, step.ranked)
+            return result
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, analyze)
         result["replay_timestamp"] = target.isoformat()
+        result["replay_bar_timestamp"] = from_epoch_ns(int(plan.df.timestamp[plan.steps[0]])).isoformat()
         result["replay_note"] = (
             "Historical replay is computed using only data available up to the selected timestamp "
             "for transparent, auditable decision support."
         )
         return result
 
+    async def replay_range(
+        self, asset: str, timeframe: str, start: datetime, end: datetime, every: int = 1
+    ) -> AsyncIterator[bytes]:
+        plan = await replay_engine.plan(asset, timeframe, start, end, every)
+        return replay_engine.stream(plan)
+
 
 research_service = ResearchService()
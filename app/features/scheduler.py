@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
+
+from config import settings
+from app.data.cache import next_bar_boundary
+from app.data.providers import market_data_service
+from app.features.research_service import ResearchService, research_service
+
+logger = logging.getLogger(__name__)
+
+Event = tuple[str, dict[str, object] | None]
+
+
+def dashboard_diff(previous: dict[str, object], current: dict[str, object]) -> dict[str, object]:
+    before = {item["asset"]: item for item in previous["assets"]}
+    after = {item["asset"] for item in current["assets"]}
+    return {
+        "generated_at": current["generated_at"],
+        "assets": [item for item in current["assets"] if before.get(item["asset"]) != item],
+        "removed": sorted(set(before) - after),
+        "errors": current["errors"],
+        "portfolio": current["portfolio"],
+        "logs": current["logs"],
+    }
+
+
+class DashboardScheduler:
+    """Evaluates the dashboard universe once per bar close and shares the result with every viewer.
+
+    A timeframe's loop stops once it has had no subscribers and no ``latest`` callers for
+    ``scheduler_idle_bars`` bars; the next request starts it again.
+    """
+
+    def __init__(self, service: ResearchService) -> None:
+        self.service = service
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._ready: dict[str, asyncio.Event] = {}
+        self._results: dict[str, dict[str, object] | Exception] = {}
+        self._subscribers: dict[str, set[asyncio.Queue[Event]]] = {}
+        self._demand: dict[str, float] = {}
+
+    def _ensure_running(self, timeframe: str) -> None:
+        if timeframe not in market_data_service.timeframe_map:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._tasks, self._ready, self._results, self._subscribers = {}, {}, {}, {}
+            self._demand = {}
+        self._demand[timeframe] = time.monotonic()
+        task = self._tasks.get(timeframe)
+        if task is None or task.done():
+            self._ready.setdefault(timeframe, asyncio.Event())
+            self._subscribers.setdefault(timeframe, set())
+            self._tasks[timeframe] = loop.create_task(self._run(timeframe))
+
+    async def latest(self, timeframe: str) -> dict[str, object]:
+        self._ensure_running(timeframe)
+        await self._ready[timeframe].wait()
+        result = self._results[timeframe]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def subscribe(self, timeframe: str) -> AsyncIterator[Event]:
+        self._ensure_running(timeframe)
+        queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=settings.stream_queue_size)
+        subscribers = self._subscribers[timeframe]
+        subscribers.add(queue)
+        try:
+            result = self._results.get(timeframe)
+            if isinstance(result, dict):
+                yield "snapshot", result
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=settings.stream_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield "ping", None
+        finally:
+            subscribers.discard(queue)
+            self._demand[timeframe] = time.monotonic()
+
+    async def close(self) -> None:
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+
+    async def _run(self, timeframe: str) -> None:
+        bar_seconds = market_data_service.timeframe_map[timeframe]
+        while True:
+            if self._idle(timeframe, bar_seconds):
+                self._stop(timeframe)
+                return
+            try:
+                current = await self.service.dashboard(settings.default_assets, timeframe)
+            except Exception as exc:
+                logger.exception("Scheduled dashboard evaluation failed for %s", timeframe)
+                if not isinstance(self._results.get(timeframe), dict):
+                    self._results[timeframe] = exc
+            else:
+                previous = self._results.get(timeframe)
+                self._results[timeframe] = current
+                if isinstance(previous, dict):
+                    self._publish(timeframe, ("update", dashboard_diff(previous, current)))
+                else:
+                    self._publish(timeframe, ("snapshot", current))
+            self._ready[timeframe].set()
+            delay = next_bar_boundary(bar_seconds) - time.time() + settings.scheduler_settle_seconds
+            await asyncio.sleep(delay)
+
+    def _idle(self, timeframe: str, bar_seconds: int) -> bool:
+        if self._subscribers.get(timeframe):
+            return False
+        return time.monotonic() - self._demand.get(timeframe, 0.0) >= settings.scheduler_idle_bars * bar_seconds
+
+    def _stop(self, timeframe: str) -> None:
+        # Dropping the stale result makes the next request wait for a fresh evaluation.
+        logger.info("Stopping idle dashboard schedule for %s", timeframe)
+        if self._tasks.get(timeframe) is asyncio.current_task():
+            del self._tasks[timeframe]
+        for state in (self._ready, self._results, self._demand):
+            state.pop(timeframe, None)
+
+    def _publish(self, timeframe: str, event: Event) -> None:
+        for queue in self._subscribers.get(timeframe, ()):
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", self._results[timeframe]))
+            else:
+                queue.put_nowait(event)
+
+
+dashboard_scheduler = DashboardScheduler(research_service)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator
+
+from config import settings
+from app.backtesting.engine import backtesting_engine
+from app.data.models import OHLCVFrame
+from app.data.providers import market_data_service
+from app.data.universe import load_universe
+from app.indicators.engine import indicator_engine
+from app.regime.detector import regime_detector
+from app.scoring.ranker import signal_ranker
+from app.signals.engine import signal_engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ScreenFilters:
+    regimes: set[str] | None = None
+    directions: set[str] | None = None
+    min_confidence: float = 0.0
+    max_expected_drawdown: float | None = None
+
+
+@dataclass(slots=True)
+class ScreenPlan:
+    assets: list[str]
+    timeframe: str
+    top_k: int
+    filters: ScreenFilters = field(default_factory=ScreenFilters)
+
+
+class Screener:
+    """Runs the research pipeline over a universe and keeps the global top-K setups in a bounded heap.
+
+    Filters are applied at the earliest stage that can decide them: regime before signal generation,
+    direction before backtesting, confidence and drawdown after ranking.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=settings.compute_workers, thread_name_prefix="screen")
+
+    def plan(
+        self,
+        timeframe: str,
+        top_k: int,
+        filters: ScreenFilters,
+        assets: list[str] | None = None,
+        universe: str | None = None,
+    ) -> ScreenPlan:
+        if timeframe not in market_data_service.timeframe_map:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        symbols = list(assets or [])
+        if universe:
+            symbols.extend(load_universe(universe))
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            raise ValueError("Provide assets or a universe to screen")
+        if len(symbols) > settings.screen_max_assets:
+            raise ValueError(
+                f"Universe has {len(symbols)} assets, more than screen_max_assets={settings.screen_max_assets}"
+            )
+        return ScreenPlan(assets=symbols, timeframe=timeframe, top_k=top_k, filters=filters)
+
+    async def stream(self, plan: ScreenPlan) -> AsyncIterator[bytes]:
+        limit = asyncio.Semaphore(settings.screen_concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def screen_one(asset: str) -> tuple[str, list[dict[str, object]] | Exception]:
+            async with limit:
+                try:
+                    frame = await market_data_service.get_history(asset, plan.timeframe)
+                    setups = await loop.run_in_executor(
+                        self._executor, self._screen_asset, asset, plan.timeframe, frame, plan.filters
+                    )
+                    return asset, setups
+                except Exception as exc:
+                    return asset, exc
+
+        heap: list[tuple[float, int, dict[str, object]]] = []
+        sequence = 0
+        total = len(plan.assets)
+        every = max(1, total // 100)
+        done = matched = pruned = 0
+        errors: list[dict[str, str]] = []
+
+        tasks = [asyncio.ensure_future(screen_one(asset)) for asset in plan.assets]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                asset, outcome = await next_result
+                done += 1
+                if isinstance(outcome, Exception):
+                    logger.warning("Screen failed for %s %s: %s", asset, plan.timeframe, outcome)
+                    errors.append({"asset": asset, "timeframe": plan.timeframe, "error": str(outcome)})
+                elif not outcome:
+                    pruned += 1
+                else:
+                    matched += 1
+                    for setup in outcome:
+                        sequence += 1
+                        entry = (float(setup["confidence_score"]), -sequence, setup)
+                        if len(heap) < plan.top_k:
+                            heapq.heappush(heap, entry)
+                        elif entry > heap[0]:
+                            heapq.heapreplace(heap, entry)
+
+                if done % every == 0 or done == total:
+                    progress = {
+                        "type": "progress",
+                        "done": done,
+                        "total": total,
+                        "matched": matched,
+                        "pruned": pruned,
+                        "errors": len(errors),
+                        "threshold": heap[0][0] if len(heap) == plan.top_k else None,
+                    }
+                    yield (json.dumps(progress) + "\n").encode()
+        finally:
+            # A client that disconnects closes this generator; stop the assets still queued or running.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        top = [setup for _, _, setup in sorted(heap, reverse=True)]
+        result = {"type": "result", "timeframe": plan.timeframe, "top": top, "errors": errors}
+        yield (json.dumps(result) + "\n").encode()
+
+    def _screen_asset(
+        self, asset: str, timeframe: str, frame: OHLCVFrame, filters: ScreenFilters
+    ) -> list[dict[str, object]]:
+        snapshot = indicator_engine.update(asset, timeframe, frame, signal_engine.indicator_windows())
+        regime = regime_detector.detect_snapshot(snapshot, timeframe)
+        if filters.regimes is not None and regime.regime not in filters.regimes:
+            return []
+
+        candidates = signal_engine.generate_snapshot(snapshot)
+        if filters.directions is not None:
+            candidates = [candidate for candidate in candidates if candidate.direction in filters.directions]
+        if not candidates:
+            return []
+
+        labels = regime_detector.label_history(frame, key=(asset, timeframe), timeframe=timeframe)
+        evaluations = list(zip(candidates, backtesting_engine.run_many(frame, candidates, labels, timeframe)))
+        max_drawdown = filters.max_expected_drawdown
+        return [
+            {
+                "asset": asset,
+                "timeframe": timeframe,
+                "regime": regime.regime,
+                "regime_confidence": regime.confidence,
+                **asdict(signal),
+            }
+            for signal in signal_ranker.rank(regime.regime, evaluations)
+            if signal.confidence_score >= filters.min_confidence
+            and (max_drawdown is None or signal.expected_drawdown <= max_drawdown)
+        ]
+
+
+screener = Screener()
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.data.models import OHLCVFrame, as_ohlcv
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class EMA:
+    """Bias-adjusted EMA, equivalent to ``Series.ewm(span=span).mean()``."""
+
+    def __init__(self, span: int) -> None:
+        self.decay = 1 - 2 / (span + 1)
+        self._num = 0.0
+        self._den = 0.0
+
+    def update(self, value: float) -> float:
+        self._num = self._num * self.decay + value
+        self._den = self._den * self.decay + 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self._num / self._den if self._den else math.nan
+
+
+class RollingMeanVar:
+    """Sliding-window Welford mean/variance (sample variance, ``ddof=1``)."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self._values: deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value: float) -> None:
+        if len(self._values) == self.window:
+            old = self._values.popleft()
+            n = len(self._values)
+            if n == 0:
+                self._mean = 0.0
+                self._m2 = 0.0
+            else:
+                prev_mean = self._mean
+                self._mean = prev_mean + (prev_mean - old) / n
+                self._m2 = max(self._m2 - (old - prev_mean) * (old - self._mean), 0.0)
+        self._values.append(value)
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def ready(self) -> bool:
+        return len(self._values) == self.window
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.ready else math.nan
+
+    @property
+    def std(self) -> float:
+        if not self.ready or self.window < 2:
+            return math.nan
+        return math.sqrt(self._m2 / (self.window - 1))
+
+
+class RSI:
+    """RSI over a return stream; ``wilder=False`` averages gains/losses over a plain rolling window."""
+
+    def __init__(self, period: int, wilder: bool = False) -> None:
+        self.period = period
+        self.wilder = wilder
+        self._gains = RollingMeanVar(period)
+        self._losses = RollingMeanVar(period)
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, change: float) -> None:
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        self._count += 1
+        if not self.wilder:
+            self._gains.update(gain)
+            self._losses.update(loss)
+        elif self._count <= self.period:
+            self._avg_gain += (gain - self._avg_gain) / self._count
+            self._avg_loss += (loss - self._avg_loss) / self._count
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+
+    @property
+    def value(self) -> float:
+        if self._count < self.period:
+            return math.nan
+        gains, losses = (self._avg_gain, self._avg_loss) if self.wilder else (self._gains.mean, self._losses.mean)
+        return 100 - (100 / (1 + gains / (losses + 1e-9)))
+
+
+class RollingExtreme:
+    """Monotonic-deque rolling max (or min) with amortised O(1) updates."""
+
+    def __init__(self, window: int, mode: str = "max") -> None:
+        self.window = window
+        self._better = (lambda a, b: a >= b) if mode == "max" else (lambda a, b: a <= b)
+        self._items: deque[tuple[int, float]] = deque()
+        self._index = -1
+
+    def update(self, value: float) -> None:
+        self._index += 1
+        while self._items and self._better(value, self._items[-1][1]):
+            self._items.pop()
+        self._items.append((self._index, value))
+        if self._items[0][0] <= self._index - self.window:
+            self._items.popleft()
+
+    @property
+    def value(self) -> float:
+        return self._items[0][1] if self._index >= self.window - 1 else math.nan
+
+
+@dataclass(slots=True, frozen=True)
+class IndicatorWindows:
+    """Lookbacks of the signal inputs; the regime inputs (20/30/14 bars) are fixed."""
+
+    ema_fast: float = 20
+    ema_slow: float = 50
+    band: int = 20
+    channel: int = 30
+
+
+@dataclass(slots=True, frozen=True)
+class IndicatorSnapshot:
+    timestamp: int | None
+    bars: int
+    close: float
+    ema_fast: float
+    ema_slow: float
+    close_mean: float
+    close_std: float
+    return_mean: float
+    return_std: float
+    return_vol: float
+    trend_strength: float
+    rsi: float
+    wilder_rsi: float
+    high_max: float
+    low_min: float
+    windows: IndicatorWindows
+
+
+class IndicatorState:
+    """Streaming indicators for one (asset, timeframe), updated one bar at a time."""
+
+    def __init__(self, windows: IndicatorWindows = IndicatorWindows()) -> None:
+        self.windows = windows
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.last_timestamp: int | None = None
+        self.bars = 0
+        self.close = math.nan
+        self._closes: deque[float] = deque(maxlen=21)
+        self.ema_fast = EMA(self.windows.ema_fast)
+        self.ema_slow = EMA(self.windows.ema_slow)
+        self.close_stats = RollingMeanVar(self.windows.band)
+        self.return_stats = RollingMeanVar(20)
+        self.return_vol = RollingMeanVar(30)
+        self.rsi = RSI(14)
+        self.wilder_rsi = RSI(14, wilder=True)
+        self.high_max = RollingExtreme(self.windows.channel, "max")
+        self.low_min = RollingExtreme(self.windows.channel, "min")
+
+    def update(self, timestamp: int, high: float, low: float, close: float) -> None:
+        if self._closes:
+            change = close / self._closes[-1] - 1
+            self.return_stats.update(change)
+            self.return_vol.update(change)
+            self.rsi.update(change)
+            self.wilder_rsi.update(change)
+        self._closes.append(close)
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.close_stats.update(close)
+        self.high_max.update(high)
+        self.low_min.update(low)
+        self.close = close
+        self.last_timestamp = timestamp
+        self.bars += 1
+
+    @property
+    def trend_strength(self) -> float:
+        if len(self._closes) < self._closes.maxlen:
+            return math.nan
+        return abs(self._closes[-1] / self._closes[0] - 1)
+
+    def snapshot(self) -> IndicatorSnapshot:
+        return IndicatorSnapshot(
+            timestamp=self.last_timestamp,
+            bars=self.bars,
+            close=self.close,
+            ema_fast=self.ema_fast.value,
+            ema_slow=self.ema_slow.value,
+            close_mean=self.close_stats.mean,
+            close_std=self.close_stats.std,
+            return_mean=self.return_stats.mean,
+            return_std=self.return_stats.std,
+            return_vol=self.return_vol.std,
+            trend_strength=self.trend_strength,
+            rsi=self.rsi.value,
+            wilder_rsi=self.wilder_rsi.value,
+            high_max=self.high_max.value,
+            low_min=self.low_min.value,
+            windows=self.windows,
+        )
+
+
+def feed(state: IndicatorState, frame: OHLCVFrame) -> None:
+    for ts, high, low, close in zip(
+        frame.timestamp.tolist(), frame.high.tolist(), frame.low.tolist(), frame.close.tolist()
+    ):
+        state.update(ts, high, low, close)
+
+
+class IndicatorEngine:
+    def __init__(self) -> None:
+        self._states: dict[tuple[str, str, IndicatorWindows], IndicatorState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, asset: str, timeframe: str, windows: IndicatorWindows = IndicatorWindows()) -> IndicatorState:
+        with self._lock:
+            state = self._states.get((asset, timeframe, windows))
+            if state is None:
+                state = self._states[(asset, timeframe, windows)] = IndicatorState(windows)
+            return state
+
+    def update(
+        self,
+        asset: str,
+        timeframe: str,
+        data: OHLCVFrame | pd.DataFrame,
+        windows: IndicatorWindows = IndicatorWindows(),
+    ) -> IndicatorSnapshot:
+        frame = as_ohlcv(data)
+        state = self.state(asset, timeframe, windows)
+        with state.lock:
+            last = state.last_timestamp
+            if last is not None and not (frame.timestamp[0] <= last <= frame.timestamp[-1]):
+                state.reset()
+            if state.last_timestamp is not None:
+                frame = frame[int(np.searchsorted(frame.timestamp, state.last_timestamp, side="right")) :]
+            feed(state, frame)
+            return state.snapshot()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass, field
+from functools import reduce
+
+import numpy as np
+
+from config import settings
+from app.data.models import OHLCVFrame, from_epoch_ns, periods_per_year
+
+SIGNS = {"Long": 1.0, "Short": -1.0}
+
+
+def aligned_returns(frames: dict[str, OHLCVFrame], window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Log returns over the bars every frame has, as ``(timestamps, returns[bars, assets])``."""
+    tails = [frame[-(window + 1) :] for frame in frames.values()]
+    if len({len(tail) for tail in tails}) == 1:
+        stamps = np.stack([tail.timestamp for tail in tails])
+        if (stamps == stamps[0]).all():
+            closes = np.stack([tail.close for tail in tails], axis=1)
+            return stamps[0, 1:], np.diff(np.log(closes), axis=0)
+    common = reduce(np.intersect1d, (tail.timestamp for tail in tails))
+    closes = np.column_stack([tail.close[np.searchsorted(tail.timestamp, common)] for tail in tails])
+    return common[1:], np.diff(np.log(closes), axis=0)
+
+
+@dataclass(slots=True)
+class CovarianceState:
+    """Exponentially weighted mean/covariance updated per batch of bars, so each new bar costs O(n²).
+
+    ``cov`` holds weighted squared deviations about ``mean``; batches are merged with the weighted
+    form of Chan et al.'s pairwise update, so any split of the history gives the same result.
+    ``fourth`` tracks the weighted mean of ``||x - mean||⁴`` (centred on the mean as of each batch),
+    which is all the Ledoit-Wolf estimator needs beyond the covariance itself.
+    """
+
+    assets: tuple[str, ...]
+    decay: float
+    last_timestamp: int = -1
+    weight: float = 0.0
+    weight_sq: float = 0.0
+    fourth: float = 0.0
+    mean: np.ndarray = field(init=False)
+    cov: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        n = len(self.assets)
+        self.mean, self.cov = np.zeros(n), np.zeros((n, n))
+
+    def absorb(self, timestamps: np.ndarray, returns: np.ndarray) -> None:
+        if len(returns) == 0:
+            return
+        ages = self.decay ** np.arange(len(returns) - 1, -1, -1, dtype=np.float64)
+        carry = self.decay ** len(returns)
+        batch_weight = float(ages.sum())
+        batch_mean = ages @ returns / batch_weight
+        prior = carry * self.weight
+        weight = prior + batch_weight
+        shift = batch_mean - self.mean
+        centred = returns - batch_mean
+        self.cov *= carry
+        self.cov += (centred * ages[:, None]).T @ centred
+        self.cov += (prior * batch_weight / weight) * np.outer(shift, shift)
+        self.mean = self.mean + shift * (batch_weight / weight)
+        deviations = returns - self.mean
+        self.fourth = carry * self.fourth + float(ages @ np.square(np.einsum("ij,ij->i", deviations, deviations)))
+        self.weight = weight
+        self.weight_sq = carry**2 * self.weight_sq + float(ages @ ages)
+        self.last_timestamp = int(timestamps[-1])
+
+    def ledoit_wolf(self) -> tuple[np.ndarray, float]:
+        """Covariance shrunk towards a scaled identity, with the Ledoit-Wolf (2004) intensity."""
+        sample = self.cov / self.weight
+        n = len(sample)
+        samples = self.weight**2 / self.weight_sq
+        mu = float(np.trace(sample)) / n
+        norm_sq = float(np.einsum("ij,ij->", sample, sample))
+        delta = (norm_sq - n * mu**2) / n
+        beta = min(max((self.fourth / self.weight - norm_sq) / (n * samples), 0.0), delta)
+        shrinkage = beta / delta if delta > 0 else 1.0
+        shrunk = sample * (1.0 - shrinkage)
+        shrunk[np.diag_indices(n)] += shrinkage * mu
+        return shrunk, shrinkage
+
+
+def risk_parity(cov: np.ndarray, start: np.ndarray | None = None, tol: float = 1e-12) -> np.ndarray:
+    """Long-only equal-risk-contribution weights summing to one.
+
+    Newton's method on Spinu's convex form ``min ½yᵀΣy - (1/n)·Σlog y``, whose minimiser normalised to
+    unit sum has equal risk contributions. Converges in a few steps even with strong or negative
+    correlations; ``start`` (e.g. the previous bar's weights) cuts that to one or two.
+    """
+    n = len(cov)
+    budget = 1.0 / n
+    y = 1.0 / np.sqrt(np.diag(cov)) if start is None else np.asarray(start, dtype=np.float64).copy()
+    y *= math.sqrt(1.0 / float(y @ cov @ y))
+
+    def objective(point: np.ndarray) -> float:
+        return 0.5 * float(point @ cov @ point) - budget * float(np.log(point).sum())
+
+    for _ in range(50):
+        gradient = cov @ y - budget / y
+        hessian = cov.copy()
+        hessian[np.diag_indices(n)] += budget / y**2
+        step = np.linalg.solve(hessian, gradient)
+        decrement = float(gradient @ step)
+        if decrement / 2 < tol:
+            break
+        t = 1.0
+        while np.any(y - t * step <= 0):
+            t *= 0.5
+        current = objective(y)
+        while objective(y - t * step) > current - 0.25 * t * decrement and t > 1e-12:
+            t *= 0.5
+        y = y - t * step
+    return y / y.sum()
+
+
+def max_drawdown(returns: np.ndarray) -> float:
+    equity = np.exp(np.cumsum(returns))
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return float(np.max(1.0 - equity / peak, initial=0.0))
+
+
+class PortfolioRiskModel:
+    """Portfolio view over the dashboard's suggested positions.
+
+    Keeps one incremental covariance state per timeframe (rebuilt only when the asset set changes),
+    shrinks it with Ledoit-Wolf, sizes the directional positions by equal risk contribution and
+    scales them to ``settings.portfolio_vol_target`` under a gross leverage cap.
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[str, CovarianceState] = {}
+        self._parity: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def covariance(
+        self, timeframe: str, timestamps: np.ndarray, returns: np.ndarray, assets: tuple[str, ...]
+    ) -> tuple[np.ndarray, float]:
+        """Absorb bars newer than the timeframe's state and return its shrunk covariance."""
+        with self._lock:
+            state = self._states.get(timeframe)
+            if state is None or state.assets != assets:
+                decay = 0.5 ** (1.0 / settings.portfolio_halflife_bars)
+                state = self._states[timeframe] = CovarianceState(assets=assets, decay=decay)
+            fresh = timestamps > state.last_timestamp
+            state.absorb(timestamps[fresh], returns[fresh])
+            return state.ledoit_wolf()
+
+    def evaluate(
+        self, timeframe: str, frames: dict[str, OHLCVFrame], positions: dict[str, tuple[str, float]]
+    ) -> dict[str, object] | None:
+        """``positions`` maps asset -> (suggested direction, expected drawdown % of its top signal)."""
+        frames = {asset: frame for asset, frame in frames.items() if len(frame) > settings.portfolio_min_bars}
+        if len(frames) < 2:
+            return None
+        timestamps, returns = aligned_returns(frames, settings.portfolio_window_bars)
+        if len(returns) < settings.portfolio_min_bars:
+            return None
+
+        assets = tuple(frames)
+        cov, shrinkage = self.covariance(timeframe, timestamps, returns, assets)
+        active = [i for i, asset in enumerate(assets) if positions[asset][0] in SIGNS]
+        signs = np.array([SIGNS[positions[assets[i]][0]] for i in active])
+        weights = np.zeros(len(assets))
+        volatility = leverage = diversification = 0.0
+        contributions = np.zeros(0)
+        if active:
+            signed = cov[np.ix_(active, active)] * np.outer(signs, signs)
+            with self._lock:
+                previous = self._parity.get(timeframe, {})
+            start = np.array([previous.get(assets[i], np.nan) for i in active])
+            if np.isnan(start).any():
+                start = None
+            parity = risk_parity(signed, start)
+            with self._lock:
+                self._parity[timeframe] = {assets[i]: float(w) for i, w in zip(active, parity)}
+            periods = periods_per_year(timeframe)
+            raw_vol = math.sqrt(max(float(parity @ signed @ parity), 1e-18) * periods)
+            scale = min(settings.portfolio_vol_target / raw_vol, settings.portfolio_max_leverage)
+            weights[active] = scale * parity * signs
+            volatility, leverage = raw_vol * scale, scale
+            asset_vol = np.sqrt(np.diag(signed) * periods)
+            diversification = float(parity @ asset_vol) / raw_vol
+            contributions = parity * (signed @ parity) / float(parity @ signed @ parity)
+
+        book = returns @ weights
+        bar_vol = float(book.std())
+        drawdowns = np.array([positions[assets[i]][1] for i in active])
+        signal_drawdown = float(np.abs(weights[active]) @ drawdowns) / diversification if active else 0.0
+        order = sorted(range(len(active)), key=lambda k: -abs(weights[active[k]]))
+        return {
+            "timeframe": timeframe,
+            "as_of": from_epoch_ns(timestamps[-1]).isoformat(),
+            "assets": len(assets),
+            "bars": len(returns),
+            "shrinkage": round(shrinkage, 4),
+            "volatility": round(volatility * 100, 2),
+            "gross_leverage": round(leverage, 3),
+            "diversification_ratio": round(diversification, 3),
+            "max_drawdown": round(max_drawdown(book) * 100, 2),
+            "expected_max_drawdown": round(math.sqrt(math.pi / 2) * bar_vol * math.sqrt(len(book)) * 100, 2),
+            "signal_expected_drawdown": round(signal_drawdown, 2),
+            "positions": [
+                {
+                    "asset": assets[active[k]],
+                    "direction": positions[assets[active[k]]][0],
+                    "weight": round(float(weights[active[k]]), 5),
+                    "risk_contribution": round(float(contributions[k]), 5),
+                }
+                for k in order
+            ],
+        }
+
+
+portfolio_risk = PortfolioRiskModel()
@@ -1,9 +1,27 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Hashable
+
 import numpy as np
-import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from pydantic import BaseModel
 
+from config import settings
+from app.data.models import OHLCVFrame, as_ohlcv, periods_per_year
+from app.indicators.engine import IndicatorSnapshot
+from app.telemetry.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+REGIMES = ("high_volatility", "low_volatility", "momentum_breakout", "mean_reversion", "trending", "ranging")
+UNLABELLED = -1
+VOL_WINDOW = 30
+TREND_WINDOW = 20
+RSI_WINDOW = 14
+
 
 class RegimeResult(BaseModel):
     regime: str
@@ -15,10 +33,23 @@ class RegimeResult(BaseModel):
 
 
 class RegimeDetector:
-    def detect(self, df: pd.DataFrame) -> RegimeResult:
-        close = df["close"]
+    """Classifies bars from 30-bar volatility annualised for their timeframe, 20-bar trend and 14-bar RSI.
+
+    Methods taking a frame infer the bar spacing from its timestamps when ``timeframe`` is not given.
+    """
+
+    def __init__(self) -> None:
+        self._labels: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @metrics.timed("regime.detect")
+    def detect(self, data: OHLCVFrame | pd.DataFrame, timeframe: str | None = None) -> RegimeResult:
+        import pandas as pd
+
+        frame = as_ohlcv(data)
+        close = pd.Series(frame.close, copy=False)
         returns = close.pct_change().dropna()
-        rolling_vol = returns.rolling(30).std().iloc[-1] * np.sqrt(252)
+        rolling_vol = returns.rolling(30).std().iloc[-1] * np.sqrt(periods_per_year(timeframe, frame.timestamp))
 
         trend_strength = abs(close.pct_change(20).iloc[-1])
         mean_reversion = abs(returns.tail(20).mean()) < returns.tail(20).std() * 0.15
@@ -28,40 +59,143 @@ class RegimeDetector:
         rs = gains / losses
         rsi = 100 - (100 / (1 + rs))
 
-        adx_proxy = min(100.0, trend_strength * 1500)
-
-        if rolling_vol > 0.45:
-            regime = "high_volatility"
-        elif rolling_vol < 0.18:
-            regime = "low_volatility"
-        elif adx_proxy > 35 and rsi > 58:
-            regime = "momentum_breakout"
-        elif mean_reversion and 42 <= rsi <= 58:
-            regime = "mean_reversion"
-        elif adx_proxy > 22:
-            regime = "trending"
+        return self._classify(rolling_vol, trend_strength, mean_reversion, rsi)
+
+    @metrics.timed("regime.detect_snapshot")
+    def detect_snapshot(self, snapshot: IndicatorSnapshot, timeframe: str) -> RegimeResult:
+        rolling_vol = snapshot.return_vol * np.sqrt(periods_per_year(timeframe))
+        mean_reversion = abs(snapshot.return_mean) < snapshot.return_std * 0.15
+        return self._classify(rolling_vol, snapshot.trend_strength, mean_reversion, snapshot.rsi)
+
+    @metrics.timed("regime.detect_many")
+    def detect_many(self, closes: np.ndarray, timeframe: str) -> list[RegimeResult]:
+        """Classify every column of an aligned ``bars x assets`` close matrix from its latest bars."""
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.ndim != 2:
+            raise ValueError(f"Expected a 2-D bars x assets array, got shape {closes.shape}")
+        n_bars, n_assets = closes.shape
+        tail = closes[-31:]
+        returns = tail[1:] / tail[:-1] - 1
+        nan = np.full(n_assets, np.nan)
+
+        annualise = np.sqrt(periods_per_year(timeframe))
+        rolling_vol = returns[-30:].std(axis=0, ddof=1) * annualise if len(returns) >= 30 else nan
+        trend_strength = np.abs(closes[-1] / closes[-21] - 1) if n_bars >= 21 else nan
+        recent = returns[-20:]
+        recent_std = recent.std(axis=0, ddof=1) if len(recent) >= 2 else nan
+        mean_reversion = np.abs(recent.mean(axis=0)) < recent_std * 0.15
+        if len(returns) >= 14:
+            window = returns[-14:]
+            gains = np.clip(window, 0, None).mean(axis=0)
+            losses = -np.clip(window, None, 0).mean(axis=0) + 1e-9
+            rsi = 100 - (100 / (1 + gains / losses))
         else:
-            regime = "ranging"
+            rsi = nan
+
+        return self._classify_many(rolling_vol, trend_strength, mean_reversion, rsi)
+
+    @metrics.timed("regime.label_history")
+    def label_history(
+        self, data: OHLCVFrame | pd.DataFrame, key: Hashable | None = None, timeframe: str | None = None
+    ) -> np.ndarray:
+        """Regime of every bar as an index into ``REGIMES``, in one pass with the windows of ``detect``.
+
+        Bars without a full volatility window are ``UNLABELLED``. With ``key`` (e.g. ``(asset, timeframe)``)
+        the read-only label array is cached per key and last bar.
+        """
+        frame = as_ohlcv(data)
+        periods = periods_per_year(timeframe, frame.timestamp)
+        cache_key = None if key is None else (key, frame.last_timestamp, len(frame), periods)
+        if cache_key is not None:
+            with self._lock:
+                cached = self._labels.get(cache_key)
+                if cached is not None:
+                    self._labels.move_to_end(cache_key)
+                    return cached
+
+        close = np.asarray(frame.close, dtype=np.float64)
+        labels = np.full(len(close), UNLABELLED, dtype=np.int8)
+        if len(close) > VOL_WINDOW:
+            # returns[j] is the return into bar j + 1; window w of width k therefore ends at bar w + k.
+            returns = close[1:] / close[:-1] - 1
+            rolling_vol = sliding_window_view(returns, VOL_WINDOW).std(axis=1, ddof=1) * np.sqrt(periods)
+            trend_strength = np.abs(close[VOL_WINDOW:] / close[VOL_WINDOW - TREND_WINDOW : -TREND_WINDOW] - 1)
+            recent = sliding_window_view(returns, TREND_WINDOW)[VOL_WINDOW - TREND_WINDOW :]
+            mean_reversion = np.abs(recent.mean(axis=1)) < recent.std(axis=1, ddof=1) * 0.15
+            window = sliding_window_view(returns, RSI_WINDOW)[VOL_WINDOW - RSI_WINDOW :]
+            gains = np.clip(window, 0, None).mean(axis=1)
+            losses = -np.clip(window, None, 0).mean(axis=1) + 1e-9
+            rsi = 100 - (100 / (1 + gains / losses))
+            labels[VOL_WINDOW:] = self._regime_codes(rolling_vol, trend_strength, mean_reversion, rsi)
+        labels.flags.writeable = False
 
-        confidence = float(np.clip(45 + adx_proxy * 0.7 + (rolling_vol * 40), 0, 100))
+        if cache_key is not None:
+            with self._lock:
+                self._labels[cache_key] = labels
+                while len(self._labels) > settings.regime_label_entries:
+                    self._labels.popitem(last=False)
+        return labels
 
+    def _regime_codes(
+        self, rolling_vol: np.ndarray, trend_strength: np.ndarray, mean_reversion: np.ndarray, rsi: np.ndarray
+    ) -> np.ndarray:
+        adx_proxy = np.fmin(100.0, trend_strength * 1500)
+        return np.select(
+            [
+                rolling_vol > 0.45,
+                rolling_vol < 0.18,
+                (adx_proxy > 35) & (rsi > 58),
+                mean_reversion & (rsi >= 42) & (rsi <= 58),
+                adx_proxy > 22,
+            ],
+            [0, 1, 2, 3, 4],
+            default=REGIMES.index("ranging"),
+        )
+
+    def _classify(self, rolling_vol: float, trend_strength: float, mean_reversion: bool, rsi: float) -> RegimeResult:
+        return self._classify_many(
+            np.array([rolling_vol], dtype=float),
+            np.array([trend_strength], dtype=float),
+            np.array([mean_reversion], dtype=bool),
+            np.array([rsi], dtype=float),
+        )[0]
+
+    def _classify_many(
+        self, rolling_vol: np.ndarray, trend_strength: np.ndarray, mean_reversion: np.ndarray, rsi: np.ndarray
+    ) -> list[RegimeResult]:
+        adx_proxy = np.fmin(100.0, trend_strength * 1500)
+        regimes = np.asarray(REGIMES)[self._regime_codes(rolling_vol, trend_strength, mean_reversion, rsi)]
+
+        confidence = np.clip(45 + adx_proxy * 0.7 + (rolling_vol * 40), 0, 100)
         distribution = {
-            "trending": float(np.clip(adx_proxy / 100, 0, 1)),
-            "ranging": float(np.clip(1 - adx_proxy / 100, 0, 1)),
-            "high_volatility": float(np.clip((rolling_vol - 0.25) * 2, 0, 1)),
-            "low_volatility": float(np.clip((0.25 - rolling_vol) * 2, 0, 1)),
-            "momentum_breakout": float(np.clip((rsi - 50) / 50, 0, 1)),
-            "mean_reversion": float(np.clip((55 - abs(rsi - 50)) / 55, 0, 1)),
+            "trending": np.clip(adx_proxy / 100, 0, 1),
+            "ranging": np.clip(1 - adx_proxy / 100, 0, 1),
+            "high_volatility": np.clip((rolling_vol - 0.25) * 2, 0, 1),
+            "low_volatility": np.clip((0.25 - rolling_vol) * 2, 0, 1),
+            "momentum_breakout": np.clip((rsi - 50) / 50, 0, 1),
+            "mean_reversion": np.clip((55 - np.abs(rsi - 50)) / 55, 0, 1),
         }
+        columns = {name: values.tolist() for name, values in distribution.items()}
 
-        return RegimeResult(
-            regime=regime,
-            confidence=round(confidence, 2),
-            volatility=round(float(rolling_vol), 4),
-            adx_proxy=round(float(adx_proxy), 2),
-            rsi=round(float(rsi), 2),
-            distribution=distribution,
-        )
+        return [
+            RegimeResult(
+                regime=regime,
+                confidence=round(conf, 2),
+                volatility=round(vol, 4),
+                adx_proxy=round(adx, 2),
+                rsi=round(strength, 2),
+                distribution={name: values[i] for name, values in columns.items()},
+            )
+            for i, (regime, conf, vol, adx, strength) in enumerate(
+                zip(
+                    regimes.tolist(),
+                    confidence.tolist(),
+                    rolling_vol.tolist(),
+                    adx_proxy.tolist(),
+                    rsi.tolist(),
+                )
+            )
+        ]
 
 
 regime_detector = RegimeDetector()
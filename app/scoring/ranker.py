@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 from app.backtesting.engine import BacktestResult
 from app.signals.engine import SignalCandidate
+from app.telemetry.metrics import metrics
 
 
 @dataclass(slots=True)
@@ -20,6 +21,7 @@ class RankedSignal:
 
 
 class SignalRanker:
+    @metrics.timed("scoring.rank")
     def rank(
         self,
         regime: str,
@@ -28,6 +30,7 @@ class SignalRanker:
         ranked: list[RankedSignal] = []
         for signal, result in evaluations:
             regime_bonus = 12 if regime in signal.definition.regime_compatibility else -18
+            regime_fit = self.regime_fit(regime, result)
             drawdown_penalty = result.max_drawdown * 90
             overfit_penalty = max(result.parameter_sensitivity - 18, 0)
 
@@ -36,6 +39,7 @@ class SignalRanker:
                 + result.stability_score * 0.2
                 + (result.sharpe + 2) * 12
                 + regime_bonus
+                + regime_fit * 8
                 - drawdown_penalty
                 - overfit_penalty
             )
@@ -54,6 +58,7 @@ class SignalRanker:
                     justification=(
                         f"OOS={result.oos_score:.1f}, stability={result.stability_score:.1f}, "
                         f"regime alignment={'yes' if regime in signal.definition.regime_compatibility else 'no'}, "
+                        f"regime fit={regime_fit:+.2f}, "
                         f"sensitivity={result.parameter_sensitivity:.2f}"
                     ),
                 )
@@ -61,5 +66,24 @@ class SignalRanker:
 
         return sorted(ranked, key=lambda r: r.confidence_score, reverse=True)
 
+    @staticmethod
+    def regime_fit(regime: str, result: BacktestResult) -> float:
+        """How much better the signal did in ``regime`` than in the other regimes, clipped to [-1, 1].
+
+        The gap between its mean bar return in ``regime`` and the average over the other regimes is scaled
+        by the spread of the per-regime means plus the size of the overall mean, so a signal that wins
+        (or loses) about equally everywhere scores near zero. Zero unless the backtest held ``regime`` and
+        at least one other regime for ``settings.regime_min_bars`` bars each.
+        """
+        in_regime = result.regime_performance.get(regime)
+        if in_regime is None or len(result.regime_performance) < 2:
+            return 0.0
+        means = list(result.regime_performance.values())
+        others = (sum(means) - in_regime) / (len(means) - 1)
+        center = sum(means) / len(means)
+        spread = (sum((value - center) ** 2 for value in means) / len(means)) ** 0.5
+        scale = spread + abs(result.expectancy) * 100 + 1e-9
+        return max(-1.0, min(1.0, (in_regime - others) / scale))
+
 
 signal_ranker = SignalRanker()
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
+
+from app.data.models import OHLCVFrame, as_ohlcv
+from app.indicators.engine import IndicatorSnapshot, IndicatorWindows
+from app.telemetry.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass(slots=True)
@@ -14,6 +21,7 @@ class SignalDefinition:
     timeframe_compatibility: list[str]
     regime_compatibility: list[str]
     parameters: dict[str, float]
+    parameter_space: dict[str, list[float]] = field(default_factory=dict)
 
 
 @dataclass(slots=True)
@@ -26,6 +34,59 @@ class SignalCandidate:
     risk_reward: float
 
 
+def _forward_fill(events: np.ndarray) -> np.ndarray:
+    idx = np.where(np.isnan(events), 0, np.arange(len(events)))
+    filled = events[np.maximum.accumulate(idx)]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def ema_crossover_positions(
+    close: np.ndarray, high: np.ndarray, low: np.ndarray, parameters: dict[str, float]
+) -> np.ndarray:
+    import pandas as pd
+
+    prices = pd.Series(close)
+    fast = prices.ewm(span=parameters["fast"]).mean().to_numpy()
+    slow = prices.ewm(span=parameters["slow"]).mean().to_numpy()
+    return np.where(fast > slow, 1.0, -1.0)
+
+
+def bollinger_positions(
+    close: np.ndarray, high: np.ndarray, low: np.ndarray, parameters: dict[str, float]
+) -> np.ndarray:
+    import pandas as pd
+
+    rolling = pd.Series(close).rolling(int(parameters["window"]))
+    ma = rolling.mean().to_numpy()
+    sd = rolling.std().to_numpy()
+    upper = ma + parameters["std"] * sd
+    lower = ma - parameters["std"] * sd
+    above_mid = close > ma
+    crossed_mid = np.zeros(len(close), dtype=bool)
+    crossed_mid[1:] = above_mid[1:] != above_mid[:-1]
+    events = np.select([close < lower, close > upper, crossed_mid], [1.0, -1.0, 0.0], np.nan)
+    return _forward_fill(events)
+
+
+def donchian_positions(
+    close: np.ndarray, high: np.ndarray, low: np.ndarray, parameters: dict[str, float]
+) -> np.ndarray:
+    import pandas as pd
+
+    window = int(parameters["window"])
+    channel_high = pd.Series(high).rolling(window).max().to_numpy()
+    channel_low = pd.Series(low).rolling(window).min().to_numpy()
+    events = np.select([close >= channel_high * 0.995, close <= channel_low * 1.005], [1.0, -1.0], np.nan)
+    return _forward_fill(events)
+
+
+POSITION_RULES = {
+    "trend": ema_crossover_positions,
+    "mean_reversion": bollinger_positions,
+    "breakout": donchian_positions,
+}
+
+
 class SignalEngine:
     def __init__(self) -> None:
         self.definitions = [
@@ -36,6 +97,7 @@ class SignalEngine:
                 timeframe_compatibility=["5m", "1h", "1d"],
                 regime_compatibility=["trending", "momentum_breakout"],
                 parameters={"fast": 20, "slow": 50},
+                parameter_space={"fast": [5, 10, 15, 20, 30, 40], "slow": [30, 50, 75, 100, 150, 200]},
             ),
             SignalDefinition(
                 name="Bollinger Mean Reversion",
@@ -44,6 +106,7 @@ class SignalEngine:
                 timeframe_compatibility=["1m", "5m", "1h"],
                 regime_compatibility=["ranging", "mean_reversion", "low_volatility"],
                 parameters={"window": 20, "std": 2},
+                parameter_space={"window": [10, 15, 20, 30, 40, 60], "std": [1.5, 2, 2.5, 3]},
             ),
             SignalDefinition(
                 name="Donchian Breakout",
@@ -52,16 +115,80 @@ class SignalEngine:
                 timeframe_compatibility=["1h", "1d", "1w"],
                 regime_compatibility=["high_volatility", "momentum_breakout"],
                 parameters={"window": 30},
+                parameter_space={"window": [10, 20, 30, 40, 55, 80, 120]},
             ),
         ]
 
-    def generate(self, df: pd.DataFrame) -> list[SignalCandidate]:
-        close = df["close"]
-        latest = float(close.iloc[-1])
+    @metrics.timed("signals.generate")
+    def generate(self, data: OHLCVFrame | pd.DataFrame) -> list[SignalCandidate]:
+        import pandas as pd
+
+        frame = as_ohlcv(data)
+        close = pd.Series(frame.close, copy=False)
+        trend, reversion, breakout = (definition.parameters for definition in self.definitions)
+        return self._build_candidates(
+            latest=float(close.iloc[-1]),
+            fast=close.ewm(span=trend["fast"]).mean().iloc[-1],
+            slow=close.ewm(span=trend["slow"]).mean().iloc[-1],
+            ma=close.rolling(int(reversion["window"])).mean().iloc[-1],
+            sd=close.rolling(int(reversion["window"])).std().iloc[-1],
+            high=pd.Series(frame.high, copy=False).rolling(int(breakout["window"])).max().iloc[-1],
+            low=pd.Series(frame.low, copy=False).rolling(int(breakout["window"])).min().iloc[-1],
+            band_width=reversion["std"],
+        )
+
+    def indicator_windows(self) -> IndicatorWindows:
+        """Indicator lookbacks matching the current definition parameters, for ``generate_snapshot``."""
+        trend, reversion, breakout = (definition.parameters for definition in self.definitions)
+        return IndicatorWindows(
+            ema_fast=trend["fast"],
+            ema_slow=trend["slow"],
+            band=int(reversion["window"]),
+            channel=int(breakout["window"]),
+        )
+
+    @metrics.timed("signals.generate_snapshot")
+    def generate_snapshot(self, snapshot: IndicatorSnapshot) -> list[SignalCandidate]:
+        """Same candidates as ``generate`` on the snapshot's history; build it with ``indicator_windows``."""
+        if snapshot.windows != self.indicator_windows():
+            raise ValueError(
+                f"Snapshot indicators use {snapshot.windows}, signal parameters need {self.indicator_windows()}"
+            )
+        return self._build_candidates(
+            latest=snapshot.close,
+            fast=snapshot.ema_fast,
+            slow=snapshot.ema_slow,
+            ma=snapshot.close_mean,
+            sd=snapshot.close_std,
+            high=snapshot.high_max,
+            low=snapshot.low_min,
+            band_width=self.definitions[1].parameters["std"],
+        )
+
+    def position_series(
+        self,
+        definition: SignalDefinition,
+        close: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        parameters: dict[str, float] | None = None,
+    ) -> np.ndarray:
+        rule = POSITION_RULES[definition.strategy_type]
+        return rule(close, high, low, parameters or definition.parameters)
+
+    def _build_candidates(
+        self,
+        latest: float,
+        fast: float,
+        slow: float,
+        ma: float,
+        sd: float,
+        high: float,
+        low: float,
+        band_width: float,
+    ) -> list[SignalCandidate]:
         candidates: list[SignalCandidate] = []
 
-        fast = close.ewm(span=20).mean().iloc[-1]
-        slow = close.ewm(span=50).mean().iloc[-1]
         direction = "Long" if fast > slow else "Short"
         stop = latest * (0.985 if direction == "Long" else 1.015)
         tp = latest * (1.03 if direction == "Long" else 0.97)
@@ -69,10 +196,8 @@ class SignalEngine:
             SignalCandidate(self.definitions[0], direction, latest, stop, tp, 2.0)
         )
 
-        ma = close.rolling(20).mean().iloc[-1]
-        sd = close.rolling(20).std().iloc[-1]
-        upper = ma + 2 * sd
-        lower = ma - 2 * sd
+        upper = ma + band_width * sd
+        lower = ma - band_width * sd
         if latest > upper:
             mr_direction = "Short"
         elif latest < lower:
@@ -85,8 +210,6 @@ class SignalEngine:
             SignalCandidate(self.definitions[1], mr_direction, latest, mr_stop, mr_tp, 1.5)
         )
 
-        high = df["high"].rolling(30).max().iloc[-1]
-        low = df["low"].rolling(30).min().iloc[-1]
         bo_direction = "Long" if latest >= high * 0.995 else ("Short" if latest <= low * 1.005 else "Neutral")
         bo_stop = latest * (0.98 if bo_direction == "Long" else 1.02)
         bo_tp = latest * (1.04 if bo_direction == "Long" else 0.96)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import logging
+
+from config import settings
+
+_configured = False
+
+
+def configure_logging() -> None:
+    global _configured
+    if _configured:
+        return
+    settings.log_path.parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        filename=settings.log_path,
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+    _configured = True
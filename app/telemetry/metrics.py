@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, TypeVar
+
+from config import settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+LabelSet = tuple[tuple[str, str], ...]
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+profiling_active: ContextVar[bool] = ContextVar("profiling_active", default=False)
+
+
+class LatencySummary:
+    """Total count/sum plus a bounded window of recent samples for quantile estimates."""
+
+    def __init__(self, window: int) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def quantiles(self, qs: tuple[float, ...] = QUANTILES) -> list[float]:
+        import numpy as np
+
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=float, count=len(self._samples))
+        if samples.size == 0:
+            return [float("nan")] * len(qs)
+        return np.quantile(samples, qs).tolist()
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, LabelSet], LatencySummary] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        summary = self._series.get(key)
+        if summary is None:
+            with self._lock:
+                summary = self._series.setdefault(key, LatencySummary(settings.metrics_window))
+        summary.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        def decorate(fn: F) -> F:
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    with self.timer("research_stage_seconds", stage=stage):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper  # type: ignore[return-value]
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer("research_stage_seconds", stage=stage):
+                    return fn(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            series = sorted(self._series.items())
+        lines: list[str] = []
+        declared: set[str] = set()
+        for (name, labels), summary in series:
+            if name not in declared:
+                lines.append(f"# TYPE {name} summary")
+                declared.add(name)
+            for q, value in zip(QUANTILES, summary.quantiles()):
+                lines.append(f"{name}{_labels(labels + (('quantile', str(q)),))} {value:.6g}")
+            lines.append(f"{name}_sum{_labels(labels)} {summary.total:.6g}")
+            lines.append(f"{name}_count{_labels(labels)} {summary.count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def render_counters(name: str, label: str, values: dict[str, int]) -> str:
+    lines = [f"# TYPE {name} counter"]
+    lines.extend(f"{name}{_labels(((label, key),))} {value}" for key, value in sorted(values.items()))
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
@@ -1,5 +1,7 @@
+const CURVE_POINTS = 120;
+
 async function fetchDashboard() {
-  const resp = await fetch('/api/dashboard?timeframe=1h');
+  const resp = await fetch(`/api/dashboard?timeframe=1h&points=${CURVE_POINTS}&precision=4`);
   return await resp.json();
 }
 
@@ -23,21 +25,45 @@ function renderLogs(logs) {
   `).join('');
 }
 
-function renderCurves(canvasId, series, color) {
+function renderCurves(canvasId, series, color, index) {
   const ctx = document.getElementById(canvasId);
   new Chart(ctx, {
     type: 'line',
     data: {
-      labels: series.map((_, i) => i + 1),
+      labels: index ? index.map((i) => i + 1) : series.map((_, i) => i + 1),
       datasets: [{ data: series, borderColor: color, borderWidth: 1.7, pointRadius: 0 }],
     },
     options: { responsive: true, plugins: { legend: { display: false } }, scales: { x: { display: false } } },
   });
 }
 
+function renderErrors(errors) {
+  return (errors || []).map((e) => `
+    <article class="card">
+      <h2>${e.asset} <small>(${e.timeframe})</small></h2>
+      <p class="danger">Evaluation unavailable: ${e.error}</p>
+    </article>
+  `).join('');
+}
+
+function renderPortfolio(portfolio) {
+  if (!portfolio) return '';
+  const top = portfolio.positions.slice(0, 10)
+    .map((p) => `<li>${p.asset} ${p.direction} ${(p.weight * 100).toFixed(2)}% (risk ${(p.risk_contribution * 100).toFixed(1)}%)</li>`)
+    .join('');
+  return `
+    <article class="card">
+      <h2>Portfolio <small>(${portfolio.assets} assets, ${portfolio.bars} bars)</small></h2>
+      <p>Volatility target: ${portfolio.volatility}% | Gross leverage: ${portfolio.gross_leverage} | Diversification: ${portfolio.diversification_ratio} | Shrinkage: ${portfolio.shrinkage}</p>
+      <p class="danger">Max drawdown: ${portfolio.max_drawdown}% | Expected max drawdown: ${portfolio.expected_max_drawdown}% | Signal drawdown: ${portfolio.signal_expected_drawdown}%</p>
+      <ol>${top}</ol>
+    </article>
+  `;
+}
+
 function renderAssets(data) {
   const dashboard = document.getElementById('dashboard');
-  dashboard.innerHTML = data.assets.map((item, idx) => `
+  dashboard.innerHTML = renderPortfolio(data.portfolio) + renderErrors(data.errors) + data.assets.map((item, idx) => `
     <article class="card">
       <h2>${item.asset} <small>(${item.timeframe})</small></h2>
       <p>Regime: <strong>${item.regime.regime}</strong> (${item.regime.confidence}%)</p>
@@ -63,15 +89,38 @@ function renderAssets(data) {
   `).join('');
 
   data.assets.forEach((item, idx) => {
-    renderCurves(`eq-${idx}`, item.curves.equity, '#4fa3ff');
-    renderCurves(`dd-${idx}`, item.curves.drawdown, '#ff6b6b');
+    renderCurves(`eq-${idx}`, item.curves.equity, '#4fa3ff', item.curves.index);
+    renderCurves(`dd-${idx}`, item.curves.drawdown, '#ff6b6b', item.curves.index);
   });
   renderLogs(data.logs);
 }
 
+let latest = null;
+
+function applyUpdate(update) {
+  const byAsset = new Map(latest.assets.map((item) => [item.asset, item]));
+  update.assets.forEach((item) => byAsset.set(item.asset, item));
+  update.removed.forEach((asset) => byAsset.delete(asset));
+  latest = { ...latest, ...update, assets: [...byAsset.values()] };
+}
+
+function subscribe() {
+  if (!window.EventSource) return;
+  const source = new EventSource(`/api/dashboard/stream?timeframe=1h&points=${CURVE_POINTS}&precision=4`);
+  source.addEventListener('snapshot', (event) => {
+    latest = JSON.parse(event.data);
+    renderAssets(latest);
+  });
+  source.addEventListener('update', (event) => {
+    if (!latest) return;
+    applyUpdate(JSON.parse(event.data));
+    renderAssets(latest);
+  });
+}
+
 async function run() {
-  const data = await fetchDashboard();
-  renderAssets(data);
+  latest = await fetchDashboard();
+  renderAssets(latest);
 }
 
 document.getElementById('refresh-btn').addEventListener('click', run);
@@ -85,3 +134,4 @@ document.getElementById('replay-btn').addEventListener('click', async () => {
 });
 
 run();
+subscribe();
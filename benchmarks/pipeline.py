@@ -0,0 +1,255 @@
+"""Offline benchmarks for the research pipeline hot paths.
+
+Run ``python -m benchmarks.pipeline`` from the repository root. Results are written as JSON and,
+when ``--baseline`` is given, compared against a stored run; any case slower than the baseline by
+more than ``--threshold`` fails the run with exit code 1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from config import settings
+
+DEFAULT_BARS = [700, 10_000, 100_000, 1_000_000]
+DEFAULT_ASSETS = [3, 50, 500]
+QUICK_BARS = [700, 10_000]
+QUICK_ASSETS = [3]
+
+
+def _measure(fn: Callable[[], Any], repeats: int, budget: float) -> dict[str, Any]:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings: list[float] = []
+    started = time.perf_counter()
+    while len(timings) < repeats:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > budget:
+            break
+    return {
+        "wall_time_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": len(timings),
+        "peak_memory_bytes": peak,
+    }
+
+
+class _StageTimer:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+
+    def __call__(self, name: str, fn: Callable[[], Any]) -> Any:
+        t0 = time.perf_counter()
+        value = fn()
+        self.samples.setdefault(name, []).append(time.perf_counter() - t0)
+        return value
+
+    def medians(self) -> dict[str, float]:
+        return {name: statistics.median(values) for name, values in self.samples.items()}
+
+
+def bench_engines(bars: int, repeats: int, budget: float) -> list[dict[str, Any]]:
+    from app.backtesting.engine import backtesting_engine
+    from app.data.providers import SyntheticProvider
+    from app.regime.detector import regime_detector
+    from app.scoring.ranker import signal_ranker
+    from app.signals.engine import signal_engine
+
+    provider = SyntheticProvider()
+    fetch = lambda: asyncio.run(provider.fetch_ohlcv("BENCH", settings.default_timeframe, bars))
+    df = fetch()
+    candidates = signal_engine.generate(df)
+    size = {"bars": bars}
+
+    results = [
+        {"name": "provider.fetch_ohlcv", "size": size, **_measure(fetch, repeats, budget)},
+        {"name": "regime.detect", "size": size, **_measure(lambda: regime_detector.detect(df), repeats, budget)},
+        {
+            "name": "regime.label_history",
+            "size": size,
+            **_measure(lambda: regime_detector.label_history(df), repeats, budget),
+        },
+        {"name": "signals.generate", "size": size, **_measure(lambda: signal_engine.generate(df), repeats, budget)},
+        {
+            "name": "backtesting.run",
+            "size": size,
+            **_measure(lambda: backtesting_engine.run(df, candidates[0]), repeats, budget),
+        },
+        {
+            "name": "backtesting.run_many",
+            "size": {**size, "signals": len(candidates)},
+            **_measure(lambda: backtesting_engine.run_many(df, candidates), repeats, budget),
+        },
+    ]
+
+    timer = _StageTimer()
+    for _ in range(max(1, min(repeats, 3))):
+        frame = timer("fetch", fetch)
+        detected = timer("detect", lambda: regime_detector.detect(frame))
+        generated = timer("generate", lambda: signal_engine.generate(frame))
+        backtests = timer("backtest", lambda: backtesting_engine.run_many(frame, generated))
+        timer("rank", lambda: signal_ranker.rank(detected.regime, list(zip(generated, backtests))))
+    stages = timer.medians()
+    results.append(
+        {"name": "pipeline.single_asset", "size": size, "wall_time_s": sum(stages.values()), "stages": stages}
+    )
+    return results
+
+
+def bench_dashboard(assets: int, repeats: int, budget: float) -> list[dict[str, Any]]:
+    from app.data.providers import market_data_service
+    from app.features.research_service import research_service
+    from app.indicators.engine import indicator_engine
+
+    universe = [f"SYN{i:04d}" for i in range(assets)]
+    run = lambda: asyncio.run(research_service.dashboard(universe, settings.default_timeframe))
+
+    def cold() -> None:
+        market_data_service.memory_cache.clear()
+        shutil.rmtree(settings.cache_path, ignore_errors=True)
+        indicator_engine.clear()
+        research_service.memo.invalidate()
+        run()
+
+    size = {"assets": assets}
+    return [
+        {"name": "dashboard.cold", "size": size, **_measure(cold, repeats, budget)},
+        {"name": "dashboard.warm", "size": size, **_measure(run, repeats, budget)},
+    ]
+
+
+def bench_universe(assets: int, repeats: int, budget: float) -> list[dict[str, Any]]:
+    import numpy as np
+
+    from app.regime.detector import regime_detector
+
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.01, (1000, assets)), axis=0))
+    return [
+        {
+            "name": "regime.detect_many",
+            "size": {"assets": assets, "bars": len(closes)},
+            **_measure(lambda: regime_detector.detect_many(closes, settings.default_timeframe), repeats, budget),
+        }
+    ]
+
+
+def bench_serialization(assets: int, repeats: int, budget: float) -> list[dict[str, Any]]:
+    import numpy as np
+
+    from app.api.serialization import CURVES, CurveOptions, dumps
+
+    rng = np.random.default_rng(0)
+    curves = np.cumsum(rng.normal(0.0, 0.01, (3, assets, 250)), axis=2)
+    payload = {
+        "assets": [
+            {"asset": f"SYN{i:04d}", "curves": dict(zip(CURVES, curves[:, i].tolist()))} for i in range(assets)
+        ]
+    }
+    size = {"assets": assets}
+    cases = {
+        "list": CurveOptions(),
+        "lttb100": CurveOptions(points=100, precision=4),
+        "f32": CurveOptions(format="f32"),
+    }
+    return [
+        {"name": f"serialize.{name}", "size": size, **_measure(lambda: dumps(payload, options), repeats, budget)}
+        for name, options in cases.items()
+    ]
+
+
+def _key(result: dict[str, Any]) -> str:
+    size = ",".join(f"{k}={v}" for k, v in sorted(result["size"].items()))
+    return f"{result['name']}[{size}]"
+
+
+def compare(current: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float) -> list[str]:
+    reference = {_key(result): result for result in baseline}
+    regressions: list[str] = []
+    for result in current:
+        before = reference.get(_key(result))
+        if before is None:
+            continue
+        ratio = result["wall_time_s"] / max(before["wall_time_s"], 1e-12)
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{_key(result):<55} {before['wall_time_s']:>10.4f}s -> {result['wall_time_s']:>10.4f}s  x{ratio:5.2f}  {status}")
+        if status != "ok":
+            regressions.append(_key(result))
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, nargs="*", help=f"history sizes (default {DEFAULT_BARS})")
+    parser.add_argument("--assets", type=int, nargs="*", help=f"dashboard universe sizes (default {DEFAULT_ASSETS})")
+    parser.add_argument("--quick", action="store_true", help=f"use {QUICK_BARS} bars and {QUICK_ASSETS} assets")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=10.0, help="max seconds of timed repeats per case")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio, e.g. 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    bars = args.bars or (QUICK_BARS if args.quick else DEFAULT_BARS)
+    assets = args.assets or (QUICK_ASSETS if args.quick else DEFAULT_ASSETS)
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    settings.database_path = workdir / "bench.db"
+    settings.cache_path = workdir / "cache"
+
+    results: list[dict[str, Any]] = []
+    try:
+        for size in bars:
+            print(f"engines @ {size} bars", file=sys.stderr)
+            results.extend(bench_engines(size, args.repeats, args.budget))
+        for size in assets:
+            print(f"dashboard @ {size} assets", file=sys.stderr)
+            results.extend(bench_universe(size, args.repeats, args.budget))
+            results.extend(bench_dashboard(size, args.repeats, args.budget))
+            results.extend(bench_serialization(size, args.repeats, args.budget))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import numpy
+    import pandas
+
+    payload = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(payload, indent=2))
+    print(f"wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""Import-time budget check for entry points that short-lived processes load.
+
+Run ``python -m benchmarks.startup`` from the repository root; ``tests/test_startup.py`` enforces the
+same budgets under pytest. Each target is imported in a fresh interpreter under ``python -X importtime``;
+a target fails when it exceeds its budget or pulls in a module it must load lazily (pandas, NumPy, the
+research engines).
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+
+TARGETS: dict[str, dict[str, Any]] = {
+    "app.api.server": {
+        "budget_ms": 1500.0,
+        "forbid": (
+            "pandas",
+            "numpy",
+            "jinja2",
+            "httpx",
+            "app.features.research_service",
+            "app.data.providers",
+        ),
+    },
+    "app.cli": {
+        "budget_ms": 500.0,
+        "forbid": ("pandas", "numpy", "fastapi", "app.features.research_service"),
+    },
+    "app.container": {
+        "budget_ms": 150.0,
+        "forbid": ("pandas", "numpy", "fastapi", "app.data.database"),
+    },
+}
+
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """Return the cumulative import time of ``module`` in ms and the self time of every module loaded."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    self_ms: dict[str, float] = {}
+    total_ms = 0.0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        self_ms[name] = int(own) / 1000
+        if name == module:
+            total_ms = int(cumulative) / 1000
+    return total_ms, self_ms
+
+
+def check(module: str, repeats: int = 3, scale: float = 1.0) -> tuple[float, float, list[str], dict[str, float]]:
+    """Median import time, scaled budget, eagerly imported forbidden modules and per-module self times."""
+    config = TARGETS.get(module, {"budget_ms": float("inf"), "forbid": ()})
+    runs = [measure(module) for _ in range(repeats)]
+    total = statistics.median(total for total, _ in runs)
+    loaded = runs[-1][1]
+    forbidden = sorted(
+        name for name in loaded if any(name == f or name.startswith(f + ".") for f in config["forbid"])
+    )
+    return total, config["budget_ms"] * scale, forbidden, loaded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=list(TARGETS), help=f"modules (default {list(TARGETS)})")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh interpreters per target; the median is used")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. 2 on slow CI hosts")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list per target")
+    args = parser.parse_args(argv)
+
+    failures: list[str] = []
+    for module in args.targets:
+        total, budget, forbidden, loaded = check(module, args.repeats, args.scale)
+        status = "ok" if total <= budget and not forbidden else "FAIL"
+        print(f"{module:<30} {total:9.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for name, own in sorted(loaded.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"    {own:9.1f} ms  {name}")
+        if forbidden:
+            print(f"    eagerly imports {', '.join(forbidden[:10])}")
+        if status != "ok":
+            failures.append(module)
+
+    if failures:
+        print(f"{len(failures)} target(s) over budget: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
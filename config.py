@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 from pydantic import BaseModel, Field
 
@@ -11,6 +12,49 @@ class Settings(BaseModel):
     database_path: Path = Path("app/data/market_research.db")
     cache_path: Path = Path("app/data/cache")
     log_path: Path = Path("app/data/platform.log")
+    cache_max_entries: int = 256
+    cache_max_bars: int = 5000
+    base_timeframe: str | None = "1h"
+    base_max_bars: int = 125_000
+    derived_timeframes: list[str] = Field(default_factory=lambda: ["1d"])
+    signal_log_batch_size: int = 100
+    signal_log_flush_interval: float = 1.0
+    signal_log_max_pending: int = 10_000
+    evaluation_memo_entries: int = 512
+    regime_label_entries: int = 256
+    regime_min_bars: int = 20
+
+    metrics_window: int = 2048
+    curve_precision: int = 6
+    response_cache_entries: int = 32
+    profile_top_n: int = 40
+
+    provider_routes: dict[str, str] = Field(
+        default_factory=lambda: {
+            "crypto": "synthetic",
+            "forex": "synthetic",
+            "futures": "synthetic",
+            "equity": "synthetic",
+            "default": "synthetic",
+        }
+    )
+    csv_data_path: Path = Path("app/data/csv")
+    http_feed_url: str | None = None
+    http_timeout: float = 10.0
+    http_max_connections: int = 32
+    http_rate_per_second: float = 10.0
+    http_burst: float = 20.0
+    http_retries: int = 3
+    http_backoff_base: float = 0.25
+    http_backoff_max: float = 4.0
+    http_batch_size: int = 50
+    http_batch_window: float = 0.005
+    simulator_seed: str = "robot"
+    simulator_anchor: datetime = datetime(2020, 1, 1)
+    simulator_factor_vols: list[float] = Field(default_factory=lambda: [0.22, 0.1, 0.06])
+    simulator_stress_share: float = 0.15
+    simulator_stress_persistence: float = 0.8
+    simulator_stress_multiplier: float = 1.8
 
     default_assets: list[str] = Field(default_factory=lambda: ["BTCUSDT", "EURUSD", "ES1!"])
     default_timeframe: str = "1h"
@@ -18,5 +62,42 @@ class Settings(BaseModel):
     transaction_cost_bps: float = 2.5
     slippage_bps: float = 1.5
 
+    dashboard_concurrency: int = 8
+    portfolio_window_bars: int = 500
+    portfolio_min_bars: int = 60
+    portfolio_halflife_bars: float = 60.0
+    portfolio_vol_target: float = 0.10
+    portfolio_max_leverage: float = 2.0
+    compute_workers: int = 4
+
+    monte_carlo_paths: int = 100
+    monte_carlo_block_length: int = 10
+    monte_carlo_seed: int = 7
+    monte_carlo_confidence: float = 0.9
+    monte_carlo_chunk_elements: int = 4_000_000
+
+    walk_forward_train_bars: int = 500
+    walk_forward_test_bars: int = 100
+    optimizer_max_combinations: int = 2000
+    optimizer_workers: int = 4
+    optimizer_chunk_size: int = 64
+    optimizer_seed: int = 11
+
+    replay_window_bars: int = 700
+    replay_max_bars: int = 20_000
+    replay_chunk_steps: int = 500
+
+    stream_queue_size: int = 16
+    stream_heartbeat_seconds: float = 15.0
+    scheduler_settle_seconds: float = 1.0
+    scheduler_idle_bars: int = 2
+
+    universe_path: Path = Path("app/data/universes")
+    screen_concurrency: int = 32
+    screen_max_assets: int = 5000
+
+    research_workers: int = 4
+    research_chunk_size: int = 25
+
 
 settings = Settings()
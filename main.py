@@ -1,10 +1,9 @@
 from __future__ import annotations
 
+import sys
 import threading
 import webbrowser
 
-import uvicorn
-
 from config import settings
 
 
@@ -12,7 +11,15 @@ def _open_browser() -> None:
     webbrowser.open(f"http://{settings.host}:{settings.port}")
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["research"]:
+        from app.cli import main as research
+
+        raise SystemExit(research(argv[1:]))
+
+    import uvicorn
+
     if settings.auto_open_browser:
         threading.Timer(1.2, _open_browser).start()
     uvicorn.run("app.api.server:app", host=settings.host, port=settings.port, reload=False)
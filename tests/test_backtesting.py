@@ -0,0 +1,93 @@
+"""Vectorized backtests agree with their one-signal and one-window counterparts."""
+from __future__ import annotations
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from config import settings
+from app.backtesting.engine import backtesting_engine
+from app.data.models import OHLCVFrame
+from app.regime.detector import REGIMES, regime_detector
+from app.signals.engine import signal_engine
+
+HOUR_NS = 3_600 * 1_000_000_000
+
+
+@pytest.fixture(scope="module")
+def frame() -> OHLCVFrame:
+    rng = np.random.default_rng(7)
+    bars = 900
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, bars) + 0.0004 * np.sin(np.arange(bars) / 40)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.004, bars)) * close
+    return OHLCVFrame.from_arrays(
+        timestamp=1_700_000_000 * 1_000_000_000 // HOUR_NS * HOUR_NS + np.arange(bars, dtype=np.int64) * HOUR_NS,
+        open=open_,
+        high=np.maximum(open_, close) + spread,
+        low=np.minimum(open_, close) - spread,
+        close=close,
+        volume=rng.uniform(1, 10, bars),
+    )
+
+
+def test_run_many_matches_run_per_signal(frame: OHLCVFrame) -> None:
+    candidates = signal_engine.generate(frame)
+    together = backtesting_engine.run_many(frame, candidates, timeframe="1h")
+    for candidate, result in zip(candidates, together):
+        alone = backtesting_engine.run(frame, candidate, timeframe="1h")
+        for field in dataclasses.fields(result):
+            expected, actual = getattr(alone, field.name), getattr(result, field.name)
+            if isinstance(expected, dict):
+                assert actual.keys() == expected.keys()
+                np.testing.assert_allclose(list(actual.values()), list(expected.values()), rtol=1e-9, atol=1e-12)
+            else:
+                # Rolling Sharpe comes from cumulative sums, so values near zero carry ~1e-8 of rounding.
+                np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6, err_msg=field.name)
+
+
+def test_run_windows_matches_per_window_backtests(frame: OHLCVFrame) -> None:
+    candidates = signal_engine.generate(frame)
+    strat_returns = backtesting_engine.strategy_returns(frame, candidates)
+    labels = regime_detector.label_history(frame, timeframe="1h")
+    periods = 365 * 24
+    window = 300
+    ends = np.array([window - 1, 450, 620, len(frame) - 1])
+    windowed = backtesting_engine.run_windows(strat_returns, ends, window, periods, labels)
+
+    compared = (
+        "cagr", "sharpe", "sortino", "calmar", "max_drawdown", "profit_factor",
+        "expectancy", "risk_of_ruin", "win_rate", "oos_score", "stability_score",
+    )
+    for end, row in zip(ends.tolist(), windowed):
+        lo, stop = end - window + 1, end + 1
+        full = backtesting_engine.run_returns(strat_returns[lo:stop], labels[lo:stop], periods)
+        # Bar t's return is credited to the regime labelled at close t - 1, including the window's first bar.
+        held = labels[lo - 1 : end] if lo else np.concatenate(([-1], labels[:end]))
+        for series, (result, reference) in enumerate(zip(row, full)):
+            for name in compared:
+                np.testing.assert_allclose(
+                    getattr(result, name), getattr(reference, name), rtol=1e-7, atol=1e-10, err_msg=name
+                )
+            for k, regime in enumerate(REGIMES):
+                mask = held == k
+                assert (regime in result.regime_performance) == (mask.sum() >= settings.regime_min_bars)
+                if regime in result.regime_performance:
+                    expected = strat_returns[lo:stop, series][mask].mean() * 100
+                    assert result.regime_performance[regime] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+def test_windowed_sensitivity_is_the_iid_bootstrap_dispersion(
+    frame: OHLCVFrame, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "monte_carlo_block_length", 1)
+    monkeypatch.setattr(settings, "monte_carlo_paths", 4000)
+    candidates = signal_engine.generate(frame)
+    strat_returns = backtesting_engine.strategy_returns(frame, candidates)
+    labels = regime_detector.label_history(frame, timeframe="1h")
+    window, end = 400, len(frame) - 1
+    windowed = backtesting_engine.run_windows(strat_returns, np.array([end]), window, 365 * 24, labels)[0]
+    full = backtesting_engine.run_returns(strat_returns[end - window + 1 :], labels[end - window + 1 :], 365 * 24)
+    for result, reference in zip(windowed, full):
+        assert result.parameter_sensitivity == pytest.approx(reference.parameter_sensitivity, rel=0.05)
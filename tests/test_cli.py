@@ -0,0 +1,50 @@
+"""A batch run interrupted between writing output and checkpointing resumes without duplicate rows."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app import cli
+
+ASSETS = ["A", "B", "C", "D", "E"]
+
+
+async def _echo_asset(asset: str, options: dict[str, Any]) -> cli.Outcome:
+    return cli.Outcome(asset=asset, lines=[json.dumps({"asset": asset, "row": row}) for row in range(2)])
+
+
+@pytest.fixture
+def echo_job(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(cli.HANDLERS, "echo", _echo_asset)
+
+
+def _execute(tmp_path: Path) -> dict[str, int]:
+    return cli.execute(
+        "echo", ASSETS, {}, tmp_path / "out.ndjson", tmp_path / "out.checkpoint", workers=1, chunk_size=2
+    )
+
+
+def test_resume_after_crash_before_checkpoint(
+    tmp_path: Path, echo_job: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    record = cli.Checkpoint.record
+
+    def crash_on_second_chunk(self: cli.Checkpoint, outcomes: list[cli.Outcome], *args: object) -> None:
+        if any(outcome.asset == "C" for outcome in outcomes):
+            raise KeyboardInterrupt
+        record(self, outcomes, *args)
+
+    monkeypatch.setattr(cli.Checkpoint, "record", crash_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        _execute(tmp_path)
+    monkeypatch.setattr(cli.Checkpoint, "record", record)
+
+    summary = _execute(tmp_path)
+    assert summary["skipped"] == 2 and summary["ok"] == 3
+    rows = [json.loads(line) for line in (tmp_path / "out.ndjson").read_text().splitlines()]
+    assert [(row["asset"], row["row"]) for row in rows] == [(asset, row) for asset in ASSETS for row in range(2)]
+    assert _execute(tmp_path)["skipped"] == len(ASSETS)
+    assert len((tmp_path / "out.ndjson").read_text().splitlines()) == 2 * len(ASSETS)
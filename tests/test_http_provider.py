@@ -0,0 +1,47 @@
+"""A malformed entry in a batched feed response fails only its own request."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.data.providers import HttpProvider
+
+
+class FakePool:
+    def __init__(self, payload: object) -> None:
+        self.payload = payload
+
+    async def get_json(self, url: str, params: dict[str, str]) -> object:
+        return self.payload
+
+
+def _columns(bars: int) -> dict[str, list[float]]:
+    return {
+        "timestamp": [3_600_000 * i for i in range(bars)],
+        **{name: [1.0] * bars for name in ("open", "high", "low", "close", "volume")},
+    }
+
+
+async def _fetch_all(payload: object, assets: list[str]) -> list[object]:
+    provider = HttpProvider("http://feed.test", pool=FakePool(payload))
+    calls = [provider.fetch_ohlcv(asset, "1h", 10) for asset in assets]
+    return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=5)
+
+
+def test_malformed_entries_fail_individually() -> None:
+    ragged = _columns(3)
+    ragged["close"] = [1.0]
+    payload = {"GOOD": _columns(3), "MISSING": {"timestamp": [0]}, "RAGGED": ragged, "SCALAR": 5}
+    good, missing, ragged_result, scalar, absent = asyncio.run(
+        _fetch_all(payload, ["GOOD", "MISSING", "RAGGED", "SCALAR", "ABSENT"])
+    )
+    assert len(good) == 3
+    for result in (missing, ragged_result, scalar, absent):
+        assert isinstance(result, ValueError)
+
+
+@pytest.mark.parametrize("payload", [[1, 2], "oops", None])
+def test_non_object_body_fails_the_batch(payload: object) -> None:
+    results = asyncio.run(_fetch_all(payload, ["A", "B"]))
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,99 @@
+"""Streaming indicators match the pandas formulas they replace, bar by bar."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.models import OHLCVFrame
+from app.indicators.engine import (
+    EMA,
+    RSI,
+    IndicatorEngine,
+    IndicatorState,
+    IndicatorWindows,
+    RollingExtreme,
+    RollingMeanVar,
+    feed,
+)
+
+HOUR_NS = 3_600 * 1_000_000_000
+
+
+@pytest.fixture(scope="module")
+def prices() -> pd.Series:
+    rng = np.random.default_rng(5)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400))))
+
+
+def _stream(indicator: object, values: pd.Series, read: str = "value") -> np.ndarray:
+    out = []
+    for value in values.tolist():
+        indicator.update(value)
+        out.append(getattr(indicator, read))
+    return np.array(out)
+
+
+def _frame(close: np.ndarray, start: int = 0) -> OHLCVFrame:
+    return OHLCVFrame.from_arrays(
+        timestamp=(start + np.arange(len(close), dtype=np.int64)) * HOUR_NS,
+        open=close,
+        high=close * 1.002,
+        low=close * 0.998,
+        close=close,
+        volume=np.ones(len(close)),
+    )
+
+
+@pytest.mark.parametrize("span", [5, 20, 50])
+def test_ema_matches_ewm(prices: pd.Series, span: int) -> None:
+    expected = prices.ewm(span=span).mean().to_numpy()
+    np.testing.assert_allclose(_stream(EMA(span), prices), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("window", [2, 20, 30])
+def test_rolling_mean_var_matches_rolling(prices: pd.Series, window: int) -> None:
+    rolling = prices.rolling(window)
+    np.testing.assert_allclose(_stream(RollingMeanVar(window), prices, "mean"), rolling.mean(), rtol=1e-9)
+    # Welford removal loses a few ulps of the price level when the window's spread is tiny.
+    np.testing.assert_allclose(_stream(RollingMeanVar(window), prices, "std"), rolling.std(), rtol=1e-7, atol=1e-6)
+
+
+def test_rsi_matches_rolling_and_wilder_formulas(prices: pd.Series) -> None:
+    changes = prices.pct_change().dropna().reset_index(drop=True)
+    gains, losses = changes.clip(lower=0), -changes.clip(upper=0)
+
+    plain = 100 - 100 / (1 + gains.rolling(14).mean() / (losses.rolling(14).mean() + 1e-9))
+    np.testing.assert_allclose(_stream(RSI(14), changes), plain, rtol=1e-9)
+
+    def wilder(values: pd.Series) -> pd.Series:
+        seeded = pd.concat([pd.Series([values.iloc[:14].mean()]), values.iloc[14:]], ignore_index=True)
+        smoothed = seeded.ewm(alpha=1 / 14, adjust=False).mean()
+        return pd.concat([pd.Series([np.nan] * 13), smoothed], ignore_index=True)
+
+    expected = 100 - 100 / (1 + wilder(gains) / (wilder(losses) + 1e-9))
+    np.testing.assert_allclose(_stream(RSI(14, wilder=True), changes), expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("mode", ["max", "min"])
+def test_rolling_extreme_matches_rolling(prices: pd.Series, mode: str) -> None:
+    expected = getattr(prices.rolling(30), mode)().to_numpy()
+    np.testing.assert_array_equal(_stream(RollingExtreme(30, mode), prices), expected)
+
+
+def test_engine_extends_overlapping_frames_and_resets_on_gaps(prices: pd.Series) -> None:
+    close = prices.to_numpy()
+    engine = IndicatorEngine()
+    windows = IndicatorWindows()
+
+    def fresh(frame: OHLCVFrame) -> object:
+        state = IndicatorState(windows)
+        feed(state, frame)
+        return state.snapshot()
+
+    engine.update("X", "1h", _frame(close[:200]), windows)
+    extended = engine.update("X", "1h", _frame(close[100:300], start=100), windows)
+    assert extended == fresh(_frame(close[:300]))
+
+    detached = _frame(close[300:], start=1_000)
+    assert engine.update("X", "1h", detached, windows) == fresh(detached)
@@ -0,0 +1,109 @@
+"""Derived timeframes: resample parity with directly generated bars and separate cache entries per source."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from config import settings
+from app.data.cache import DiskCache
+from app.data.models import COLUMNS, OHLCVFrame
+from app.data.providers import UnifiedMarketDataService
+from app.data.simulator import market_simulator
+
+DAY_NS = 86_400 * 1_000_000_000
+
+
+@pytest.fixture
+def service(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> UnifiedMarketDataService:
+    monkeypatch.setattr(settings, "cache_path", tmp_path)
+    monkeypatch.setattr(settings, "base_timeframe", "1h")
+    monkeypatch.setattr(settings, "derived_timeframes", ["1d"])
+    return UnifiedMarketDataService()
+
+
+def _assert_same_bars(left: OHLCVFrame, right: OHLCVFrame) -> None:
+    np.testing.assert_array_equal(left.timestamp, right.timestamp)
+    for name in COLUMNS[1:]:
+        np.testing.assert_allclose(getattr(left, name), getattr(right, name), rtol=1e-12)
+
+
+def test_resample_aggregates_epoch_aligned_buckets() -> None:
+    frame = OHLCVFrame.from_arrays(
+        timestamp=np.arange(10, dtype=np.int64) * 10,
+        open=np.arange(10.0),
+        high=np.arange(10.0) + 1,
+        low=np.arange(10.0) - 1,
+        close=np.arange(10.0) + 0.5,
+        volume=np.ones(10),
+    )
+    buckets = frame.resample(40)
+    np.testing.assert_array_equal(buckets.timestamp, [0, 40, 80])
+    np.testing.assert_array_equal(buckets.open, [0, 4, 8])
+    np.testing.assert_array_equal(buckets.high, [4, 8, 10])
+    np.testing.assert_array_equal(buckets.low, [-1, 3, 7])
+    np.testing.assert_array_equal(buckets.close, [3.5, 7.5, 9.5])
+    np.testing.assert_array_equal(buckets.volume, [4, 4, 2])
+
+
+def test_derived_daily_bars_match_direct_daily_bars(service: UnifiedMarketDataService) -> None:
+    derived = asyncio.run(service.get_history("BTCUSDT", "1d", 200))
+    assert len(derived) == 200
+    assert service.cache_stats["resample_builds"] == 1
+
+    direct = market_simulator.history("BTCUSDT", "1d", 202)
+    complete = direct.until(derived.last_timestamp).tail(200)
+    _assert_same_bars(derived, complete)
+
+    hourly = market_simulator.history("BTCUSDT", "1h", 201 * 24)
+    manual = hourly.resample(DAY_NS)
+    manual = manual[1:] if hourly.timestamp[0] % DAY_NS else manual
+    _assert_same_bars(derived, manual.until(derived.last_timestamp).tail(200))
+
+
+def test_source_depends_on_timeframe_only(service: UnifiedMarketDataService) -> None:
+    assert service.base_timeframe_for("1d") == "1h"
+    assert service.base_timeframe_for("1w") is None
+    assert service.base_timeframe_for("1h") is None
+
+    async def run() -> tuple[OHLCVFrame, OHLCVFrame]:
+        return await service.get_history("BTCUSDT", "1d", 50), await service.get_history("BTCUSDT", "1d", 3000)
+
+    shallow, deep = asyncio.run(run())
+    assert service.cache_stats["resample_builds"] == 2
+    assert service.memory_cache.get(("BTCUSDT", "1d", None)) is None
+    _assert_same_bars(shallow, deep.tail(50))
+
+    with pytest.raises(ValueError, match="base_max_bars"):
+        asyncio.run(service.get_history("BTCUSDT", "1d", settings.base_max_bars))
+
+
+def test_base_and_derived_series_are_cached_apart(
+    service: UnifiedMarketDataService, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    derived = asyncio.run(service.get_history("BTCUSDT", "1d", 100))
+    assert service.memory_cache.get(("BTCUSDT", "1d", "1h")) is not None
+    assert service.resampled.get(("BTCUSDT", "1d", "1h")) is not None
+    assert service.memory_cache.get(("BTCUSDT", "1d", None)) is None
+    assert not (tmp_path / "1d").exists()
+    assert (tmp_path / "1h").exists()
+
+    monkeypatch.setattr(settings, "derived_timeframes", [])
+    direct = asyncio.run(service.get_history("BTCUSDT", "1d", 100))
+    assert service.memory_cache.get(("BTCUSDT", "1d", None)) is not None
+    assert (tmp_path / "1d").exists()
+    assert service.cache_stats["resample_builds"] == 1
+    overlap = direct.until(derived.last_timestamp)
+    _assert_same_bars(derived.tail(len(overlap)), overlap)
+
+
+def test_disk_cache_keeps_sanitised_collisions_apart(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path)
+    frames = {}
+    for offset, asset in enumerate(["ES1!", "ES1?", "BTC/USD", "BTC_USD"]):
+        frames[asset] = OHLCVFrame.from_arrays(**{name: np.arange(3) + offset for name in COLUMNS})
+        cache.save(asset, "1h", frames[asset])
+    for asset, frame in frames.items():
+        _assert_same_bars(cache.load(asset, "1h"), frame)
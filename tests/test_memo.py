@@ -0,0 +1,52 @@
+"""Results computed before an invalidation are never cached afterwards."""
+from __future__ import annotations
+
+import asyncio
+
+from app.features.memo import SingleFlightMemo
+
+
+def test_invalidated_computation_is_not_stored() -> None:
+    async def run() -> tuple[dict[str, object], dict[str, object]]:
+        memo = SingleFlightMemo(8)
+        release = asyncio.Event()
+        calls = 0
+
+        async def compute() -> dict[str, object]:
+            nonlocal calls
+            calls += 1
+            generation = calls
+            if generation == 1:
+                await release.wait()
+            return {"generation": generation}
+
+        stale = asyncio.ensure_future(memo.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        memo.invalidate()
+        release.set()
+        first = await stale
+        return first, await memo.get_or_compute("key", compute)
+
+    first, second = asyncio.run(run())
+    assert first == {"generation": 1}
+    assert second == {"generation": 2}
+
+
+def test_concurrent_callers_share_one_computation() -> None:
+    async def run() -> tuple[list[dict[str, object]], int]:
+        memo = SingleFlightMemo(8)
+        calls = 0
+
+        async def compute() -> dict[str, object]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(*(memo.get_or_compute("key", compute) for _ in range(5)))
+        results.append(await memo.get_or_compute("key", compute))
+        return results, calls
+
+    results, calls = asyncio.run(run())
+    assert calls == 1
+    assert all(result == {"value": 1} for result in results)
@@ -0,0 +1,61 @@
+"""Regime fit rewards a signal for the regimes it does better in, not for winning everywhere."""
+from __future__ import annotations
+
+from app.backtesting.engine import BacktestResult
+from app.scoring.ranker import signal_ranker
+from app.signals.engine import SignalCandidate, signal_engine
+
+
+def _result(regime_performance: dict[str, float]) -> BacktestResult:
+    expectancy = sum(regime_performance.values()) / len(regime_performance) / 100
+    return BacktestResult(
+        cagr=0.1,
+        sharpe=0.5,
+        sortino=0.6,
+        calmar=0.4,
+        max_drawdown=0.1,
+        profit_factor=1.2,
+        expectancy=expectancy,
+        risk_of_ruin=0.2,
+        win_rate=0.5,
+        equity_curve=[],
+        drawdown_curve=[],
+        rolling_sharpe=[],
+        regime_performance=regime_performance,
+        oos_score=55.0,
+        stability_score=50.0,
+        parameter_sensitivity=5.0,
+        sharpe_ci=(0.0, 1.0),
+        max_drawdown_ci=(0.05, 0.2),
+    )
+
+
+SPECIALIST = _result({"trending": 0.08, "ranging": -0.02, "high_volatility": -0.03, "mean_reversion": -0.01})
+GENERALIST = _result({"trending": 0.02, "ranging": 0.02, "high_volatility": 0.02, "mean_reversion": 0.02})
+LOSER = _result({"trending": -0.03, "ranging": -0.03, "high_volatility": -0.03, "mean_reversion": -0.03})
+
+
+def test_regime_fit_compares_regimes() -> None:
+    assert signal_ranker.regime_fit("trending", SPECIALIST) > 0.5
+    for regime in ("ranging", "high_volatility", "mean_reversion"):
+        assert signal_ranker.regime_fit(regime, SPECIALIST) < 0
+    for result in (GENERALIST, LOSER):
+        for regime in result.regime_performance:
+            assert abs(signal_ranker.regime_fit(regime, result)) < 1e-6
+
+
+def test_regime_fit_needs_two_regimes() -> None:
+    assert signal_ranker.regime_fit("trending", _result({"trending": 0.08})) == 0.0
+    assert signal_ranker.regime_fit("low_volatility", SPECIALIST) == 0.0
+
+
+def test_specialist_ranks_first_only_in_its_regime() -> None:
+    definition = signal_engine.definitions[0]
+    specialist = SignalCandidate(definition, "Long", 100.0, 98.5, 103.0, 2.0)
+    generalist = SignalCandidate(definition, "Short", 100.0, 101.5, 97.0, 2.0)
+    evaluations = [(specialist, SPECIALIST), (generalist, GENERALIST)]
+
+    in_trend = signal_ranker.rank("trending", evaluations)
+    in_range = signal_ranker.rank("ranging", evaluations)
+    assert in_trend[0].direction == "Long"
+    assert in_range[0].direction == "Short"
@@ -0,0 +1,58 @@
+"""Batched regime detection agrees with per-asset detection."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.data.models import OHLCVFrame
+from app.regime.detector import regime_detector
+
+HOUR_NS = 3_600 * 1_000_000_000
+
+
+def _frame(close: np.ndarray) -> OHLCVFrame:
+    return OHLCVFrame.from_arrays(
+        timestamp=np.arange(len(close), dtype=np.int64) * HOUR_NS,
+        open=close,
+        high=close * 1.001,
+        low=close * 0.999,
+        close=close,
+        volume=np.ones(len(close)),
+    )
+
+
+@pytest.fixture(scope="module")
+def closes() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    vols = np.array([0.002, 0.004, 0.008, 0.012, 0.02, 0.004])
+    drifts = np.array([0.0, 0.002, -0.001, 0.0, 0.0, -0.003])
+    return 100 * np.exp(np.cumsum(rng.normal(drifts, vols, (200, len(vols))), axis=0))
+
+
+def _assert_same(batched: list[object], columns: list[np.ndarray], timeframe: str) -> None:
+    for result, column in zip(batched, columns):
+        expected = regime_detector.detect(_frame(column), timeframe)
+        assert result.regime == expected.regime
+        assert result.confidence == pytest.approx(expected.confidence, abs=1e-6, nan_ok=True)
+        np.testing.assert_allclose(
+            [result.volatility, result.adx_proxy, result.rsi],
+            [expected.volatility, expected.adx_proxy, expected.rsi],
+            rtol=1e-6,
+        )
+        assert result.distribution.keys() == expected.distribution.keys()
+        np.testing.assert_allclose(
+            list(result.distribution.values()), list(expected.distribution.values()), atol=1e-9
+        )
+
+
+@pytest.mark.parametrize("timeframe", ["1h", "1d"])
+def test_detect_many_matches_detect(closes: np.ndarray, timeframe: str) -> None:
+    padded = closes.copy()
+    padded[:-25, -1] = np.nan
+    columns = [closes[:, i] for i in range(closes.shape[1] - 1)] + [closes[-25:, -1]]
+    _assert_same(regime_detector.detect_many(padded, timeframe), columns, timeframe)
+
+
+def test_detect_many_on_fewer_than_thirty_bars(closes: np.ndarray) -> None:
+    short = closes[-25:]
+    _assert_same(regime_detector.detect_many(short, "1h"), list(short.T), "1h")
@@ -0,0 +1,60 @@
+"""Single-timestamp and range replays must give the same decision for the same bar."""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import settings
+from app.features.research_service import research_service
+
+
+@pytest.fixture
+def short_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "replay_window_bars", 120)
+
+
+async def _range(start: datetime, end: datetime) -> list[dict[str, object]]:
+    stream = await research_service.replay_range("BTCUSDT", "1h", start, end)
+    return [json.loads(line) async for chunk in stream for line in chunk.decode().splitlines()]
+
+
+def _decision(result: dict[str, object]) -> tuple[object, ...]:
+    return (
+        result["regime"],
+        result["suggested_direction"],
+        result["confidence"],
+        [(signal["name"], signal["direction"], signal["confidence_score"]) for signal in result["signals"]],
+    )
+
+
+def test_single_replay_matches_range(short_window: None) -> None:
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start, end = now - timedelta(hours=400), now - timedelta(hours=150)
+
+    async def run() -> tuple[list[dict[str, object]], list[dict[str, object]], list[dict[str, object]]]:
+        full = await _range(start, end)
+        later = await _range(start + timedelta(hours=97), end)
+        singles = []
+        for line in full[::41]:
+            at = datetime.fromisoformat(line["timestamp"]) + timedelta(minutes=30)
+            singles.append(await research_service.historical_replay("BTCUSDT", "1h", at.isoformat()))
+        return full, later, singles
+
+    full, later, singles = asyncio.run(run())
+    assert len(full) == 251
+
+    by_timestamp = {line["timestamp"]: line for line in full}
+    assert later and all(line == by_timestamp[line["timestamp"]] for line in later)
+
+    for single in singles:
+        line = by_timestamp[single["replay_bar_timestamp"]]
+        flattened = {
+            "regime": single["regime"]["regime"],
+            "suggested_direction": single["decision"]["suggested_direction"],
+            "confidence": single["decision"]["confidence"],
+            "signals": single["signals"],
+        }
+        assert _decision(flattened) == _decision({**line, "signals": line["signals"][:3]})
@@ -0,0 +1,65 @@
+"""A dashboard schedule runs only while someone is reading it."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from config import settings
+from app.data.providers import market_data_service
+from app.features.scheduler import DashboardScheduler
+
+
+class FakeService:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def dashboard(self, assets: list[str], timeframe: str) -> dict[str, object]:
+        self.calls += 1
+        return {"generated_at": self.calls, "assets": [], "errors": [], "portfolio": {}, "logs": []}
+
+
+@pytest.fixture
+def fast_bars(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(market_data_service.timeframe_map, "1s", 1)
+    monkeypatch.setattr(settings, "scheduler_settle_seconds", 0.05)
+    monkeypatch.setattr(settings, "scheduler_idle_bars", 1)
+
+
+def test_idle_schedule_stops_and_restarts(fast_bars: None) -> None:
+    service = FakeService()
+    scheduler = DashboardScheduler(service)
+
+    async def run() -> None:
+        first = await scheduler.latest("1s")
+        await asyncio.sleep(3.5)
+        assert "1s" not in scheduler._tasks
+        stopped_at = service.calls
+        await asyncio.sleep(1.2)
+        assert service.calls == stopped_at
+
+        again = await scheduler.latest("1s")
+        assert again["generated_at"] > first["generated_at"]
+        await scheduler.close()
+
+    asyncio.run(run())
+
+
+def test_subscriber_keeps_schedule_running(fast_bars: None) -> None:
+    service = FakeService()
+    scheduler = DashboardScheduler(service)
+
+    async def run() -> list[str]:
+        kinds = []
+        stream = scheduler.subscribe("1s")
+        async for kind, _ in stream:
+            kinds.append(kind)
+            if len(kinds) == 4:
+                break
+        await stream.aclose()
+        assert not scheduler._tasks["1s"].done()
+        await scheduler.close()
+        return kinds
+
+    kinds = asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert kinds.count("update") >= 2
@@ -0,0 +1,17 @@
+"""Import-time budgets for the entry points short-lived processes load (see ``benchmarks/startup.py``)."""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from benchmarks.startup import TARGETS, check
+
+SCALE = float(os.environ.get("STARTUP_BUDGET_SCALE", "1"))
+
+
+@pytest.mark.parametrize("module", list(TARGETS))
+def test_import_budget(module: str) -> None:
+    total, budget, forbidden, _ = check(module, repeats=3, scale=SCALE)
+    assert not forbidden, f"{module} eagerly imports {', '.join(forbidden[:10])}"
+    assert total <= budget, f"{module} imports in {total:.1f} ms, budget {budget:.0f} ms"